@@ -0,0 +1,34 @@
+"""unique price history bars
+
+Revision ID: 0b5f3e9d2c41
+Revises: f03de97078c8
+Create Date: 2026-10-17 10:41:07.532114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b5f3e9d2c41'
+down_revision: Union[str, Sequence[str], None] = 'f03de97078c8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate bars first, keeping the oldest row (ids are UUIDv7, so
+    # the smallest id was inserted first).
+    op.execute(
+        'DELETE FROM price_history a USING price_history b '
+        'WHERE a.asset_ticker = b.asset_ticker '
+        'AND a.timestamp = b.timestamp AND a.id > b.id'
+    )
+    op.create_unique_constraint('uq_price_history_asset_ticker_timestamp', 'price_history', ['asset_ticker', 'timestamp'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_price_history_asset_ticker_timestamp', 'price_history', type_='unique')
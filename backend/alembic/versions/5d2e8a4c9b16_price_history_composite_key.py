@@ -0,0 +1,46 @@
+"""price history composite key
+
+Revision ID: 5d2e8a4c9b16
+Revises: 3b8f0c6d2a57
+Create Date: 2026-10-17 17:55:41.208376
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8a4c9b16'
+down_revision: Union[str, Sequence[str], None] = '3b8f0c6d2a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (asset_ticker, timestamp) becomes the primary key, replacing the
+    # surrogate id, the unique constraint on the same columns and both
+    # single-column indexes.
+    op.drop_constraint('price_history_pkey', 'price_history', type_='primary')
+    op.create_primary_key('price_history_pkey', 'price_history', ['asset_ticker', 'timestamp'])
+    op.drop_constraint('uq_price_history_asset_ticker_timestamp', 'price_history', type_='unique')
+    op.drop_index(op.f('ix_price_history_timestamp'), table_name='price_history')
+    op.drop_index(op.f('ix_price_history_asset_ticker'), table_name='price_history')
+    op.drop_column('price_history', 'id')
+    # Rewrite the table in key order, so each ticker's bars sit on adjacent
+    # pages. PostgreSQL does not keep that order for later inserts; re-run
+    # CLUSTER after large backfills if range scans degrade.
+    op.execute('CLUSTER price_history USING price_history_pkey')
+    op.execute('ANALYZE price_history')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('price_history', sa.Column('id', sa.UUID(), server_default=sa.text('uuidv7()'), nullable=False))
+    op.drop_constraint('price_history_pkey', 'price_history', type_='primary')
+    op.create_primary_key('price_history_pkey', 'price_history', ['id'])
+    op.create_unique_constraint('uq_price_history_asset_ticker_timestamp', 'price_history', ['asset_ticker', 'timestamp'])
+    op.create_index(op.f('ix_price_history_asset_ticker'), 'price_history', ['asset_ticker'], unique=False)
+    op.create_index(op.f('ix_price_history_timestamp'), 'price_history', ['timestamp'], unique=False)
@@ -0,0 +1,33 @@
+"""unique dividend events
+
+Revision ID: 7c2a91d4e8f6
+Revises: 0b5f3e9d2c41
+Create Date: 2026-10-17 14:02:51.884417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2a91d4e8f6'
+down_revision: Union[str, Sequence[str], None] = '0b5f3e9d2c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicate events first, keeping the oldest row (UUIDv7 ids).
+    op.execute(
+        'DELETE FROM dividend_event a USING dividend_event b '
+        'WHERE a.asset_ticker = b.asset_ticker '
+        'AND a.ex_date = b.ex_date AND a.id > b.id'
+    )
+    op.create_unique_constraint('uq_dividend_event_asset_ticker_ex_date', 'dividend_event', ['asset_ticker', 'ex_date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_dividend_event_asset_ticker_ex_date', 'dividend_event', type_='unique')
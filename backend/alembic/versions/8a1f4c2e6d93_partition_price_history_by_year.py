@@ -0,0 +1,108 @@
+"""partition price history by year
+
+Revision ID: 8a1f4c2e6d93
+Revises: 5d2e8a4c9b16
+Create Date: 2026-10-17 18:37:12.904518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a1f4c2e6d93'
+down_revision: Union[str, Sequence[str], None] = '5d2e8a4c9b16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the current table aside, under names the new one does not use.
+    op.rename_table('price_history', 'price_history_unpartitioned')
+    op.execute(
+        'ALTER TABLE price_history_unpartitioned '
+        'RENAME CONSTRAINT price_history_pkey TO price_history_unpartitioned_pkey'
+    )
+
+    # The foreign key is named explicitly: the old table still holds the
+    # generated name, and PostgreSQL would otherwise pick
+    # price_history_asset_ticker_fkey1.
+    op.execute(
+        'CREATE TABLE price_history ('
+        'asset_ticker varchar NOT NULL, '
+        'timestamp timestamptz NOT NULL, '
+        'price numeric(24, 10) NOT NULL, '
+        'CONSTRAINT price_history_pkey PRIMARY KEY (asset_ticker, timestamp), '
+        'CONSTRAINT price_history_asset_ticker_fkey FOREIGN KEY (asset_ticker) '
+        'REFERENCES asset (ticker) ON DELETE CASCADE'
+        ') PARTITION BY RANGE (timestamp)'
+    )
+    op.execute('CREATE TABLE price_history_default PARTITION OF price_history DEFAULT')
+
+    # One partition per UTC year holding bars, and for the current and next
+    # year; app/migrate.py creates later ones as time passes.
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            y int;
+        BEGIN
+            FOR y IN
+                SELECT DISTINCT extract(year FROM timestamp AT TIME ZONE 'UTC')::int
+                FROM price_history_unpartitioned
+                UNION
+                SELECT extract(year FROM now() AT TIME ZONE 'UTC')::int + n
+                FROM generate_series(0, 1) AS n
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE price_history_y%s PARTITION OF price_history '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    y,
+                    make_timestamptz(y, 1, 1, 0, 0, 0, 'UTC'),
+                    make_timestamptz(y + 1, 1, 1, 0, 0, 0, 'UTC')
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+    op.execute(
+        'INSERT INTO price_history (asset_ticker, timestamp, price) '
+        'SELECT asset_ticker, timestamp, price FROM price_history_unpartitioned '
+        'ORDER BY asset_ticker, timestamp'
+    )
+    op.drop_table('price_history_unpartitioned')
+    op.execute('ANALYZE price_history')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        'CREATE TABLE price_history_unpartitioned ('
+        'asset_ticker varchar NOT NULL '
+        'REFERENCES asset (ticker) ON DELETE CASCADE, '
+        'timestamp timestamptz NOT NULL, '
+        'price numeric(24, 10) NOT NULL, '
+        'CONSTRAINT price_history_unpartitioned_pkey '
+        'PRIMARY KEY (asset_ticker, timestamp))'
+    )
+    op.execute(
+        'INSERT INTO price_history_unpartitioned (asset_ticker, timestamp, price) '
+        'SELECT asset_ticker, timestamp, price FROM price_history '
+        'ORDER BY asset_ticker, timestamp'
+    )
+    # Dropping the parent drops every partition with it.
+    op.drop_table('price_history')
+    op.rename_table('price_history_unpartitioned', 'price_history')
+    op.execute(
+        'ALTER TABLE price_history '
+        'RENAME CONSTRAINT price_history_unpartitioned_pkey TO price_history_pkey'
+    )
+    op.execute(
+        'ALTER TABLE price_history RENAME CONSTRAINT '
+        'price_history_unpartitioned_asset_ticker_fkey '
+        'TO price_history_asset_ticker_fkey'
+    )
@@ -0,0 +1,32 @@
+"""add asset search indexes
+
+Revision ID: f03de97078c8
+Revises: de3073aee7a3
+Create Date: 2026-10-17 09:12:44.208311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f03de97078c8'
+down_revision: Union[str, Sequence[str], None] = 'de3073aee7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Trigram GIN indexes make ILIKE '%...%' on ticker/name index-assisted.
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_asset_ticker_trgm', 'asset', ['ticker'], unique=False, postgresql_using='gin', postgresql_ops={'ticker': 'gin_trgm_ops'})
+    op.create_index('ix_asset_name_trgm', 'asset', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_asset_name_trgm', table_name='asset', postgresql_using='gin')
+    op.drop_index('ix_asset_ticker_trgm', table_name='asset', postgresql_using='gin')
+    # pg_trgm is left installed: other objects may depend on it.
@@ -7,10 +7,11 @@ a cold start, and -- because the app scales out -- let several replicas race
 each other into a concurrent ``alembic upgrade head``.
 
 This module does both in a single process, guarded by a PostgreSQL advisory
-lock so only one process migrates at a time. It is intended to be run as a
-deploy step (see ``.github/workflows/backend-deploy.yml``) rather than on boot;
-``entrypoint.sh`` will still run it when ``RUN_MIGRATIONS=1`` for local
-development.
+lock so only one process migrates at a time, then maintains the yearly
+partitions of ``price_history`` (see ``app/partitions.py``). It is intended to
+be run as a deploy step (see ``.github/workflows/backend-deploy.yml``) rather
+than on boot; ``entrypoint.sh`` will still run it when ``RUN_MIGRATIONS=1`` for
+local development.
 """
 
 import logging
@@ -23,6 +24,7 @@ from sqlalchemy import text
 from alembic import command
 from alembic.config import Config
 from app.core.database import get_engine
+from app.partitions import maintain_price_history_partitions
 from app.seed import seed_currencies
 
 logger = logging.getLogger(__name__)
@@ -79,6 +81,12 @@ def run_migrations() -> None:
             logger.info("Seeding reference data...")
             seed_currencies()
             logger.info("Seeding completed.")
+
+            # price_history is partitioned by year; keep partitions ahead of
+            # time and apply its retention policy while still holding the lock.
+            if is_postgres:
+                logger.info("Maintaining price_history partitions...")
+                maintain_price_history_partitions(connection)
         finally:
             if is_postgres:
                 connection.execute(
@@ -90,6 +98,38 @@ def run_migrations() -> None:
     engine.dispose()
 
 
+def maintain_partitions() -> bool:
+    """Maintain the price_history partitions between deploys.
+
+    Run periodically by the sync worker (app/worker.py), so partitions exist
+    before a new year starts and backfilled bars leave the default partition
+    without waiting for a deploy. Skipped, returning False, while a migration
+    or another worker holds the migration lock.
+    """
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        return False
+
+    with engine.connect() as connection:
+        locked = connection.execute(
+            text("SELECT pg_try_advisory_lock(:lock_id)"),
+            {"lock_id": MIGRATION_LOCK_ID},
+        ).scalar()
+        connection.commit()
+        if not locked:
+            return False
+        try:
+            maintain_price_history_partitions(connection)
+        finally:
+            connection.rollback()
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:lock_id)"),
+                {"lock_id": MIGRATION_LOCK_ID},
+            )
+            connection.commit()
+    return True
+
+
 def main() -> int:
     logging.basicConfig(
         level=logging.INFO,
@@ -9,6 +9,8 @@ from .dividend_event import DividendEvent
 from .portfolio import Portfolio
 from .position import Position
 from .price_history import PriceHistory
+from .sync_job import SyncJob, SyncJobItem
+from .ticker_sync_state import TickerSyncState
 from .transaction import Transaction, TransactionType
 from .user import User
 
@@ -23,4 +25,7 @@ __all__ = [
     "Transaction",
     "TransactionType",
     "PriceHistory",
+    "SyncJob",
+    "SyncJobItem",
+    "TickerSyncState",
 ]
@@ -17,6 +17,22 @@ class AssetType(str, enum.Enum):
 
 class Asset(Base):
     __tablename__ = "asset"
+    # Trigram indexes (pg_trgm) serve the substring search in
+    # AssetService.search_assets.
+    __table_args__ = (
+        sa.Index(
+            "ix_asset_ticker_trgm",
+            "ticker",
+            postgresql_using="gin",
+            postgresql_ops={"ticker": "gin_trgm_ops"},
+        ),
+        sa.Index(
+            "ix_asset_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     ticker = sa.Column(String, primary_key=True, index=True)
     asset_type = sa.Column(sa.Enum(AssetType), nullable=False, default=AssetType.STOCK)
@@ -7,6 +7,13 @@ from app.core.database import Base
 
 class DividendEvent(Base):
     __tablename__ = "dividend_event"
+    # One event per asset and ex-date; dividend syncs insert with
+    # ON CONFLICT DO NOTHING against it.
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "asset_ticker", "ex_date", name="uq_dividend_event_asset_ticker_ex_date"
+        ),
+    )
 
     id = sa.Column(
         UUID(as_uuid=True), primary_key=True, server_default=sa.text("uuidv7()")
@@ -1,5 +1,4 @@
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -7,18 +6,18 @@ from app.core.database import Base
 
 class PriceHistory(Base):
     __tablename__ = "price_history"
+    # Partitioned by UTC year; partitions are managed by app/partitions.py.
+    __table_args__ = {"postgresql_partition_by": "RANGE (timestamp)"}
 
-    id = sa.Column(
-        UUID(as_uuid=True), primary_key=True, server_default=sa.text("uuidv7()")
-    )
-
+    # One bar per asset and timestamp. The key is also the only index: every
+    # read filters on the ticker and scans a time range of it in order, and
+    # history syncs insert with ON CONFLICT DO NOTHING against it.
     asset_ticker = sa.Column(
         sa.String,
         sa.ForeignKey("asset.ticker", ondelete="CASCADE"),
-        nullable=False,
-        index=True,
+        primary_key=True,
     )
+    timestamp = sa.Column(sa.DateTime(timezone=True), primary_key=True)
     price = sa.Column(sa.Numeric(precision=24, scale=10), nullable=False)
-    timestamp = sa.Column(sa.DateTime(timezone=True), nullable=False, index=True)
 
     asset = relationship("Asset")
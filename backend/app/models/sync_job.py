@@ -0,0 +1,77 @@
+import sqlalchemy as sa
+import uuid6
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+
+
+class SyncJob(Base):
+    """A market-data sync requested by an admin, drained by `app.worker`."""
+
+    __tablename__ = "sync_job"
+
+    id = sa.Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid6.uuid7,
+        server_default=sa.text("uuidv7()"),
+    )
+
+    # "history" or "dividends"
+    kind = sa.Column(sa.String(32), nullable=False)
+    # Sync options, e.g. {"period": "max", "full": true, "concurrency": 8}
+    params = sa.Column(JSONB, nullable=False, server_default=sa.text("'{}'::jsonb"))
+    # queued -> running -> succeeded | partial | failed
+    status = sa.Column(sa.String(16), nullable=False, server_default="queued")
+
+    created_at = sa.Column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+    started_at = sa.Column(sa.DateTime(timezone=True), nullable=True)
+    finished_at = sa.Column(sa.DateTime(timezone=True), nullable=True)
+
+    items = relationship(
+        "SyncJobItem", back_populates="job", cascade="all, delete-orphan"
+    )
+
+
+class SyncJobItem(Base):
+    """One ticker of a sync job; the unit workers claim and retry."""
+
+    __tablename__ = "sync_job_item"
+    # Serves the claim query: pending items due first.
+    __table_args__ = (
+        sa.Index(
+            "ix_sync_job_item_status_next_attempt_at", "status", "next_attempt_at"
+        ),
+    )
+
+    id = sa.Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid6.uuid7,
+        server_default=sa.text("uuidv7()"),
+    )
+
+    job_id = sa.Column(
+        UUID(as_uuid=True),
+        sa.ForeignKey("sync_job.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    ticker = sa.Column(sa.String, nullable=False)
+
+    # pending -> running -> succeeded | failed (back to pending for a retry)
+    status = sa.Column(sa.String(16), nullable=False, server_default="pending")
+    attempts = sa.Column(sa.Integer, nullable=False, server_default="0")
+    next_attempt_at = sa.Column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+    claimed_at = sa.Column(sa.DateTime(timezone=True), nullable=True)
+    finished_at = sa.Column(sa.DateTime(timezone=True), nullable=True)
+
+    inserted = sa.Column(sa.Integer, nullable=False, server_default="0")
+    error = sa.Column(sa.Text, nullable=True)
+
+    job = relationship("SyncJob", back_populates="items")
@@ -0,0 +1,18 @@
+import sqlalchemy as sa
+
+from app.core.database import Base
+
+
+class TickerSyncState(Base):
+    """When a ticker's market data was last synced, by any replica.
+
+    Login syncs skip tickers synced within their freshness window; see
+    app/services/login_sync.py.
+    """
+
+    __tablename__ = "ticker_sync_state"
+
+    # No foreign key: a marker for a ticker missing from `asset` is harmless,
+    # and must not fail the login sync that writes it.
+    ticker = sa.Column(sa.String, primary_key=True)
+    last_synced_at = sa.Column(sa.DateTime(timezone=True), nullable=False)
@@ -0,0 +1,229 @@
+"""Yearly partitions of `price_history`, and its retention policy.
+
+`price_history` is range-partitioned on `timestamp`: one partition per UTC
+calendar year (`price_history_y2024`), plus `price_history_default` for bars
+outside all of them. Old years then cost nothing to vacuum or reindex once
+settled, and retention works on whole partitions instead of row deletes.
+
+`maintain_price_history_partitions` runs after every migration (see
+app/migrate.py) and periodically from the sync worker (app/worker.py), always
+under the migration lock, and:
+
+- creates the partitions of the current and next `PRICE_HISTORY_PARTITIONS_AHEAD`
+  years, so syncs never write to the default partition;
+- moves bars that did land there (a backfill reaching back before any stored
+  year) into partitions of their own;
+- drops the partitions of years older than `PRICE_HISTORY_RETENTION_YEARS`;
+- compacts the partitions of years older than
+  `PRICE_HISTORY_COMPACT_AFTER_YEARS` to the last bar per ticker and
+  `PRICE_HISTORY_COMPACT_RESOLUTION`: a compacted copy is built, then swapped
+  in for the partition.
+
+Both retention settings default to 0, which keeps every bar.
+"""
+
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+# Years after the current one to create partitions for in advance.
+PRICE_HISTORY_PARTITIONS_AHEAD = int(os.getenv("PRICE_HISTORY_PARTITIONS_AHEAD") or 1)
+# Years of bars kept; older yearly partitions are dropped. 0 keeps them all.
+PRICE_HISTORY_RETENTION_YEARS = int(os.getenv("PRICE_HISTORY_RETENTION_YEARS") or 0)
+# Years after which a partition is compacted. 0 never compacts.
+PRICE_HISTORY_COMPACT_AFTER_YEARS = int(
+    os.getenv("PRICE_HISTORY_COMPACT_AFTER_YEARS") or 0
+)
+# Bucket compacted partitions keep one bar (the last) of: "week" or "month".
+PRICE_HISTORY_COMPACT_RESOLUTION = (
+    os.getenv("PRICE_HISTORY_COMPACT_RESOLUTION") or "week"
+)
+
+COMPACT_RESOLUTIONS = ("week", "month")
+DEFAULT_PARTITION = "price_history_default"
+
+_PARTITION_RE = re.compile(r"^price_history_y(\d{4})$")
+
+
+def partition_name(year: int) -> str:
+    return f"price_history_y{int(year)}"
+
+
+def _bounds(year: int) -> Dict[str, str]:
+    return {
+        "lo": f"{int(year)}-01-01 00:00:00+00",
+        "hi": f"{int(year) + 1}-01-01 00:00:00+00",
+    }
+
+
+def yearly_partitions(connection: Connection) -> Dict[int, str]:
+    """Year -> name of every yearly partition attached to `price_history`."""
+    rows = connection.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST('price_history' AS regclass)"
+        )
+    ).all()
+    partitions = {}
+    for (name,) in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[int(match.group(1))] = name
+    return partitions
+
+
+def _default_years(connection: Connection) -> List[int]:
+    rows = connection.execute(
+        text(
+            "SELECT DISTINCT extract(year FROM timestamp AT TIME ZONE 'UTC')::int "
+            f"FROM {DEFAULT_PARTITION}"
+        )
+    ).all()
+    return sorted(year for (year,) in rows)
+
+
+def create_partition(connection: Connection, year: int) -> None:
+    """Add the partition of `year`, moving its bars out of the default one.
+
+    A partition cannot be created over a range the default partition holds
+    rows of, so it is built detached, filled from the default partition,
+    and attached once those rows are gone.
+    """
+    name = partition_name(year)
+    bounds = _bounds(year)
+    # Writers routed to the default partition wait until the rows are moved
+    # and the partition attached; otherwise a bar inserted in between would
+    # make the attach fail its scan of the default partition.
+    connection.execute(
+        text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE")
+    )
+    in_year = (
+        "timestamp >= CAST(:lo AS timestamptz) AND timestamp < CAST(:hi AS timestamptz)"
+    )
+    connection.execute(
+        text(
+            f"CREATE TABLE {name} "
+            "(LIKE price_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    connection.execute(
+        text(
+            f"INSERT INTO {name} (asset_ticker, timestamp, price) "
+            f"SELECT asset_ticker, timestamp, price FROM {DEFAULT_PARTITION} "
+            f"WHERE {in_year}"
+        ),
+        bounds,
+    )
+    connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_year}"), bounds)
+    _attach(connection, name, year)
+    connection.commit()
+
+
+def _attach(connection: Connection, name: str, year: int) -> None:
+    bounds = _bounds(year)
+    connection.execute(
+        text(
+            f"ALTER TABLE price_history ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['lo']}') TO ('{bounds['hi']}')"
+        )
+    )
+
+
+def drop_partition(connection: Connection, year: int) -> None:
+    connection.execute(text(f"DROP TABLE {partition_name(year)}"))
+    connection.commit()
+
+
+def compact_partition(connection: Connection, year: int, resolution: str) -> bool:
+    """Keep only the last bar per ticker and `resolution` in a year's partition.
+
+    Returns False, leaving the partition alone, when it already holds at most
+    one bar per bucket.
+    """
+    if resolution not in COMPACT_RESOLUTIONS:
+        raise ValueError(f"Unknown compaction resolution: {resolution!r}")
+    name = partition_name(year)
+    bucket = f"date_trunc('{resolution}', timestamp, 'UTC')"
+
+    needed = connection.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {name} "
+            f"GROUP BY asset_ticker, {bucket} HAVING count(*) > 1)"
+        )
+    ).scalar()
+    if not needed:
+        connection.rollback()
+        return False
+
+    # Writes to the year wait until the compacted copy is swapped in;
+    # otherwise bars inserted during the copy would be dropped with the old
+    # partition. price_history is locked first, as writers lock it before
+    # their partition: a writer never waits on the partition while holding
+    # price_history, which the DETACH below takes exclusively.
+    connection.execute(
+        text("LOCK TABLE ONLY price_history IN SHARE ROW EXCLUSIVE MODE")
+    )
+    connection.execute(text(f"LOCK TABLE {name} IN SHARE ROW EXCLUSIVE MODE"))
+    compacted = f"{name}_compacted"
+    connection.execute(
+        text(
+            f"CREATE TABLE {compacted} "
+            "(LIKE price_history INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    connection.execute(
+        text(
+            f"INSERT INTO {compacted} (asset_ticker, timestamp, price) "
+            f"SELECT DISTINCT ON (asset_ticker, {bucket}) "
+            f"asset_ticker, timestamp, price FROM {name} "
+            f"ORDER BY asset_ticker, {bucket}, timestamp DESC"
+        )
+    )
+    connection.execute(text(f"ALTER TABLE price_history DETACH PARTITION {name}"))
+    connection.execute(text(f"DROP TABLE {name}"))
+    connection.execute(text(f"ALTER TABLE {compacted} RENAME TO {name}"))
+    _attach(connection, name, year)
+    connection.commit()
+    return True
+
+
+def maintain_price_history_partitions(
+    connection: Connection, now: Optional[datetime] = None
+) -> Dict[str, List[int]]:
+    """Create, drop and compact yearly partitions; returns the years touched."""
+    current = (now or datetime.now(timezone.utc)).year
+    partitions = yearly_partitions(connection)
+    done: Dict[str, List[int]] = {"created": [], "dropped": [], "compacted": []}
+
+    wanted = set(range(current, current + PRICE_HISTORY_PARTITIONS_AHEAD + 1))
+    wanted.update(_default_years(connection))
+    for year in sorted(wanted - set(partitions)):
+        create_partition(connection, year)
+        partitions[year] = partition_name(year)
+        done["created"].append(year)
+
+    if PRICE_HISTORY_RETENTION_YEARS > 0:
+        cutoff = current - PRICE_HISTORY_RETENTION_YEARS
+        for year in sorted(y for y in partitions if y < cutoff):
+            drop_partition(connection, year)
+            del partitions[year]
+            done["dropped"].append(year)
+
+    if PRICE_HISTORY_COMPACT_AFTER_YEARS > 0:
+        cutoff = current - PRICE_HISTORY_COMPACT_AFTER_YEARS
+        for year in sorted(y for y in partitions if y < cutoff):
+            if compact_partition(connection, year, PRICE_HISTORY_COMPACT_RESOLUTION):
+                done["compacted"].append(year)
+
+    for action, years in done.items():
+        if years:
+            logger.info("price_history partitions %s: %s", action, years)
+    return done
@@ -1,80 +1,177 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+from typing import Annotated, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.core.database import get_db
-from app.models import PriceHistory
-from app.schemas.asset import PriceHistoryListResponse
-from app.services.market_data import MarketDataService
-from app.services.market_sync import MarketSyncService
+from app.schemas.asset import AssetHistoryQuery, PriceHistoryListResponse
+from app.services.asset_service import AssetService
+from app.services.market_sync import SYNC_CONCURRENCY
+from app.services.price_history import (
+    DELTA,
+    HISTORY_MEDIA_TYPES,
+    ROWS,
+    PriceHistoryService,
+    encode_columnar,
+    negotiate_encoding,
+)
+from app.services.sync_jobs import (
+    DIVIDENDS,
+    HISTORY,
+    enqueue_sync_job,
+    get_sync_job_status,
+)
 
 router = APIRouter(prefix="/assets", tags=["Assets"])
 
 
 @router.get("/search", summary="Rechercher un actif par nom")
 def search_assets(
-    asset: str = Query(..., min_length=2, description="Nom ou ticker à chercher")
+    asset: str = Query(..., min_length=2, description="Nom ou ticker à chercher"),
+    db: Session = Depends(get_db),
 ):
     """
     Retourne une liste d'actifs correspondants.
     Exemple : asset=credit agricole, asset=bitcoin, asset=apple
+
+    Les actifs déjà connus en base sont cherchés en premier ; Yahoo n'est
+    interrogé que si les résultats locaux sont insuffisants.
     """
-    results = MarketDataService.search_assets(asset)
+    results = AssetService.search_assets(db, asset)
     return {"results": results}
 
 
-@router.post("/sync-history", summary="[ADMIN] Synchroniser l'historique des prix")
+@router.post(
+    "/sync-history",
+    status_code=202,
+    summary="[ADMIN] Synchroniser l'historique des prix",
+)
 def sync_price_history(
     period: str = Query("1mo", description="Période (ex: 1mo, 6mo, 1y, max)"),
+    full: bool = Query(
+        False,
+        description="Retélécharger toute la période, même si l'historique existe",
+    ),
+    concurrency: int = Query(
+        SYNC_CONCURRENCY, ge=1, le=32, description="Téléchargements simultanés"
+    ),
     db: Session = Depends(get_db),
     current_user=Depends(deps.get_current_user),
 ):
+    """
+    Met la synchronisation en file d'attente (traitée par `python -m
+    app.worker`) et retourne l'identifiant de la tâche, à suivre via
+    `GET /assets/sync-jobs/{job_id}`.
+
+    Par défaut, seuls les jours manquants depuis le dernier prix stocké sont
+    téléchargés ; la période ne s'applique qu'aux actifs sans historique.
+    """
     # Restrict sync endpoints to admin users.
     if getattr(current_user, "is_superuser", False) is False:
         raise HTTPException(status_code=403, detail="Accès refusé.")
 
-    records_added = MarketSyncService.sync_all_price_histories(db=db, period=period)
+    job = enqueue_sync_job(
+        db, HISTORY, {"period": period, "full": full, "concurrency": concurrency}
+    )
 
-    return {
-        "message": "Synchronisation terminée avec succès",
-        "new_records_inserted": records_added,
-    }
+    return {"message": "Synchronisation lancée", "job_id": str(job.id)}
 
 
-@router.get("/{ticker}/history", response_model=PriceHistoryListResponse)
+@router.get("/sync-jobs/{job_id}", summary="[ADMIN] Suivre une synchronisation")
+def get_sync_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user=Depends(deps.get_current_user),
+):
+    """
+    Statut d'une tâche de synchronisation : tickers traités, lignes insérées,
+    échecs par ticker et durée écoulée.
+    """
+    if getattr(current_user, "is_superuser", False) is False:
+        raise HTTPException(status_code=403, detail="Accès refusé.")
+
+    job = get_sync_job_status(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche introuvable.")
+    return job
+
+
+@router.get(
+    "/{ticker}/history",
+    response_model=PriceHistoryListResponse,
+    responses={
+        200: {
+            "content": {media: {} for media in HISTORY_MEDIA_TYPES.values()},
+            "description": "Historique, en lignes ou en colonnes",
+        }
+    },
+)
 def get_asset_history(
     ticker: str,
+    options: Annotated[AssetHistoryQuery, Query()],
+    response: Response,
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user=Depends(deps.get_current_user),
 ):
-    history = (
-        db.query(PriceHistory)
-        .filter(PriceHistory.asset_ticker == ticker)
-        .order_by(PriceHistory.timestamp.asc())
-        .all()
-    )
+    """
+    Historique des prix d'un actif, du plus ancien au plus récent.
 
-    # Return the full payload matching PriceHistoryListResponse.
+    Sans paramètre, tout l'historique stocké est retourné. Pour un graphique,
+    borner la période (`start`, `end`) et le nombre de points (`resolution`
+    ou `max_points`) garde la réponse de taille constante, quelle que soit la
+    profondeur de l'historique.
+
+    Le format colonnes se demande par `format=columnar|delta` ou par l'en-tête
+    `Accept: application/vnd.stakr.history.columnar+json` (ou `.delta+json`).
+    """
+    # The body depends on Accept: shared caches must key on it too.
+    vary = {"Vary": "Accept"}
+    try:
+        points = PriceHistoryService.get_history(
+            db, ticker, **options.model_dump(exclude={"format"})
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e), headers=vary)
+
+    encoding = options.format or negotiate_encoding(accept)
+    if encoding != ROWS:
+        # Serialized directly: no per-bar model, Decimal or datetime encoding.
+        body = encode_columnar(ticker, points, delta=encoding == DELTA)
+        return Response(
+            content=json.dumps(body, separators=(",", ":")),
+            media_type=HISTORY_MEDIA_TYPES[encoding],
+            headers=vary,
+        )
+
+    response.headers.update(vary)
+    history = [{"timestamp": ts, "price": price} for ts, price in points]
     return {"ticker": ticker, "count": len(history), "history": history}
 
 
 @router.post(
-    "/sync-dividends", summary="[ADMIN] Synchroniser l'historique des dividendes"
+    "/sync-dividends",
+    status_code=202,
+    summary="[ADMIN] Synchroniser l'historique des dividendes",
 )
 def sync_dividends(
     db: Session = Depends(get_db), current_user=Depends(deps.get_current_user)
 ):
     """
     Scrape l'historique complet des dividendes pour tous les actifs présents en base.
+
+    Met la synchronisation en file d'attente (traitée par `python -m
+    app.worker`) et retourne l'identifiant de la tâche, à suivre via
+    `GET /assets/sync-jobs/{job_id}`.
     """
     if getattr(current_user, "is_superuser", False) is False:
         raise HTTPException(
             status_code=403, detail="Accès réservé aux administrateurs."
         )
 
-    records_added = MarketSyncService.sync_dividends(db)
+    job = enqueue_sync_job(db, DIVIDENDS)
 
-    return {
-        "message": "Synchronisation des dividendes terminée",
-        "new_dividends_inserted": records_added,
-    }
+    return {"message": "Synchronisation des dividendes lancée", "job_id": str(job.id)}
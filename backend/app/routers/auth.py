@@ -1,6 +1,6 @@
 from datetime import timedelta
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
@@ -9,7 +9,7 @@ from app.core import security
 from app.core.database import get_db
 from app.schemas import crud as crud_user
 from app.schemas import user as schemas_user
-from app.services.login_sync import run_user_market_sync
+from app.services.login_sync import schedule_user_market_sync
 
 router = APIRouter(tags=["Auth"])
 
@@ -47,7 +47,6 @@ def register(
     },
 )
 def login_access_token(
-    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
 ) -> dict:
@@ -68,7 +67,7 @@ def login_access_token(
     )
 
     # Keep login response fast and trigger sync as best-effort background work.
-    background_tasks.add_task(run_user_market_sync, user.id)
+    schedule_user_market_sync(user.id)
 
     return {"access_token": access_token, "token_type": "bearer"}
 
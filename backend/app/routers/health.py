@@ -4,6 +4,7 @@
 - `GET /ready`: readiness probe (checks database connectivity).
 - `GET /db-test` is a hidden backward-compatible alias for `/ready`.
 - `GET /version`: backend version.
+- `GET /metrics`: in-process counters of the market-data layer.
 """
 
 import logging
@@ -16,6 +17,11 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.core.version import APP_VERSION
 from app.schemas.common import DatabaseTestResponse, ErrorResponse, HealthResponse
+from app.services.circuit_breaker import breaker_stats
+from app.services.login_sync import login_sync_executor
+from app.services.quote_cache import quote_cache
+from app.services.search_cache import search_cache
+from app.services.singleflight import market_data_flight
 
 logger = logging.getLogger(__name__)
 
@@ -76,6 +82,28 @@ def version() -> dict:
     return {"version": APP_VERSION}
 
 
+@router.get(
+    "/metrics",
+    summary="Runtime metrics",
+    description=(
+        "Returns in-process counters of the market-data layer for this replica "
+        "(quote and search cache hits and misses; coalesced vs. issued "
+        "upstream calls; circuit breaker states and trips; login sync queue "
+        "depth and job latency)."
+    ),
+    operation_id="health_metrics",
+    status_code=status.HTTP_200_OK,
+)
+def metrics() -> dict:
+    return {
+        "quote_cache": quote_cache.stats(),
+        "search_cache": search_cache.stats(),
+        "singleflight": market_data_flight.stats(),
+        "circuit_breakers": breaker_stats(),
+        "login_sync": login_sync_executor.stats(),
+    }
+
+
 @router.post(
     "/echo",
     summary="Echo JSON",
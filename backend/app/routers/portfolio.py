@@ -1,17 +1,30 @@
+import logging
 from decimal import Decimal
-from typing import List
+from typing import Annotated, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.core.database import get_db
 from app.models import Asset, DividendEvent, Portfolio, Position
+from app.schemas.asset import HistoryQuery, PortfolioHistoriesResponse
 from app.schemas.portfolio import PortfolioCreate, PortfolioResponse, PortfolioSummary
 from app.schemas.position import PositionResponse
+from app.services.deadline import Deadline
 from app.services.market_data import MarketDataService
+from app.services.price_history import PriceHistoryService
+from app.services.price_refresh import (
+    PRICE_MAX_AGE_SECONDS,
+    PRICE_REFRESH_BUDGET_SECONDS,
+    is_price_fresh,
+    persist_asset_prices,
+    stale_tickers,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/portfolios", tags=["Portfolios"])
 
@@ -113,9 +126,72 @@ def get_portfolio_positions(
     return response
 
 
+@router.get(
+    "/{portfolio_id}/histories",
+    response_model=PortfolioHistoriesResponse,
+    summary="Historiques des prix des positions",
+)
+def get_portfolio_histories(
+    portfolio_id: UUID,
+    options: Annotated[HistoryQuery, Query()],
+    db: Session = Depends(get_db),
+    current_user=Depends(deps.get_current_user),
+):
+    """
+    Historique des prix de chaque position ouverte du portefeuille, en une
+    seule requête : mêmes options que `GET /assets/{ticker}/history`.
+
+    Avec `resolution` ou `downsample=bucket`, les points de tous les actifs
+    tombent dans les mêmes intervalles de temps.
+    """
+    portfolio = (
+        db.query(Portfolio)
+        .filter(Portfolio.id == portfolio_id, Portfolio.user_id == current_user.id)
+        .first()
+    )
+
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portefeuille introuvable.")
+
+    tickers = [
+        ticker
+        for (ticker,) in db.query(Position.asset_ticker)
+        .filter(Position.portfolio_id == portfolio_id, Position.quantity > 0)
+        .all()
+    ]
+
+    try:
+        histories = PriceHistoryService.get_histories(
+            db, tickers, **options.model_dump()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "portfolio_id": str(portfolio_id),
+        "histories": [
+            {
+                "ticker": ticker,
+                "count": len(points),
+                "history": [{"timestamp": ts, "price": price} for ts, price in points],
+            }
+            for ticker, points in histories.items()
+        ],
+    }
+
+
 @router.get("/{portfolio_id}/summary", response_model=PortfolioSummary)
 def get_portfolio_summary(
     portfolio_id: UUID,
+    background_tasks: BackgroundTasks,
+    max_age: Optional[int] = Query(
+        None,
+        ge=0,
+        description=(
+            "Âge maximal (secondes) d'un prix stocké avant rafraîchissement. "
+            "Par défaut : PRICE_MAX_AGE_SECONDS. 0 ignore le cache des cotations."
+        ),
+    ),
     db: Session = Depends(get_db),
     current_user=Depends(deps.get_current_user),
 ):
@@ -137,28 +213,60 @@ def get_portfolio_summary(
         .all()
     )
 
-    # Refresh current prices on demand.
-    prices_updated = False
-    for pos, asset in results:
+    # Stored prices younger than max_age are served as is. Only the stale ones
+    # are fetched (in one batched, cached upstream call, for at most
+    # PRICE_REFRESH_BUDGET_SECONDS), and the new values are written back after
+    # the response so this GET never commits.
+    max_age_seconds = PRICE_MAX_AGE_SECONDS if max_age is None else max_age
+    assets_by_ticker = {}
+    for _pos, asset in results:
         asset_ticker = getattr(asset, "ticker", None)
-        if not asset_ticker:
-            continue
+        if asset_ticker:
+            assets_by_ticker[asset_ticker] = asset
 
+    current_prices = {
+        ticker: asset.current_price for ticker, asset in assets_by_ticker.items()
+    }
+    to_refresh = stale_tickers(assets_by_ticker.values(), max_age_seconds)
+
+    if to_refresh:
+        asset_types = {
+            ticker: getattr(asset.asset_type, "value", asset.asset_type)
+            for ticker, asset in assets_by_ticker.items()
+            if getattr(asset, "asset_type", None) is not None
+        }
+        fetched_at: dict = {}
         try:
-            new_price = MarketDataService.get_current_price(asset_ticker)
-
-            # Update only when market price changed.
-            if new_price and new_price != asset.current_price:
-                asset.current_price = Decimal(str(new_price))
-                prices_updated = True
-        except Exception as e:
+            new_prices = MarketDataService.get_current_prices(
+                to_refresh,
+                asset_types=asset_types,
+                deadline=Deadline(PRICE_REFRESH_BUDGET_SECONDS),
+                fetched_at=fetched_at,
+                # max_age=0 asks for live prices, not whatever is cached.
+                use_cache=max_age_seconds > 0,
+            )
+        except Exception:
             # Keep API response resilient if upstream pricing fails.
-            print(f"Erreur de rafraîchissement pour {asset_ticker}: {e}")
-            pass
-
-    # Persist all refreshed prices in one commit.
-    if prices_updated:
-        db.commit()
+            logger.warning("Price refresh failed", exc_info=True)
+            new_prices = {}
+
+        refreshed = {ticker: price for ticker, price in new_prices.items() if price}
+        # Cached quotes may predate the stored price; only newer ones are
+        # served, and written back stamped with their own fetch time.
+        newer = {
+            ticker: price
+            for ticker, price in refreshed.items()
+            if ticker in fetched_at
+            and not is_price_fresh(
+                getattr(assets_by_ticker[ticker], "last_updated_at", None),
+                0,
+                now=fetched_at[ticker],
+            )
+        }
+        for ticker, price in newer.items():
+            current_prices[ticker] = Decimal(str(price))
+        if newer:
+            background_tasks.add_task(persist_asset_prices, newer, fetched_at)
 
     total_value = Decimal("0.0")
     total_invested = Decimal("0.0")
@@ -173,7 +281,9 @@ def get_portfolio_summary(
 
     for pos, asset in results:
         # Current market value.
-        total_value += pos.quantity * asset.current_price
+        total_value += pos.quantity * current_prices.get(
+            getattr(asset, "ticker", None), asset.current_price
+        )
 
         # Invested value at average buy price.
         total_invested += pos.quantity * pos.average_buy_price
@@ -1,8 +1,8 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import List
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class PriceHistoryResponse(BaseModel):
@@ -18,3 +18,40 @@ class PriceHistoryListResponse(BaseModel):
     history: List[PriceHistoryResponse]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class HistoryQuery(BaseModel):
+    """Range and downsampling options of the history endpoints."""
+
+    start: Optional[datetime] = Field(None, description="Début (inclus)")
+    end: Optional[datetime] = Field(None, description="Fin (incluse)")
+    resolution: Literal["raw", "hour", "day", "week", "month"] = Field(
+        "raw", description="Un point (le dernier) par heure, jour, semaine ou mois"
+    )
+    max_points: Optional[int] = Field(
+        None, ge=2, le=10000, description="Nombre maximal de points par actif"
+    )
+    downsample: Literal["lttb", "bucket"] = Field(
+        "lttb",
+        description=(
+            "Réduction à max_points : lttb préserve la forme de la courbe, "
+            "bucket garde le dernier point d'intervalles égaux (calculé en SQL)"
+        ),
+    )
+
+
+class AssetHistoryQuery(HistoryQuery):
+    format: Optional[Literal["rows", "columnar", "delta"]] = Field(
+        None,
+        description=(
+            "rows (défaut) : liste de {timestamp, price} ; columnar : tableaux "
+            "`timestamps` (secondes epoch) et `prices` (flottants) ; delta : "
+            "idem, chaque timestamp après le premier étant l'écart au précédent. "
+            "Prioritaire sur l'en-tête Accept."
+        ),
+    )
+
+
+class PortfolioHistoriesResponse(BaseModel):
+    portfolio_id: str
+    histories: List[PriceHistoryListResponse]
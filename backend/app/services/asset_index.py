@@ -0,0 +1,187 @@
+"""In-memory prefix index over the asset table.
+
+Searches for assets we already track should not need Yahoo. The index keeps a
+trie of ticker and name-word prefixes for every row of `asset`, so typeahead
+lookups for known assets are answered from memory. It is loaded lazily from
+the database and reloaded after `ASSET_INDEX_TTL_SECONDS`, which is how assets
+created on other replicas show up; assets created by this process are added
+immediately.
+"""
+
+import os
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import Asset
+
+ASSET_INDEX_TTL_SECONDS = int(os.getenv("ASSET_INDEX_TTL_SECONDS") or 300)
+
+# Our asset types, mapped back to the Yahoo quoteType that search results
+# expose (see ASSET_TYPES in app/services/providers/yahoo_quotes.py for the
+# forward mapping).
+QUOTE_TYPES = {
+    "stock": "EQUITY",
+    "crypto": "CRYPTOCURRENCY",
+    "etf": "ETF",
+    "fund": "MUTUALFUND",
+    "index": "INDEX",
+    "forex": "CURRENCY",
+    "commodity": "FUTURE",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Ranks, best first.
+_EXACT_TICKER = 0
+_WHOLE_WORDS = 1
+_TICKER_PREFIX = 2
+_NAME_PREFIX = 3
+
+
+def _words(text: str) -> list[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+def to_search_result(ticker: str, name: str, asset_type) -> Dict:
+    """Shape an asset row like a Yahoo search result."""
+    asset_type = getattr(asset_type, "value", asset_type)
+    return {
+        "ticker": ticker,
+        "name": name,
+        "type": QUOTE_TYPES.get(str(asset_type).lower(), "UNKNOWN"),
+        "exchange": "UNKNOWN",
+    }
+
+
+def _rank(words: list[str], result: Dict) -> int:
+    compact = "".join(words)
+    ticker = result["ticker"].lower()
+    if ticker == compact or _words(ticker) == words:
+        return _EXACT_TICKER
+    name_words = _words(result["name"])
+    if all(word in name_words for word in words):
+        return _WHOLE_WORDS
+    if ticker.startswith(compact):
+        return _TICKER_PREFIX
+    return _NAME_PREFIX
+
+
+def is_strong_match(query: str, result: Dict) -> bool:
+    """True when `result` is what `query` names: its ticker, or whole name words.
+
+    A prefix match ("app" for Apple) is not strong: the user may be typing
+    the name of an asset we do not know yet.
+    """
+    words = _words(query)
+    return bool(words) and _rank(words, result) <= _WHOLE_WORDS
+
+
+class _Node:
+    __slots__ = ("children", "tickers")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.tickers: set[str] = set()
+
+
+class AssetSearchIndex:
+    """Trie over ticker and name-word prefixes of known assets."""
+
+    def __init__(
+        self,
+        ttl: int = ASSET_INDEX_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._root = _Node()
+        self._assets: Dict[str, Dict] = {}
+        self._loaded_at: Optional[float] = None
+
+    def _insert(self, root: _Node, key: str, ticker: str) -> None:
+        node = root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            node.tickers.add(ticker)
+
+    def _index(self, root: _Node, assets: Dict[str, Dict], result: Dict) -> None:
+        ticker = result["ticker"]
+        assets[ticker] = result
+        self._insert(root, ticker.lower(), ticker)
+        # Words too, so "usd" finds "BTC-USD" and "pa" finds "MC.PA".
+        for word in _words(ticker) + _words(result["name"]):
+            self._insert(root, word, ticker)
+
+    def load(self, rows: Iterable[tuple]) -> None:
+        """Replace the index with `(ticker, name, asset_type)` rows."""
+        root = _Node()
+        assets: Dict[str, Dict] = {}
+        for ticker, name, asset_type in rows:
+            self._index(root, assets, to_search_result(ticker, name, asset_type))
+        with self._lock:
+            self._root = root
+            self._assets = assets
+            self._loaded_at = self._clock()
+
+    def add(self, ticker: str, name: str, asset_type) -> None:
+        """Index one asset without waiting for the next reload."""
+        with self._lock:
+            self._index(
+                self._root, self._assets, to_search_result(ticker, name, asset_type)
+            )
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or self._clock() - self._loaded_at > self.ttl
+
+    def ensure_loaded(self, db: Session) -> None:
+        if self.is_stale():
+            self.load(db.query(Asset.ticker, Asset.name, Asset.asset_type).all())
+
+    def _lookup(self, prefix: str) -> set[str]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return set()
+        return node.tickers
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Return up to `limit` known assets matching `query`, best first.
+
+        Every word of the query must prefix the ticker or a word of the name.
+        Exact ticker matches rank first, then assets whose name contains
+        every query word in full, then the remaining prefix matches.
+        """
+        words = _words(query)
+        if not words:
+            return []
+        compact = "".join(words)
+
+        with self._lock:
+            candidates = set(self._lookup(compact))
+            by_words = None
+            for word in words:
+                matches = self._lookup(word)
+                by_words = set(matches) if by_words is None else by_words & matches
+            candidates |= by_words or set()
+
+            ranked = [
+                (_rank(words, self._assets[ticker]), ticker) for ticker in candidates
+            ]
+            ranked.sort()
+            return [dict(self._assets[ticker]) for _, ticker in ranked[:limit]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._root = _Node()
+            self._assets = {}
+            self._loaded_at = None
+
+
+asset_index = AssetSearchIndex()
@@ -1,7 +1,18 @@
+import logging
+import os
+
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.models.asset import Asset
-from app.services.market_data import MarketDataService
+from app.services.asset_index import asset_index, is_strong_match, to_search_result
+from app.services.market_data import SEARCH_RESULT_LIMIT, MarketDataService
+
+logger = logging.getLogger(__name__)
+
+# Below this many local matches (and without an exact one), search also asks
+# Yahoo and appends its results after ours.
+ASSET_SEARCH_MIN_LOCAL_RESULTS = int(os.getenv("ASSET_SEARCH_MIN_LOCAL_RESULTS") or 5)
 
 
 class AssetService:
@@ -28,4 +39,61 @@ class AssetService:
         db.add(new_asset)
         db.commit()
         db.refresh(new_asset)
+        asset_index.add(new_asset.ticker, new_asset.name, new_asset.asset_type)
         return new_asset
+
+    @staticmethod
+    def search_assets(db: Session, query: str, limit: int = SEARCH_RESULT_LIMIT):
+        """Search known assets first, then Yahoo when local results fall short.
+
+        Local matches come from the in-memory prefix index, completed by a
+        substring match in SQL (served by the trigram indexes on `asset`).
+        Yahoo is only asked when there is no exact local match and fewer than
+        `ASSET_SEARCH_MIN_LOCAL_RESULTS` local results; its results are
+        appended after ours, without duplicates.
+        """
+        try:
+            asset_index.ensure_loaded(db)
+            results = asset_index.search(query, limit)
+            if len(results) < limit and not any(
+                is_strong_match(query, r) for r in results
+            ):
+                results += AssetService._search_db(
+                    db, query, limit - len(results), {r["ticker"] for r in results}
+                )
+        except Exception:
+            logger.exception("Local asset search failed for %s", query)
+            results = []
+
+        if len(results) >= ASSET_SEARCH_MIN_LOCAL_RESULTS or any(
+            is_strong_match(query, r) for r in results
+        ):
+            return results
+
+        seen = {r["ticker"] for r in results}
+        for result in MarketDataService.search_assets(query):
+            if result["ticker"] not in seen:
+                seen.add(result["ticker"])
+                results.append(result)
+        return results
+
+    @staticmethod
+    def _search_db(db: Session, query: str, limit: int, exclude: set[str]):
+        escaped = (
+            query.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        pattern = f"%{escaped}%"
+        rows = (
+            db.query(Asset.ticker, Asset.name, Asset.asset_type)
+            .filter(
+                or_(
+                    Asset.ticker.ilike(pattern, escape="\\"),
+                    Asset.name.ilike(pattern, escape="\\"),
+                ),
+                Asset.ticker.notin_(exclude),
+            )
+            .order_by(Asset.ticker)
+            .limit(limit)
+            .all()
+        )
+        return [to_search_result(*row) for row in rows]
@@ -0,0 +1,202 @@
+"""Bounded executor for best-effort background work.
+
+FastAPI's `BackgroundTasks` runs every task it is given, right after the
+response, on the shared threadpool: a burst of logins after a cold start
+would start one market-data sync per login at once, all competing with
+request handling. `BoundedExecutor` runs jobs on a few dedicated threads
+instead, with:
+
+- a cap on queued jobs, past which new jobs are dropped or, with the DELAY
+  policy, submitted again once after `retry_delay` seconds. Delayed jobs
+  are capped too (`max_delayed`, the queue size by default) and wait on a
+  single scheduler thread, so a burst costs memory, not threads;
+- one queued job per key: submitting a key that is already waiting is a
+  no-op, so ten logins of one user queue a single sync;
+- counters, queue depth and wait/run times for `GET /metrics`.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Queue-full policies.
+DROP = "drop"
+DELAY = "delay"
+POLICIES = (DROP, DELAY)
+
+# Outcomes of `submit`.
+QUEUED = "queued"
+DUPLICATE = "duplicate"
+DELAYED = "delayed"
+DROPPED = "dropped"
+
+
+class BoundedExecutor:
+    """Run keyed jobs on `max_workers` threads, queueing at most `max_queue`."""
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        policy: str = DROP,
+        retry_delay: float = 30,
+        max_delayed: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue-full policy: {policy!r}")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.policy = policy
+        self.retry_delay = retry_delay
+        self.max_delayed = max_queue if max_delayed is None else max_delayed
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Delayed jobs as (due, seq, key, fn, args), earliest first.
+        self._delays: list = []
+        self._seq = itertools.count()
+        self._wakeup = threading.Condition(self._lock)
+        self._scheduler: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # key -> time it was queued, for jobs not started yet.
+        self._queued: Dict[Hashable, float] = {}
+        self._delayed: set = set()
+        self._running = 0
+        self._counters = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "delayed": 0,
+            "dropped": 0,
+            "completed": 0,
+            "failed": 0,
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> str:
+        """Queue `fn(*args)` under `key`.
+
+        Returns QUEUED; DUPLICATE when a job for `key` is already waiting; or,
+        when the queue is full, DELAYED or DROPPED depending on the policy.
+        """
+        return self._submit(key, fn, args, retry=False)
+
+    def _submit(self, key: Hashable, fn: Callable, args: tuple, retry: bool) -> str:
+        with self._lock:
+            if retry:
+                self._delayed.discard(key)
+            elif key in self._queued or key in self._delayed:
+                self._counters["deduplicated"] += 1
+                return DUPLICATE
+
+            if len(self._queued) >= self.max_queue:
+                if (
+                    self.policy == DELAY
+                    and not retry
+                    and len(self._delayed) < self.max_delayed
+                ):
+                    self._delay(key, fn, args)
+                    return DELAYED
+                self._counters["dropped"] += 1
+                logger.warning(
+                    "%s queue full (%d jobs); dropped job %s",
+                    self.name,
+                    len(self._queued),
+                    key,
+                )
+                return DROPPED
+
+            self._queued[key] = self._clock()
+            self._counters["submitted"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            executor = self._executor
+
+        executor.submit(self._run, key, fn, args)
+        return QUEUED
+
+    def _delay(self, key: Hashable, fn: Callable, args: tuple) -> None:
+        # Called with the lock held.
+        self._counters["delayed"] += 1
+        self._delayed.add(key)
+        due = self._clock() + self.retry_delay
+        heapq.heappush(self._delays, (due, next(self._seq), key, fn, args))
+        if self._scheduler is None:
+            self._scheduler = threading.Thread(
+                target=self._schedule, name=f"{self.name}-delays", daemon=True
+            )
+            self._scheduler.start()
+        self._wakeup.notify()
+
+    def _schedule(self) -> None:
+        while True:
+            for key, fn, args in self._wait_due():
+                self._submit(key, fn, args, retry=True)
+
+    def _wait_due(self) -> list:
+        """Block until delayed jobs are due, then pop and return them."""
+        with self._wakeup:
+            while True:
+                now = self._clock()
+                if self._delays and self._delays[0][0] <= now:
+                    due = []
+                    while self._delays and self._delays[0][0] <= now:
+                        _, _, key, fn, args = heapq.heappop(self._delays)
+                        due.append((key, fn, args))
+                    return due
+                self._wakeup.wait(self._delays[0][0] - now if self._delays else None)
+
+    def _run(self, key: Hashable, fn: Callable, args: tuple) -> None:
+        with self._lock:
+            started = self._clock()
+            waited = started - self._queued.pop(key, started)
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._running += 1
+
+        failed = False
+        try:
+            fn(*args)
+        except Exception:
+            failed = True
+            logger.exception("%s job %s failed", self.name, key)
+        finally:
+            with self._lock:
+                ran = self._clock() - started
+                self._run_total += ran
+                self._run_max = max(self._run_max, ran)
+                self._running -= 1
+                self._counters["failed" if failed else "completed"] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            finished = self._counters["completed"] + self._counters["failed"]
+            started = finished + self._running
+            return {
+                **self._counters,
+                "queued": len(self._queued),
+                "delayed_pending": len(self._delayed),
+                "running": self._running,
+                "max_queue": self.max_queue,
+                "wait_seconds_avg": (
+                    round(self._wait_total / started, 3) if started else 0.0
+                ),
+                "wait_seconds_max": round(self._wait_max, 3),
+                "run_seconds_avg": (
+                    round(self._run_total / finished, 3) if finished else 0.0
+                ),
+                "run_seconds_max": round(self._run_max, 3),
+            }
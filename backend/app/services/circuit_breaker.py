@@ -0,0 +1,137 @@
+"""Circuit breakers around upstream market-data operations.
+
+When Yahoo is slow or throttling us, every call would otherwise wait out its
+own timeout. Each upstream operation ("quote", "history", ...) gets a breaker:
+
+- closed: calls go through; `BREAKER_FAILURE_THRESHOLD` consecutive failures
+  open it;
+- open: calls fail immediately with `CircuitOpenError` for
+  `BREAKER_RESET_SECONDS`;
+- half-open: after that delay a single probe call is let through; success
+  closes the breaker, failure opens it again.
+
+Breakers are per process, like the caches in front of them.
+"""
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Dict, TypeVar
+
+T = TypeVar("T")
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD") or 5)
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS") or 30)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling upstream while a breaker is open."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_seconds: float = BREAKER_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._counters = {"trips": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == OPEN
+            and self._clock() - self._opened_at >= self.reset_seconds
+        ):
+            self._state = HALF_OPEN
+        return self._state
+
+    def _acquire(self) -> None:
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self._counters["rejected"] += 1
+        raise CircuitOpenError(f"Circuit {self.name!r} is open")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self._counters["trips"] += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+            self._probing = False
+
+    def call(self, fn: Callable[[], T]) -> T:
+        """Run `fn` through the breaker; any exception counts as a failure."""
+        self._acquire()
+        try:
+            result = fn()
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                **self._counters,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(operation: str) -> CircuitBreaker:
+    """Return the process-wide breaker for an upstream operation."""
+    with _breakers_lock:
+        breaker = _breakers.get(operation)
+        if breaker is None:
+            breaker = _breakers[operation] = CircuitBreaker(operation)
+        return breaker
+
+
+def breaker_stats() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+def reset_breakers() -> None:
+    """Forget every breaker (and its state)."""
+    with _breakers_lock:
+        _breakers.clear()
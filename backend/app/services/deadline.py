@@ -0,0 +1,20 @@
+"""Per-request time budget for upstream calls."""
+
+import time
+from collections.abc import Callable
+
+
+class Deadline:
+    """A point in time after which a request stops waiting on upstream."""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left in the budget, never negative."""
+        return max(0.0, self._expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
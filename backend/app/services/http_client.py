@@ -0,0 +1,76 @@
+"""Shared HTTP client for upstream calls that do not go through yfinance.
+
+A bare `requests.get` opens a fresh TCP + TLS connection per call and has no
+timeout, so a slow upstream could hold a FastAPI worker thread indefinitely.
+Every such call goes through one pooled `requests.Session` instead, with
+connect/read timeouts and retries (jittered exponential backoff) on
+connection errors, 429 and 5xx responses.
+"""
+
+import os
+import threading
+from typing import Optional
+
+import requests
+
+# urllib3's Retry, re-exported by requests (no direct urllib3 dependency).
+from requests.adapters import HTTPAdapter, Retry
+
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS") or 3)
+HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS") or 10)
+# Pools are per host; maxsize bounds concurrent connections to one host.
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS") or 10)
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE") or 20)
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES") or 2)
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR") or 0.3)
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER") or 0.3)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Yahoo blocks some requests without a User-Agent; pretend to be a browser.
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        # Hand the last 429/5xx back to the caller instead of raising
+        # MaxRetryError, so it surfaces through raise_for_status().
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    """GET through the pooled session, applying the default timeouts."""
+    kwargs.setdefault(
+        "timeout", (HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS)
+    )
+    return get_http_session().get(url, **kwargs)
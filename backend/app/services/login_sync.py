@@ -1,15 +1,62 @@
+"""Market-data sync run after each login, deduplicated across replicas.
+
+Every login re-syncs the tickers the user holds, and users share tickers, so
+without coordination the same ticker is fetched again for each login on each
+replica. Two things prevent that:
+
+- `ticker_sync_state.last_synced_at`, shared by every replica: a ticker
+  synced less than `LOGIN_SYNC_FRESHNESS_SECONDS` ago is skipped.
+- a per-ticker PostgreSQL advisory lock, held while the ticker is synced: a
+  concurrent login elsewhere skips the ticker instead of fetching it too.
+
+Within a replica, syncs run on `login_sync_executor`: a few threads, at most
+one queued sync per user, and a bounded queue (see app/services/background.py).
+"""
+
 import logging
-from collections.abc import Iterable
+import os
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
 from uuid import UUID
 
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
-from app.core.database import get_session_factory
-from app.models import Portfolio, Position
+from app.core.database import get_engine, get_session_factory
+from app.models import Portfolio, Position, TickerSyncState
+from app.services.background import BoundedExecutor
 from app.services.market_sync import MarketSyncService
 
 logger = logging.getLogger(__name__)
 
+# Tickers synced less than this long ago, by any replica, are not synced again.
+LOGIN_SYNC_FRESHNESS_SECONDS = int(os.getenv("LOGIN_SYNC_FRESHNESS_SECONDS") or 900)
+
+# First key of the two-key advisory locks taken per ticker (the second one is
+# hashtext(ticker)). Stable and arbitrary, like MIGRATION_LOCK_ID in
+# app/migrate.py; any other two-key pg_advisory_lock must use another value.
+TICKER_SYNC_LOCK_NAMESPACE = 1_907_353_214
+
+# Login syncs run at once per replica, and syncs queued behind them at most.
+LOGIN_SYNC_WORKERS = int(os.getenv("LOGIN_SYNC_WORKERS") or 2)
+LOGIN_SYNC_QUEUE_SIZE = int(os.getenv("LOGIN_SYNC_QUEUE_SIZE") or 100)
+# What happens to a login sync when the queue is full: "drop" it, or "delay"
+# it by LOGIN_SYNC_RETRY_SECONDS and drop it only if the queue is still full.
+# At most LOGIN_SYNC_QUEUE_SIZE syncs wait out a delay; later ones are dropped.
+LOGIN_SYNC_QUEUE_FULL = os.getenv("LOGIN_SYNC_QUEUE_FULL") or "drop"
+LOGIN_SYNC_RETRY_SECONDS = float(os.getenv("LOGIN_SYNC_RETRY_SECONDS") or 30)
+
+login_sync_executor = BoundedExecutor(
+    "login-sync",
+    max_workers=LOGIN_SYNC_WORKERS,
+    max_queue=LOGIN_SYNC_QUEUE_SIZE,
+    policy=LOGIN_SYNC_QUEUE_FULL,
+    retry_delay=LOGIN_SYNC_RETRY_SECONDS,
+)
+
 
 def _extract_tickers(rows: Iterable[tuple[str]]) -> list[str]:
     seen: set[str] = set()
@@ -26,8 +73,80 @@ def _extract_tickers(rows: Iterable[tuple[str]]) -> list[str]:
     return tickers
 
 
+def stale_sync_tickers(
+    db: Session, tickers: list[str], now: Optional[datetime] = None
+) -> list[str]:
+    """Return the tickers not synced within the freshness window, in order."""
+    if not tickers:
+        return []
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - timedelta(seconds=LOGIN_SYNC_FRESHNESS_SECONDS)
+    fresh = {
+        ticker
+        for (ticker,) in db.query(TickerSyncState.ticker)
+        .filter(
+            TickerSyncState.ticker.in_(tickers),
+            TickerSyncState.last_synced_at >= cutoff,
+        )
+        .all()
+    }
+    return [ticker for ticker in tickers if ticker not in fresh]
+
+
+def mark_synced(
+    db: Session, tickers: Iterable[str], now: Optional[datetime] = None
+) -> None:
+    """Record `tickers` as synced at `now`, for every replica to see."""
+    now = now or datetime.now(timezone.utc)
+    rows = [{"ticker": ticker, "last_synced_at": now} for ticker in tickers]
+    if not rows:
+        return
+    stmt = pg_insert(TickerSyncState).values(rows)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[TickerSyncState.ticker],
+            set_={"last_synced_at": stmt.excluded.last_synced_at},
+        )
+    )
+    db.commit()
+
+
+@contextmanager
+def ticker_sync_locks(tickers: list[str]) -> Iterator[list[str]]:
+    """Try-lock each ticker; yield the ones locked, release them on exit.
+
+    Tickers locked by another process are left out rather than waited on.
+    The locks are session-scoped, so they live on a dedicated connection: the
+    sync itself commits as it goes, which would release transaction-scoped
+    locks early, and a Session may hand its connection back to the pool
+    between transactions.
+    """
+    if not tickers:
+        yield []
+        return
+    with get_engine().connect() as connection:
+        try:
+            locked = [
+                ticker
+                for ticker in tickers
+                if connection.execute(
+                    text("SELECT pg_try_advisory_lock(:namespace, hashtext(:ticker))"),
+                    {"namespace": TICKER_SYNC_LOCK_NAMESPACE, "ticker": ticker},
+                ).scalar()
+            ]
+            connection.commit()
+            yield locked
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock_all()"))
+            connection.commit()
+
+
 def run_user_market_sync(user_id: UUID) -> dict[str, int]:
-    """Best-effort sync of market data for tickers owned by one user."""
+    """Best-effort sync of market data for tickers owned by one user.
+
+    Only tickers that are stale and not being synced by another login are
+    fetched; "skipped" counts the others.
+    """
     db: Session | None = None
     try:
         session_factory = get_session_factory()
@@ -43,33 +162,61 @@ def run_user_market_sync(user_id: UUID) -> dict[str, int]:
         tickers = _extract_tickers(ticker_rows)
 
         if not tickers:
-            return {"tickers": 0, "prices": 0, "dividends": 0}
+            return {"tickers": 0, "skipped": 0, "prices": 0, "dividends": 0}
 
         prices_added = 0
         dividends_added = 0
+        synced: list[str] = []
 
-        try:
-            prices_added = MarketSyncService.sync_price_histories_for_tickers(
-                db, tickers=tickers, period="1mo"
-            )
-        except Exception:
-            logger.exception("Failed price sync during login for user=%s", user_id)
+        with ticker_sync_locks(stale_sync_tickers(db, tickers)) as locked:
+            # Checked again under the locks: another login may have finished
+            # syncing some of these between the first check and the lock.
+            synced = stale_sync_tickers(db, locked)
+            failed: set[str] = set()
 
-        try:
-            dividends_added = MarketSyncService.sync_dividends_for_tickers(
-                db, tickers=tickers
-            )
-        except Exception:
-            logger.exception("Failed dividends sync during login for user=%s", user_id)
+            def record(ticker: str, result: Dict) -> None:
+                if result.get("status") == "failed":
+                    failed.add(ticker)
+
+            if synced:
+                try:
+                    report = MarketSyncService.sync_price_histories_report(
+                        db, synced, period="1mo", on_progress=record
+                    )
+                    prices_added = report["inserted"]
+                except Exception:
+                    logger.exception(
+                        "Failed price sync during login for user=%s", user_id
+                    )
+                    failed.update(synced)
+
+                try:
+                    dividends_added = MarketSyncService.sync_dividends_for_tickers(
+                        db, tickers=synced, on_progress=record
+                    )
+                except Exception:
+                    logger.exception(
+                        "Failed dividends sync during login for user=%s", user_id
+                    )
+                    failed.update(synced)
+
+                # Failed tickers stay stale, so the next login retries them.
+                mark_synced(db, [t for t in synced if t not in failed])
 
         return {
             "tickers": len(tickers),
+            "skipped": len(tickers) - len(synced),
             "prices": prices_added,
             "dividends": dividends_added,
         }
     except Exception:
         logger.exception("Post-login sync failed for user=%s", user_id)
-        return {"tickers": 0, "prices": 0, "dividends": 0}
+        return {"tickers": 0, "skipped": 0, "prices": 0, "dividends": 0}
     finally:
         if db is not None:
             db.close()
+
+
+def schedule_user_market_sync(user_id: UUID) -> str:
+    """Queue `run_user_market_sync` for a user; returns the executor outcome."""
+    return login_sync_executor.submit(user_id, run_user_market_sync, user_id)
@@ -1,27 +1,38 @@
 import logging
+import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Optional
 
-import requests
+from app.services.circuit_breaker import CircuitOpenError, get_breaker
+from app.services.deadline import Deadline
+from app.services.providers import get_provider
+from app.services.providers.yfinance_provider import load_yfinance
+from app.services.quote_cache import MISS, STALE, quote_cache
+from app.services.search_cache import search_cache
+from app.services.singleflight import market_data_flight
 
 logger = logging.getLogger(__name__)
 
-# yfinance drags in pandas, numpy and curl_cffi (~233 MB installed, ~0.5-0.75 s
-# to import warm, more on a cold page cache). Importing it at module scope put
-# all of that on the application's boot path, which matters because the API
-# scales to zero on Azure Container Apps and every cold start pays for it.
-# It is loaded on first use instead, so only requests that actually reach
-# market data pay the cost.
-_yf_module = None
+# Upper bound on symbols per batch download. Yahoo accepts long symbol lists,
+# but very large requests are slower to come back and more likely to be
+# throttled, so big portfolios are split into a few calls instead of one.
+QUOTE_BATCH_SIZE = 50
 
+# Threads fetching quotes for callers with a deadline. A fetch that outlives
+# its caller's budget keeps running here and still fills the quote cache.
+QUOTE_FETCH_WORKERS = int(os.getenv("QUOTE_FETCH_WORKERS") or 4)
+# Created at import, so concurrent first requests share one pool; it starts
+# no thread before its first job.
+_quote_executor = ThreadPoolExecutor(
+    max_workers=QUOTE_FETCH_WORKERS, thread_name_prefix="quote-fetch"
+)
 
-def _yf():
-    """Return the yfinance module, importing it on first use."""
-    global _yf_module
-    if _yf_module is None:
-        import yfinance
-
-        _yf_module = yfinance
-    return _yf_module
+# Quotes requested per search. Also the threshold at which a cached result set
+# is considered truncated (see app/services/search_cache.py).
+SEARCH_RESULT_LIMIT = 10
 
 
 def __getattr__(name: str):
@@ -31,114 +42,241 @@ def __getattr__(name: str):
     monkeypatching while preserving the lazy import.
     """
     if name == "yf":
-        return _yf()
+        return load_yfinance()
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class MarketDataService:
     @staticmethod
     def get_asset_info(ticker: str) -> Optional[Dict]:
-        """Fetch basic asset info from Yahoo Finance.
+        """Fetch basic asset info from the market-data provider.
 
         Returns a dict with name, currency, type and price or None on error.
+        Concurrent calls for the same ticker share one upstream request.
         """
+        return market_data_flight.do(
+            ("asset_info", ticker), lambda: MarketDataService._fetch_asset_info(ticker)
+        )
+
+    @staticmethod
+    def _fetch_asset_info(ticker: str) -> Optional[Dict]:
         try:
-            asset = _yf().Ticker(ticker)
-            info = asset.info
-
-            # 1. Get raw Yahoo type (default EQUITY)
-            raw_type = info.get("quoteType", "EQUITY").upper()
-
-            # 2. Map Yahoo types to our AssetType values
-            type_mapping = {
-                "EQUITY": "stock",
-                "CRYPTOCURRENCY": "crypto",
-                "ETF": "etf",
-                "MUTUALFUND": "fund",
-                "CURRENCY": "crypto",  # sometimes used for cryptos
-            }
-
-            db_asset_type = type_mapping.get(raw_type, "stock")
-
-            return {
-                "name": info.get("longName") or info.get("shortName") or ticker,
-                "currency": info.get("currency", "USD"),
-                "type": db_asset_type,
-                "price": info.get("currentPrice")
-                or info.get("regularMarketPrice")
-                or 0.0,
-            }
+            return get_breaker("asset_info").call(
+                lambda: get_provider().get_asset_info(ticker)
+            )
+        except CircuitOpenError as e:
+            logger.warning("Skipped asset info for %s: %s", ticker, e)
+            return None
         except Exception as e:
             logger.exception("Failed fetching asset info for %s: %s", ticker, e)
             return None
 
     @staticmethod
     def search_assets(query: str):
-        """Search assets by name/ticker via Yahoo's public search API."""
-        url = f"https://query2.finance.yahoo.com/v1/finance/search?q={query}"
-        # Yahoo blocks some requests without a User-Agent; pretend to be a browser
-        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
+        """Search assets by name/ticker upstream.
+
+        Results are cached per normalized query; a longer query is answered
+        from a cached shorter one when that result set was not truncated.
+        """
+        cached = search_cache.get(query)
+        if cached is not None:
+            return cached
 
         try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-
-            results = []
-            for quote in data.get("quotes", []):
-                # Keep only real assets (actions, cryptos, etfs)
-                if "symbol" in quote and "shortname" in quote:
-                    results.append(
-                        {
-                            "ticker": quote["symbol"],
-                            "name": quote["shortname"],
-                            "type": quote.get("quoteType", "UNKNOWN"),
-                            "exchange": quote.get("exchange", "UNKNOWN"),
-                        }
-                    )
+            results, truncated = get_breaker("search").call(
+                lambda: get_provider().search(query, SEARCH_RESULT_LIMIT)
+            )
+            # A full page means upstream may have more matches than it
+            # returned, so the set cannot answer longer queries by filtering.
+            search_cache.set(query, results, truncated=truncated)
             return results
+        except CircuitOpenError as e:
+            logger.warning("Skipped search for %s: %s", query, e)
+            return []
         except Exception as e:
             logger.exception("Search failed for %s: %s", query, e)
             return []
 
     @staticmethod
     def get_dividends_history(ticker: str):
-        """Return historical dividends as a pandas Series (Date -> Amount)."""
+        """Return historical dividends as (ex-date, amount) pairs, oldest first.
+
+        Concurrent calls for the same ticker share one upstream request.
+        """
+        return market_data_flight.do(
+            ("dividends", ticker),
+            lambda: MarketDataService._fetch_dividends_history(ticker),
+        )
+
+    @staticmethod
+    def _fetch_dividends_history(ticker: str):
         try:
-            asset = _yf().Ticker(ticker)
-            dividends = asset.dividends
-            return dividends
+            return get_breaker("dividends").call(
+                lambda: get_provider().get_dividends(ticker)
+            )
+        except CircuitOpenError as e:
+            logger.warning("Skipped dividends for %s: %s", ticker, e)
+            return []
         except Exception as e:
             logger.exception("Failed fetching dividends for %s: %s", ticker, e)
             return []
 
     @staticmethod
-    def get_current_price(ticker: str) -> Optional[float]:
+    def get_current_price(
+        ticker: str, asset_type: Optional[str] = None
+    ) -> Optional[float]:
         """
         Fetch the latest asset price quickly.
         Useful for lightweight dashboard refreshes.
-        """
-        try:
-            asset = _yf().Ticker(ticker)
-            price = None
 
-            # Fast path via fast_info.
-            try:
-                if hasattr(asset.fast_info, "last_price"):
-                    price = asset.fast_info.last_price
-                else:
-                    price = asset.fast_info.get("lastPrice")
-            except Exception:
-                pass
+        Served from the quote cache when possible; `asset_type` selects the
+        cache TTL. A stale entry is returned immediately and refreshed in the
+        background. Concurrent misses for the same ticker share one upstream
+        request.
+        """
+        price, state = quote_cache.get(ticker)
+        if state == STALE:
+            quote_cache.refresh_in_background(
+                [ticker],
+                lambda stale: {t: MarketDataService._coalesced_price(t) for t in stale},
+            )
+        if state != MISS:
+            return price
 
-            # Reliable fallback to 1-day history.
-            if price is None:
-                hist = asset.history(period="1d")
-                if not hist.empty:
-                    price = float(hist["Close"].iloc[-1])
+        price = MarketDataService._coalesced_price(ticker)
+        if price is not None:
+            quote_cache.set(ticker, price, asset_type)
+        return price
 
-            return float(price) if price is not None else None
+    @staticmethod
+    def _coalesced_price(ticker: str) -> Optional[float]:
+        return market_data_flight.do(
+            ("quote", ticker), lambda: MarketDataService._fetch_current_price(ticker)
+        )
 
+    @staticmethod
+    def _fetch_current_price(ticker: str) -> Optional[float]:
+        """Fetch the latest price of one asset upstream, bypassing the cache."""
+        try:
+            return get_breaker("quote").call(lambda: get_provider().get_quote(ticker))
+        except CircuitOpenError as e:
+            logger.warning("Skipped price refresh for %s: %s", ticker, e)
+            return None
         except Exception as e:
             logger.exception("Failed refreshing current price for %s: %s", ticker, e)
             return None
+
+    @staticmethod
+    def get_current_prices(
+        tickers: Iterable[str],
+        asset_types: Optional[Dict[str, str]] = None,
+        deadline: Optional[Deadline] = None,
+        fetched_at: Optional[Dict[str, datetime]] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, Optional[float]]:
+        """Fetch the latest price of several assets in batched upstream calls.
+
+        Returns a dict keyed by the requested tickers; tickers upstream has no
+        quote for map to None. Cached quotes are served from the quote cache
+        (stale ones are refreshed in the background) and only the misses are
+        fetched inline. `asset_types` maps tickers to their asset type, which
+        selects the cache TTL. Misses already being fetched by a concurrent
+        request are awaited rather than fetched again.
+
+        With a `deadline`, misses are waited on only until it expires; those
+        still pending map to None (callers fall back to their stored price)
+        and the fetch completes in the background, filling the cache.
+
+        A `fetched_at` dict is filled with when each returned price was
+        fetched upstream: cached ones may be up to TTL + stale window old.
+        With `use_cache=False` every ticker is fetched, whatever the cache
+        holds; the fetched prices still fill it.
+        """
+        asset_types = asset_types or {}
+        if fetched_at is None:
+            fetched_at = {}
+        unique: list[str] = []
+        for ticker in tickers:
+            if ticker and ticker not in unique:
+                unique.append(ticker)
+
+        prices: Dict[str, Optional[float]] = {}
+        missing: list[str] = []
+        stale: list[str] = []
+        now = datetime.now(timezone.utc)
+        for ticker in unique:
+            price, state, age = quote_cache.lookup(ticker)
+            if state == MISS or not use_cache:
+                missing.append(ticker)
+                continue
+            prices[ticker] = price
+            fetched_at[ticker] = now - timedelta(seconds=age)
+            if state == STALE:
+                stale.append(ticker)
+
+        if stale:
+            quote_cache.refresh_in_background(
+                stale, MarketDataService._coalesced_prices
+            )
+
+        fetched: Dict[str, Optional[float]] = {}
+        if missing and deadline is None:
+            fetched = MarketDataService._fetch_and_cache(missing, asset_types)
+        elif missing:
+            future = _quote_executor.submit(
+                MarketDataService._fetch_and_cache, missing, asset_types
+            )
+            try:
+                fetched = future.result(timeout=deadline.remaining())
+            except FuturesTimeoutError:
+                logger.warning(
+                    "Price budget spent; %d quotes left to the background fetch",
+                    len(missing),
+                )
+        for ticker, price in fetched.items():
+            prices[ticker] = price
+            if price is not None:
+                # Taken before the fetch: the price is at least that recent.
+                fetched_at[ticker] = now
+
+        return {ticker: prices.get(ticker) for ticker in unique}
+
+    @staticmethod
+    def _fetch_and_cache(
+        tickers: list[str], asset_types: Dict[str, str]
+    ) -> Dict[str, Optional[float]]:
+        fetched = MarketDataService._coalesced_prices(tickers)
+        for ticker, price in fetched.items():
+            if price is not None:
+                quote_cache.set(ticker, price, asset_types.get(ticker))
+        return fetched
+
+    @staticmethod
+    def _coalesced_prices(tickers: list[str]) -> Dict[str, Optional[float]]:
+        # Shares the "quote" key space with _coalesced_price, so a batch waits
+        # on single-ticker fetches in flight and vice versa.
+        return market_data_flight.do_many(
+            "quote", tickers, MarketDataService._fetch_current_prices
+        )
+
+    @staticmethod
+    def _fetch_current_prices(tickers: list[str]) -> Dict[str, Optional[float]]:
+        """Fetch quotes upstream, bypassing the cache.
+
+        One download is issued per `QUOTE_BATCH_SIZE` tickers, so the cost no
+        longer grows with the number of positions.
+        """
+        unique = list(dict.fromkeys(tickers))
+        prices: Dict[str, Optional[float]] = {ticker: None for ticker in unique}
+        for start in range(0, len(unique), QUOTE_BATCH_SIZE):
+            chunk = unique[start : start + QUOTE_BATCH_SIZE]
+            try:
+                prices.update(
+                    get_breaker("quote").call(lambda: get_provider().get_quotes(chunk))
+                )
+            except CircuitOpenError as e:
+                logger.warning("Skipped price refresh for %s: %s", chunk, e)
+            except Exception as e:
+                logger.exception("Failed refreshing prices for %s: %s", chunk, e)
+
+        return prices
@@ -1,33 +1,114 @@
 import logging
-from collections.abc import Iterable
+import os
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timezone
+from itertools import islice
+from typing import Dict, Optional
 
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.models import Asset, DividendEvent, PriceHistory
+from app.services.circuit_breaker import get_breaker
+from app.services.providers import get_provider
+from app.services.providers.base import HistoryRows
+from app.services.providers.yfinance_provider import load_yfinance
+from app.services.singleflight import market_data_flight
 
 logger = logging.getLogger(__name__)
 
-# Imported lazily -- see the note in app/services/market_data.py.
-_yf_module = None
+# Default number of concurrent history downloads for admin syncs.
+SYNC_CONCURRENCY = int(os.getenv("SYNC_CONCURRENCY") or 8)
 
+# Tickers written between two commits of a history sync.
+SYNC_COMMIT_TICKERS = int(os.getenv("SYNC_COMMIT_TICKERS") or 20)
 
-def _yf():
-    """Return the yfinance module, importing it on first use."""
-    global _yf_module
-    if _yf_module is None:
-        import yfinance
+# Bars per INSERT statement: three bind parameters each, well under
+# PostgreSQL's 65535 limit, so a "max" backfill takes a handful of statements.
+PRICE_HISTORY_INSERT_BATCH = 1000
 
-        _yf_module = yfinance
-    return _yf_module
+# Dividend events per INSERT statement (four bind parameters each).
+DIVIDEND_INSERT_BATCH = 1000
+
+# From this many bars for one ticker (typically a "max" backfill), history is
+# loaded with COPY into a staging table and merged in one statement per
+# `PRICE_HISTORY_COPY_BATCH` bars, instead of through INSERT statements.
+PRICE_HISTORY_COPY_THRESHOLD = int(os.getenv("PRICE_HISTORY_COPY_THRESHOLD") or 5000)
+PRICE_HISTORY_COPY_BATCH = int(os.getenv("PRICE_HISTORY_COPY_BATCH") or 50000)
+
+# Per-connection staging table for COPY loads. Emptied before each batch; a
+# failed batch is rolled back with the savepoint around it.
+_STAGING_DDL = (
+    "CREATE TEMP TABLE IF NOT EXISTS price_history_staging ("
+    "asset_ticker varchar NOT NULL, "
+    "price numeric(24, 10) NOT NULL, "
+    "timestamp timestamptz NOT NULL)"
+)
+_STAGING_COPY = (
+    "COPY price_history_staging (asset_ticker, price, timestamp) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+_STAGING_MERGE = (
+    "INSERT INTO price_history (asset_ticker, price, timestamp) "
+    "SELECT asset_ticker, price, timestamp FROM price_history_staging "
+    "ON CONFLICT (asset_ticker, timestamp) DO NOTHING"
+)
 
 
 def __getattr__(name: str):
     """Expose `yf` as a module attribute without importing it eagerly."""
     if name == "yf":
-        return _yf()
+        return load_yfinance()
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
+# Called with (ticker, result) as each ticker of a sync completes.
+ProgressCallback = Callable[[str, Dict], None]
+
+
+def _failed(error: Exception) -> Dict:
+    return {
+        "status": "failed",
+        "inserted": 0,
+        "error": str(error) or type(error).__name__,
+    }
+
+
+class _CopyStream:
+    """File-like reader over lines generated on demand, for COPY FROM STDIN.
+
+    psycopg2 reads it in chunks, so the CSV of a batch is never held whole.
+    """
+
+    def __init__(self, lines: Iterator[str]):
+        self._lines = lines
+        self._pending = ""
+
+    def read(self, size: int = -1) -> str:
+        chunks = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+        data = "".join(chunks)
+        if size < 0:
+            self._pending = ""
+            return data
+        self._pending = data[size:]
+        return data[:size]
+
+
+def _csv_lines(ticker: str, rows: Iterable[tuple[datetime, float]]) -> Iterator[str]:
+    quoted = '"' + ticker.replace('"', '""') + '"'
+    for timestamp, close in rows:
+        yield f"{quoted},{close!r},{timestamp.isoformat()}\n"
+
+
 class MarketSyncService:
     @staticmethod
     def _normalize_tickers(tickers: Iterable[str]) -> list[str]:
@@ -42,64 +123,224 @@ class MarketSyncService:
         return normalized
 
     @staticmethod
-    def sync_all_price_histories(db: Session, period: str = "1mo") -> int:
+    def sync_all_price_histories(
+        db: Session, period: str = "1mo", full: bool = False
+    ) -> int:
         """
         Fetch price history for every tracked asset.
 
         period examples: "1mo", "1y", "max".
         Returns the number of inserted rows.
         """
+        return MarketSyncService.sync_all_price_histories_report(
+            db, period=period, full=full
+        )["inserted"]
+
+    @staticmethod
+    def sync_all_price_histories_report(
+        db: Session, period: str = "1mo", full: bool = False, concurrency: int = 1
+    ) -> Dict:
+        """Like `sync_all_price_histories`, returning the per-ticker report."""
         assets = db.query(Asset).all()
-        return MarketSyncService.sync_price_histories_for_tickers(
+        return MarketSyncService.sync_price_histories_report(
             db=db,
             tickers=[str(asset.ticker) for asset in assets],
             period=period,
+            full=full,
+            concurrency=concurrency,
         )
 
+    @staticmethod
+    def _history_watermarks(db: Session, tickers: list[str]) -> Dict[str, datetime]:
+        """Timestamp of the latest stored bar per ticker, in one grouped query."""
+        rows = (
+            db.query(PriceHistory.asset_ticker, func.max(PriceHistory.timestamp))
+            .filter(PriceHistory.asset_ticker.in_(tickers))
+            .group_by(PriceHistory.asset_ticker)
+            .all()
+        )
+        return {ticker: latest for ticker, latest in rows if latest is not None}
+
     @staticmethod
     def sync_price_histories_for_tickers(
-        db: Session, tickers: Iterable[str], period: str = "1mo"
+        db: Session, tickers: Iterable[str], period: str = "1mo", full: bool = False
     ) -> int:
-        total_added = 0
-        for ticker in MarketSyncService._normalize_tickers(tickers):
-            try:
-                ticker_data = _yf().Ticker(ticker)
-                hist = ticker_data.history(period=period)
+        """Sync price history, fetching only what is missing.
 
-                if hist.empty:
-                    continue
+        Returns the number of inserted rows; see `sync_price_histories_report`.
+        """
+        return MarketSyncService.sync_price_histories_report(
+            db, tickers, period=period, full=full
+        )["inserted"]
+
+    @staticmethod
+    def _fetch_history(ticker: str, period: str, start: Optional[date]) -> HistoryRows:
+        # Coalesced: a login sync and an admin sync asking for the same range
+        # of one ticker at once share one download.
+        return market_data_flight.do(
+            (f"history:{start or period}", ticker),
+            lambda: get_breaker("history").call(
+                lambda: get_provider().get_history(ticker, period, start)
+            ),
+        )
 
-                for date, row in hist.iterrows():
-                    record_date = date.to_pydatetime()
-                    close_price = float(row["Close"])
+    @staticmethod
+    def sync_price_histories_report(
+        db: Session,
+        tickers: Iterable[str],
+        period: str = "1mo",
+        full: bool = False,
+        concurrency: int = 1,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> Dict:
+        """Sync price history, fetching only what is missing.
 
-                    existing_record = (
-                        db.query(PriceHistory)
-                        .filter(
-                            PriceHistory.asset_ticker == ticker,
-                            PriceHistory.timestamp == record_date,
-                        )
-                        .first()
-                    )
-
-                    if not existing_record:
-                        new_price = PriceHistory(
-                            asset_ticker=ticker,
-                            price=close_price,
-                            timestamp=record_date,
-                        )
-                        db.add(new_price)
-                        total_added += 1
+        Tickers with stored history are fetched from the day of their latest
+        bar onwards (that bar is refetched and skipped on insert), and not at
+        all when it is from today (UTC). Tickers without history, or every
+        ticker when `full` is set, get the whole `period`.
+
+        Up to `concurrency` downloads run at once, while rows are written by
+        the calling thread alone: one savepoint per ticker, so a failed ticker
+        does not undo the others, and one commit per `SYNC_COMMIT_TICKERS`.
 
+        Returns `{"inserted": n, "failed": n, "tickers": {ticker: result}}`,
+        where each result has a `status` ("ok", "up_to_date", "no_data" or
+        "failed"), the rows `inserted` and, on failure, the `error`.
+        `on_progress(ticker, result)` is called as each ticker completes, and
+        again for tickers whose commit then failed.
+        """
+        tickers = MarketSyncService._normalize_tickers(tickers)
+        watermarks = (
+            {}
+            if full or not tickers
+            else MarketSyncService._history_watermarks(db, tickers)
+        )
+        today = datetime.now(timezone.utc).date()
+
+        results: Dict[str, Dict] = {}
+
+        def done(ticker: str, result: Dict) -> None:
+            results[ticker] = result
+            if on_progress is not None:
+                on_progress(ticker, result)
+
+        starts: Dict[str, Optional[date]] = {}
+        for ticker in tickers:
+            latest = watermarks.get(ticker)
+            start = latest.date() if latest is not None else None
+            if start is not None and start >= today:
+                done(ticker, {"status": "up_to_date", "inserted": 0})
+            else:
+                starts[ticker] = start
+
+        uncommitted: list[str] = []
+
+        def commit() -> None:
+            try:
                 db.commit()
-            except Exception:
-                logger.exception("Failed to sync price history for %s", ticker)
+            except Exception as e:
+                logger.exception("Failed committing price history for %s", uncommitted)
                 try:
                     db.rollback()
                 except Exception:
-                    logger.exception("Rollback failed for %s", ticker)
+                    logger.exception("Rollback failed for %s", uncommitted)
+                for ticker in uncommitted:
+                    done(ticker, _failed(e))
+            uncommitted.clear()
 
-        return total_added
+        with ThreadPoolExecutor(
+            max_workers=max(1, concurrency), thread_name_prefix="history-sync"
+        ) as executor:
+            futures = {
+                executor.submit(
+                    MarketSyncService._fetch_history, ticker, period, start
+                ): ticker
+                for ticker, start in starts.items()
+            }
+            for future in as_completed(futures):
+                ticker = futures[future]
+                try:
+                    rows = future.result()
+                    if not rows:
+                        done(ticker, {"status": "no_data", "inserted": 0})
+                        continue
+                    with db.begin_nested():
+                        inserted = MarketSyncService._insert_price_rows(
+                            db, ticker, rows
+                        )
+                except Exception as e:
+                    logger.exception("Failed to sync price history for %s", ticker)
+                    done(ticker, _failed(e))
+                    continue
+
+                done(ticker, {"status": "ok", "inserted": inserted})
+                uncommitted.append(ticker)
+                if len(uncommitted) >= SYNC_COMMIT_TICKERS:
+                    commit()
+        commit()
+
+        return {
+            "inserted": sum(r["inserted"] for r in results.values()),
+            "failed": sum(r["status"] == "failed" for r in results.values()),
+            "tickers": {ticker: results[ticker] for ticker in tickers},
+        }
+
+    @staticmethod
+    def _insert_price_rows(db: Session, ticker: str, rows: HistoryRows) -> int:
+        """Insert history bars, skipping those already stored.
+
+        One multi-row INSERT ... ON CONFLICT DO NOTHING per
+        `PRICE_HISTORY_INSERT_BATCH` bars, against the unique
+        (asset_ticker, timestamp) constraint. Returns the number of rows
+        actually inserted.
+
+        Histories of `PRICE_HISTORY_COPY_THRESHOLD` bars or more go through
+        `_copy_price_rows` instead.
+        """
+        if len(rows) >= PRICE_HISTORY_COPY_THRESHOLD:
+            return MarketSyncService._copy_price_rows(db, ticker, rows)
+
+        inserted = 0
+        for start in range(0, len(rows), PRICE_HISTORY_INSERT_BATCH):
+            values = [
+                {"asset_ticker": ticker, "price": close, "timestamp": timestamp}
+                for timestamp, close in rows[start : start + PRICE_HISTORY_INSERT_BATCH]
+            ]
+            stmt = (
+                pg_insert(PriceHistory)
+                .values(values)
+                .on_conflict_do_nothing(index_elements=["asset_ticker", "timestamp"])
+            )
+            inserted += db.execute(stmt).rowcount
+        return inserted
+
+    @staticmethod
+    def _copy_price_rows(db: Session, ticker: str, rows: HistoryRows) -> int:
+        """Bulk-load history bars with COPY, skipping those already stored.
+
+        Bars are streamed as CSV into a temporary staging table, then merged
+        into price_history by one INSERT ... SELECT ... ON CONFLICT DO NOTHING
+        per `PRICE_HISTORY_COPY_BATCH` bars. The CSV is generated as COPY
+        reads it, so the write adds next to nothing to the memory of the
+        fetched history (see benchmarks/history_bulk_load.py). Runs on the
+        session's connection, inside its transaction. Returns the number of
+        rows actually inserted.
+        """
+        inserted = 0
+        raw = db.connection().connection
+        with raw.cursor() as cursor:
+            cursor.execute(_STAGING_DDL)
+            remaining = iter(rows)
+            for _ in range(0, len(rows), PRICE_HISTORY_COPY_BATCH):
+                batch = islice(remaining, PRICE_HISTORY_COPY_BATCH)
+                cursor.execute("TRUNCATE price_history_staging")
+                cursor.copy_expert(
+                    _STAGING_COPY, _CopyStream(_csv_lines(ticker, batch))
+                )
+                cursor.execute(_STAGING_MERGE)
+                inserted += cursor.rowcount
+        return inserted
 
     @staticmethod
     def sync_dividends(db: Session) -> int:
@@ -110,50 +351,104 @@ class MarketSyncService:
         )
 
     @staticmethod
-    def sync_dividends_for_tickers(db: Session, tickers: Iterable[str]) -> int:
-        total_added = 0
+    def sync_dividends_for_tickers(
+        db: Session,
+        tickers: Iterable[str],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> int:
+        """Sync dividends of known assets, inserting only new events.
 
-        for ticker in MarketSyncService._normalize_tickers(tickers):
-            try:
-                asset = db.query(Asset).filter(Asset.ticker == ticker).first()
-                if not asset:
-                    continue
+        Assets and already stored (ticker, ex-date) pairs are loaded in one
+        query each; fetched dividends are diffed against them in memory and
+        the new ones written with INSERT ... ON CONFLICT DO NOTHING, which
+        keeps concurrent syncs from duplicating an event. Returns the number
+        of rows inserted. `on_progress(ticker, result)` is called as soon as
+        a fetch fails, and for the other tickers once their events are
+        committed, with the count of new events found for each; a failed
+        write reports them all failed.
+        """
+        tickers = MarketSyncService._normalize_tickers(tickers)
+        if not tickers:
+            return 0
+
+        currencies = dict(
+            db.query(Asset.ticker, Asset.currency_code)
+            .filter(Asset.ticker.in_(tickers))
+            .all()
+        )
+        existing = set(
+            db.query(DividendEvent.asset_ticker, DividendEvent.ex_date)
+            .filter(DividendEvent.asset_ticker.in_(list(currencies)))
+            .all()
+        )
 
-                ticker_data = _yf().Ticker(ticker)
-                div_series = ticker_data.dividends
+        new_rows = []
+        # Fetched tickers -> new events found, reported once committed.
+        found: Dict[str, int] = {}
+        for ticker in tickers:
+            if ticker not in currencies:
+                continue
+            try:
+                # Not keyed "dividends": MarketDataService.get_dividends_history
+                # swallows errors, while this path must see them.
+                dividends = market_data_flight.do(
+                    ("sync_dividends", ticker),
+                    lambda: get_breaker("dividends").call(
+                        lambda: get_provider().get_dividends(ticker)
+                    ),
+                )
+            except Exception as e:
+                logger.exception("Error syncing dividends for %s", ticker)
+                if on_progress is not None:
+                    on_progress(ticker, _failed(e))
+                continue
 
-                if div_series.empty:
+            before = len(new_rows)
+            for div_date, div_amount in dividends:
+                if (ticker, div_date) in existing:
                     continue
+                existing.add((ticker, div_date))
+                new_rows.append(
+                    {
+                        "asset_ticker": ticker,
+                        "amount_per_share": div_amount,
+                        "ex_date": div_date,
+                        "currency_code": currencies[ticker],
+                    }
+                )
+            found[ticker] = len(new_rows) - before
 
-                for date, amount in div_series.items():
-                    div_amount = float(amount)
-                    div_date = date.to_pydatetime().date()
+        def report(error: Optional[Exception] = None) -> None:
+            if on_progress is None:
+                return
+            for ticker, count in found.items():
+                on_progress(
+                    ticker,
+                    _failed(error) if error else {"status": "ok", "inserted": count},
+                )
 
-                    exists = (
-                        db.query(DividendEvent)
-                        .filter(
-                            DividendEvent.asset_ticker == ticker,
-                            DividendEvent.ex_date == div_date,
-                        )
-                        .first()
-                    )
-
-                    if not exists:
-                        new_div = DividendEvent(
-                            asset_ticker=ticker,
-                            amount_per_share=div_amount,
-                            ex_date=div_date,
-                            currency_code=asset.currency_code,
-                        )
-                        db.add(new_div)
-                        total_added += 1
+        total_added = 0
+        if not new_rows:
+            report()
+            return total_added
 
-                db.commit()
+        try:
+            for start in range(0, len(new_rows), DIVIDEND_INSERT_BATCH):
+                stmt = (
+                    pg_insert(DividendEvent)
+                    .values(new_rows[start : start + DIVIDEND_INSERT_BATCH])
+                    .on_conflict_do_nothing(index_elements=["asset_ticker", "ex_date"])
+                )
+                total_added += db.execute(stmt).rowcount
+            db.commit()
+        except Exception as e:
+            logger.exception("Failed writing dividends for %s", tickers)
+            try:
+                db.rollback()
             except Exception:
-                logger.exception("Error syncing dividends for %s", ticker)
-                try:
-                    db.rollback()
-                except Exception:
-                    logger.exception("Rollback failed for %s", ticker)
+                logger.exception("Rollback failed for %s", tickers)
+            report(e)
+            return 0
 
+        report()
         return total_added
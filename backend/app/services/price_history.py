@@ -0,0 +1,266 @@
+"""Read side of the price history: date ranges and downsampling for charts.
+
+A `max` backfill stores tens of thousands of bars per ticker, while a chart
+is a few hundred pixels wide. Histories are therefore read as plain
+`(timestamp, price)` rows, never ORM objects, and can be reduced two ways:
+
+- in SQL, keeping the last bar of each time bucket: calendar buckets with
+  `resolution` (date_trunc), or `max_points` equal-width buckets with
+  `downsample="bucket"`. Only the kept rows leave the database.
+- in Python with LTTB (Largest-Triangle-Three-Buckets), which keeps the
+  `max_points` bars that best preserve the curve's shape: spikes and dips
+  survive, where bucketing may average them away.
+
+Either way the points returned are real stored bars, never interpolated.
+
+Long histories can also be sent columnar (`encode_columnar`): two parallel
+arrays of epoch seconds and float prices instead of one `{timestamp, price}`
+object per bar, optionally with the timestamps delta-encoded.
+Several tickers are read with one query; their SQL buckets are shared, so
+bucketed histories line up across tickers (LTTB picks bars per ticker).
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import PriceHistory
+
+HistoryPoints = List[tuple[datetime, Decimal]]
+
+RAW = "raw"
+# date_trunc fields accepted as `resolution`.
+RESOLUTIONS = (RAW, "hour", "day", "week", "month")
+
+LTTB = "lttb"
+BUCKET = "bucket"
+DOWNSAMPLE_METHODS = (LTTB, BUCKET)
+
+# Response encodings; ROWS is the default list of {timestamp, price} objects.
+ROWS = "rows"
+COLUMNAR = "columnar"
+DELTA = "delta"
+HISTORY_MEDIA_TYPES = {
+    COLUMNAR: "application/vnd.stakr.history.columnar+json",
+    DELTA: "application/vnd.stakr.history.delta+json",
+}
+
+
+def negotiate_encoding(accept: Optional[str]) -> str:
+    """Encoding asked for by an Accept header; ROWS unless it lists a columnar
+    media type.
+    """
+    by_media_type = {media: enc for enc, media in HISTORY_MEDIA_TYPES.items()}
+    for media_range in (accept or "").split(","):
+        encoding = by_media_type.get(media_range.split(";")[0].strip().lower())
+        if encoding is not None:
+            return encoding
+    return ROWS
+
+
+def encode_columnar(ticker: str, points: HistoryPoints, delta: bool = False) -> Dict:
+    """Columnar payload of a history: parallel `timestamps` and `prices`.
+
+    Timestamps are epoch seconds. With `delta`, each one after the first is
+    the gap to the previous bar (86400 throughout a daily history), which
+    compresses well; prices are never delta-encoded, as summing float deltas
+    back would drift from the stored values.
+    """
+    timestamps = [int(timestamp.timestamp()) for timestamp, _ in points]
+    if delta:
+        timestamps = timestamps[:1] + [
+            later - earlier for earlier, later in zip(timestamps, timestamps[1:])
+        ]
+    return {
+        "ticker": ticker,
+        "count": len(points),
+        "encoding": DELTA if delta else COLUMNAR,
+        "timestamps": timestamps,
+        "prices": [float(price) for _, price in points],
+    }
+
+
+def lttb(points: Sequence[tuple[datetime, Decimal]], threshold: int) -> HistoryPoints:
+    """Downsample `points` (oldest first) to `threshold` of them with LTTB.
+
+    The first and last points are always kept. Each point in between is
+    the one of its bucket forming the largest triangle with the previously
+    kept point and the average of the next bucket.
+    """
+    n = len(points)
+    if threshold >= n:
+        return list(points)
+    if threshold <= 2:
+        return [points[0], points[-1]][:threshold]
+
+    xs = [timestamp.timestamp() for timestamp, _ in points]
+    ys = [float(price) for _, price in points]
+    every = (n - 2) / (threshold - 2)
+
+    sampled = [points[0]]
+    a = 0
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = -1, -1.0
+        for j in range(int(i * every) + 1, next_start):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+class PriceHistoryService:
+    @staticmethod
+    def get_history(
+        db: Session,
+        ticker: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        resolution: str = RAW,
+        max_points: Optional[int] = None,
+        downsample: str = LTTB,
+    ) -> HistoryPoints:
+        """Bars of `ticker` between `start` and `end` (inclusive), oldest first.
+
+        `resolution` keeps the last bar of each hour, day, week or month.
+        `max_points` caps the number of bars, reduced with LTTB or, with
+        `downsample="bucket"`, as the last bar of equal-width time buckets.
+        """
+        return PriceHistoryService.get_histories(
+            db,
+            [ticker],
+            start=start,
+            end=end,
+            resolution=resolution,
+            max_points=max_points,
+            downsample=downsample,
+        )[ticker]
+
+    @staticmethod
+    def get_histories(
+        db: Session,
+        tickers: Iterable[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        resolution: str = RAW,
+        max_points: Optional[int] = None,
+        downsample: str = LTTB,
+    ) -> Dict[str, HistoryPoints]:
+        """`get_history` for several tickers at once, from a single query.
+
+        Every ticker is a key of the result, with an empty list when it has
+        no bars in range. Equal-width buckets span the range of all tickers.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Résolution inconnue : {resolution}.")
+        if downsample not in DOWNSAMPLE_METHODS:
+            raise ValueError(
+                f"Méthode de sous-échantillonnage inconnue : {downsample}."
+            )
+        # Bars are stored in UTC; naive bounds are read as UTC too.
+        start, end = (
+            dt.replace(tzinfo=timezone.utc) if dt and dt.tzinfo is None else dt
+            for dt in (start, end)
+        )
+        if start is not None and end is not None and start > end:
+            raise ValueError("La date de début doit précéder la date de fin.")
+        if downsample == BUCKET and max_points and resolution != RAW:
+            raise ValueError(
+                "Choisir une résolution ou un sous-échantillonnage par intervalles, "
+                "pas les deux."
+            )
+
+        histories: Dict[str, HistoryPoints] = {ticker: [] for ticker in tickers}
+        if not tickers:
+            return histories
+
+        filters = [PriceHistory.asset_ticker.in_(tickers)]
+        if start is not None:
+            filters.append(PriceHistory.timestamp >= start)
+        if end is not None:
+            filters.append(PriceHistory.timestamp <= end)
+
+        bucket = None
+        if downsample == BUCKET and max_points:
+            bucket = PriceHistoryService._equal_width_bucket(
+                db, filters, start, end, max_points
+            )
+        elif resolution != RAW:
+            # In UTC, whatever the session TimeZone: day, week and month
+            # buckets would otherwise shift with the connection settings.
+            bucket = func.date_trunc(resolution, PriceHistory.timestamp, "UTC")
+
+        columns = (
+            PriceHistory.asset_ticker,
+            PriceHistory.timestamp,
+            PriceHistory.price,
+        )
+        if bucket is None:
+            query = (
+                db.query(*columns)
+                .filter(*filters)
+                .order_by(PriceHistory.asset_ticker, PriceHistory.timestamp.asc())
+            )
+        else:
+            # Keeps the last bar of each bucket: the first in the window's
+            # order. Buckets come out oldest first.
+            rank = (
+                func.row_number()
+                .over(
+                    partition_by=(PriceHistory.asset_ticker, bucket),
+                    order_by=PriceHistory.timestamp.desc(),
+                )
+                .label("rank")
+            )
+            ranked = db.query(*columns, rank).filter(*filters).subquery()
+            query = (
+                db.query(ranked.c.asset_ticker, ranked.c.timestamp, ranked.c.price)
+                .filter(ranked.c.rank == 1)
+                .order_by(ranked.c.asset_ticker, ranked.c.timestamp.asc())
+            )
+        for ticker, timestamp, price in query.all():
+            histories.setdefault(ticker, []).append((timestamp, price))
+
+        if max_points and downsample == LTTB:
+            histories = {
+                ticker: lttb(points, max_points) for ticker, points in histories.items()
+            }
+        return histories
+
+    @staticmethod
+    def _equal_width_bucket(
+        db: Session,
+        filters: list,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        max_points: int,
+    ):
+        if start is None or end is None:
+            first, last = (
+                db.query(
+                    func.min(PriceHistory.timestamp), func.max(PriceHistory.timestamp)
+                )
+                .filter(*filters)
+                .one()
+            )
+            start = start or first
+            end = end or last
+        if start is None or end is None:
+            return None
+        # Bucket index in [0, max_points - 1] over [start, end].
+        span = max(0.0, (end - start).total_seconds()) + 1
+        offset = func.extract("epoch", PriceHistory.timestamp) - start.timestamp()
+        return func.floor(offset * max_points / span)
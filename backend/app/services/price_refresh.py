@@ -0,0 +1,101 @@
+"""Freshness policy for `Asset.current_price`.
+
+`Asset.last_updated_at` records when the stored price was last refreshed, so
+it doubles as a freshness marker shared by every replica: a price younger than
+the max age is served straight from the database, and only the stale ones are
+sent upstream. Refreshed prices are written back off the request path, which
+keeps read endpoints free of writes.
+"""
+
+import logging
+import os
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.database import get_session_factory
+from app.models import Asset
+
+logger = logging.getLogger(__name__)
+
+# Default maximum age (seconds) of a stored price before it is refreshed.
+PRICE_MAX_AGE_SECONDS = int(os.getenv("PRICE_MAX_AGE_SECONDS") or 300)
+
+# Time (seconds) a request may spend waiting on upstream for stale prices.
+# Past it, the stored prices are served and the fetch finishes in background.
+PRICE_REFRESH_BUDGET_SECONDS = float(os.getenv("PRICE_REFRESH_BUDGET_SECONDS") or 2)
+
+
+def is_price_fresh(
+    last_updated_at: Optional[datetime],
+    max_age_seconds: int,
+    now: Optional[datetime] = None,
+) -> bool:
+    """Return True when a price stamped `last_updated_at` is recent enough."""
+    if last_updated_at is None:
+        return False
+    if last_updated_at.tzinfo is None:
+        last_updated_at = last_updated_at.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return now - last_updated_at <= timedelta(seconds=max_age_seconds)
+
+
+def stale_tickers(
+    assets: Iterable, max_age_seconds: int, now: Optional[datetime] = None
+) -> list[str]:
+    """Return the tickers of `assets` whose stored price needs a refresh."""
+    now = now or datetime.now(timezone.utc)
+    tickers: list[str] = []
+    for asset in assets:
+        ticker = getattr(asset, "ticker", None)
+        if not ticker or ticker in tickers:
+            continue
+        if not is_price_fresh(
+            getattr(asset, "last_updated_at", None), max_age_seconds, now
+        ):
+            tickers.append(ticker)
+    return tickers
+
+
+def persist_asset_prices(
+    prices: dict[str, float], fetched_at: dict[str, datetime]
+) -> int:
+    """Best-effort write of refreshed prices to the asset table.
+
+    Runs after the response is sent, with its own session. `last_updated_at`
+    is set explicitly, to when each price was fetched upstream (`fetched_at`):
+    a price served from the quote cache is not as recent as the request, and
+    stamping it with the current time would keep every replica from
+    refreshing it. Prices without a fetch time are skipped. An unchanged
+    price is still a fresh one, and the column's ORM `onupdate` would not
+    fire for it. Returns the number of rows written.
+    """
+    rows = [
+        {
+            "ticker": ticker,
+            "current_price": Decimal(str(price)),
+            "last_updated_at": fetched_at[ticker],
+        }
+        for ticker, price in prices.items()
+        if price and ticker in fetched_at
+    ]
+    if not rows:
+        return 0
+
+    db: Session | None = None
+    try:
+        db = get_session_factory()()
+        # ORM bulk UPDATE by primary key: one executemany for all tickers.
+        db.execute(update(Asset), rows)
+        db.commit()
+        return len(rows)
+    except Exception:
+        logger.exception("Failed persisting refreshed prices for %s", list(prices))
+        return 0
+    finally:
+        if db is not None:
+            db.close()
@@ -0,0 +1,62 @@
+"""Market-data providers, selected by configuration.
+
+`MARKET_DATA_PROVIDER` picks where market data comes from:
+
+- "yfinance" (default): Yahoo Finance;
+- "record": Yahoo Finance, with every response saved under
+  `MARKET_DATA_REPLAY_DIR`;
+- "replay": the responses saved there, without network access.
+"""
+
+import os
+import threading
+from typing import Optional
+
+from .base import MarketDataProvider
+from .replay import RecordingProvider, ReplayProvider
+from .yfinance_provider import YFinanceProvider
+
+MARKET_DATA_PROVIDER = (os.getenv("MARKET_DATA_PROVIDER") or "yfinance").lower()
+MARKET_DATA_REPLAY_DIR = os.getenv("MARKET_DATA_REPLAY_DIR") or "market_data_replay"
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def build_provider(
+    name: str = MARKET_DATA_PROVIDER, replay_dir: str = MARKET_DATA_REPLAY_DIR
+) -> MarketDataProvider:
+    if name == "yfinance":
+        return YFinanceProvider()
+    if name == "record":
+        return RecordingProvider(YFinanceProvider(), replay_dir)
+    if name == "replay":
+        return ReplayProvider(replay_dir)
+    raise ValueError(f"Unknown market data provider: {name!r}")
+
+
+def get_provider() -> MarketDataProvider:
+    """Return the process-wide provider, built from settings on first use."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = build_provider()
+        return _provider
+
+
+def set_provider(provider: Optional[MarketDataProvider]) -> None:
+    """Swap the process-wide provider; None goes back to the configured one."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+__all__ = [
+    "MarketDataProvider",
+    "RecordingProvider",
+    "ReplayProvider",
+    "YFinanceProvider",
+    "build_provider",
+    "get_provider",
+    "set_provider",
+]
@@ -0,0 +1,59 @@
+"""Interface every market-data provider implements."""
+
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+# (bar timestamp, close price), oldest first.
+HistoryRows = List[tuple[datetime, float]]
+# (ex-dividend date, amount per share), oldest first.
+DividendRows = List[tuple[date, float]]
+
+
+class MarketDataProvider(ABC):
+    """Raw upstream access, returning plain Python data.
+
+    Providers do no caching, coalescing or error handling: failures are
+    raised, and `MarketDataService` / `MarketSyncService` decide what to do
+    with them (breakers, fallbacks, logging). Returning plain values rather
+    than pandas objects is what lets responses be recorded and replayed.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get_quote(self, ticker: str) -> Optional[float]:
+        """Latest price of one asset, or None when upstream has none."""
+
+    @abstractmethod
+    def get_quotes(self, tickers: List[str]) -> Dict[str, Optional[float]]:
+        """Latest price of several assets in one upstream call.
+
+        Tickers without a quote map to None. Raises when the call as a whole
+        failed.
+        """
+
+    @abstractmethod
+    def get_history(
+        self, ticker: str, period: str, start: Optional[date] = None
+    ) -> HistoryRows:
+        """Daily closes over `period` ("1mo", "1y", "max", ...).
+
+        With `start`, the closes from that day on instead, whatever `period`.
+        """
+
+    @abstractmethod
+    def get_dividends(self, ticker: str) -> DividendRows:
+        """Every dividend paid by the asset."""
+
+    @abstractmethod
+    def search(self, query: str, limit: int) -> tuple[List[Dict], bool]:
+        """Assets matching `query`, as ticker/name/type/exchange dicts.
+
+        The flag is True when upstream returned a full page of `limit`
+        matches, i.e. the result set may be truncated.
+        """
+
+    @abstractmethod
+    def get_asset_info(self, ticker: str) -> Optional[Dict]:
+        """Name, currency, asset type and price of one asset."""
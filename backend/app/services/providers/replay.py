@@ -0,0 +1,151 @@
+"""Record upstream responses to local files and replay them offline.
+
+`RecordingProvider` wraps a live provider and writes each successful response
+to a JSON file; `ReplayProvider` serves those files back without touching the
+network. Recording a session against Yahoo once gives deterministic inputs for
+benchmarks and load tests of the sync and summary paths.
+
+Layout, one file per call: `<dir>/<kind>/<key>.json`, e.g. `quote/AAPL.json`
+or `history/MC.PA@1y.json` (`history/MC.PA@2026-03-02.json` for a fetch
+from a given day). Batch quotes are stored per ticker, so a replayed
+batch may mix tickers recorded by single and batch calls. Nothing recorded
+replays as "no data" (None, or an empty list).
+"""
+
+import json
+import logging
+import re
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.services.providers.base import DividendRows, HistoryRows, MarketDataProvider
+from app.services.search_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._@-]")
+
+
+def _file_key(*parts: str) -> str:
+    return _UNSAFE_RE.sub("_", "@".join(parts))
+
+
+def _history_key(ticker: str, period: str, start: Optional[date]) -> str:
+    # Incremental fetches are keyed by their start day, full ones by period.
+    return _file_key(ticker, start.isoformat() if start else period)
+
+
+class _ReplayStore:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def path(self, kind: str, key: str) -> Path:
+        return self.directory / kind / f"{key}.json"
+
+    def read(self, kind: str, key: str) -> Any:
+        path = self.path(kind, key)
+        if not path.exists():
+            logger.debug("No recorded %s response for %s", kind, key)
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def write(self, kind: str, key: str, data: Any) -> None:
+        path = self.path(kind, key)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so a concurrent reader never sees half a file.
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            tmp.replace(path)
+
+
+class RecordingProvider(MarketDataProvider):
+    """Pass calls through to `inner` and record every response."""
+
+    name = "record"
+
+    def __init__(self, inner: MarketDataProvider, directory):
+        self.inner = inner
+        self.store = _ReplayStore(directory)
+
+    def get_quote(self, ticker: str) -> Optional[float]:
+        price = self.inner.get_quote(ticker)
+        self.store.write("quote", _file_key(ticker), price)
+        return price
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, Optional[float]]:
+        prices = self.inner.get_quotes(tickers)
+        for ticker in tickers:
+            self.store.write("quote", _file_key(ticker), prices.get(ticker))
+        return prices
+
+    def get_history(
+        self, ticker: str, period: str, start: Optional[date] = None
+    ) -> HistoryRows:
+        rows = self.inner.get_history(ticker, period, start)
+        self.store.write(
+            "history",
+            _history_key(ticker, period, start),
+            [[timestamp.isoformat(), close] for timestamp, close in rows],
+        )
+        return rows
+
+    def get_dividends(self, ticker: str) -> DividendRows:
+        rows = self.inner.get_dividends(ticker)
+        self.store.write(
+            "dividends",
+            _file_key(ticker),
+            [[ex_date.isoformat(), amount] for ex_date, amount in rows],
+        )
+        return rows
+
+    def search(self, query: str, limit: int) -> tuple[List[Dict], bool]:
+        results, truncated = self.inner.search(query, limit)
+        self.store.write(
+            "search",
+            _file_key(normalize_query(query), str(limit)),
+            {"results": results, "truncated": truncated},
+        )
+        return results, truncated
+
+    def get_asset_info(self, ticker: str) -> Optional[Dict]:
+        info = self.inner.get_asset_info(ticker)
+        self.store.write("info", _file_key(ticker), info)
+        return info
+
+
+class ReplayProvider(MarketDataProvider):
+    """Serve responses recorded by `RecordingProvider`; never goes online."""
+
+    name = "replay"
+
+    def __init__(self, directory):
+        self.store = _ReplayStore(directory)
+
+    def get_quote(self, ticker: str) -> Optional[float]:
+        return self.store.read("quote", _file_key(ticker))
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, Optional[float]]:
+        return {ticker: self.get_quote(ticker) for ticker in tickers}
+
+    def get_history(
+        self, ticker: str, period: str, start: Optional[date] = None
+    ) -> HistoryRows:
+        rows = self.store.read("history", _history_key(ticker, period, start)) or []
+        return [(datetime.fromisoformat(ts), float(close)) for ts, close in rows]
+
+    def get_dividends(self, ticker: str) -> DividendRows:
+        rows = self.store.read("dividends", _file_key(ticker)) or []
+        return [(date.fromisoformat(day), float(amount)) for day, amount in rows]
+
+    def search(self, query: str, limit: int) -> tuple[List[Dict], bool]:
+        data = self.store.read(
+            "search", _file_key(normalize_query(query), str(limit))
+        ) or {"results": [], "truncated": False}
+        return data["results"], data["truncated"]
+
+    def get_asset_info(self, ticker: str) -> Optional[Dict]:
+        return self.store.read("info", _file_key(ticker))
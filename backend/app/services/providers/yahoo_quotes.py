@@ -0,0 +1,125 @@
+"""Latest prices and asset metadata from Yahoo's JSON chart endpoints.
+
+Quotes are on the request path (portfolio summary, adding a transaction), and
+reading a last price does not need yfinance: going through it imports pandas
+and numpy on the first request after a cold start, and keeps them resident in
+every API replica. These calls use the pooled HTTP client and plain JSON
+instead, so yfinance is only loaded by history and dividend syncs.
+
+- `/v8/finance/chart/<ticker>`: one symbol, with its metadata;
+- `/v7/finance/spark?symbols=...`: closes for up to `SPARK_BATCH_SIZE`
+  symbols per call.
+
+Both work without the cookie/crumb handshake the `/v7/finance/quote`
+endpoint now requires.
+"""
+
+from typing import Dict, List, Optional
+
+from app.services.http_client import http_get
+
+CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
+SPARK_URL = "https://query1.finance.yahoo.com/v7/finance/spark"
+
+# Yahoo rejects spark requests for more symbols than this.
+SPARK_BATCH_SIZE = 20
+
+# Yahoo instrument/quote type -> our AssetType values.
+ASSET_TYPES = {
+    "EQUITY": "stock",
+    "CRYPTOCURRENCY": "crypto",
+    "ETF": "etf",
+    "MUTUALFUND": "fund",
+    "CURRENCY": "crypto",  # sometimes used for cryptos
+}
+
+
+def _last_close(closes: Optional[List]) -> Optional[float]:
+    for close in reversed(closes or []):
+        if close is not None:
+            return float(close)
+    return None
+
+
+def _price(meta: Dict, closes: Optional[List]) -> Optional[float]:
+    price = meta.get("regularMarketPrice")
+    if price is not None:
+        return float(price)
+    # Markets in other time zones may not have a bar for today yet; the last
+    # non-empty close is still the latest price.
+    return _last_close(closes)
+
+
+def _closes(result: Dict) -> Optional[List]:
+    quotes = (result.get("indicators") or {}).get("quote") or [{}]
+    return quotes[0].get("close")
+
+
+def _no_data(response) -> bool:
+    """Whether Yahoo answered that it has nothing for the symbols asked.
+
+    It answers 404 for symbols it does not know: that is no data, not an
+    upstream failure, and must not count against the circuit breaker. Other
+    4xx are raised like 5xx responses: 429 is throttling, and 401/403 is how
+    Yahoo answers once it blocks us or our cookie expired.
+    """
+    return response.status_code == 404
+
+
+def fetch_chart(ticker: str) -> Optional[Dict]:
+    """Return the chart result for `ticker`, or None for an unknown symbol."""
+    response = http_get(
+        CHART_URL.format(ticker=ticker), params={"range": "5d", "interval": "1d"}
+    )
+    if _no_data(response):
+        return None
+    response.raise_for_status()
+    results = (response.json().get("chart") or {}).get("result") or []
+    return results[0] if results else None
+
+
+def fetch_quote(ticker: str) -> Optional[float]:
+    result = fetch_chart(ticker)
+    if result is None:
+        return None
+    return _price(result.get("meta") or {}, _closes(result))
+
+
+def fetch_quotes(tickers: List[str]) -> Dict[str, Optional[float]]:
+    """Latest prices of `tickers`, `SPARK_BATCH_SIZE` symbols per request.
+
+    Tickers Yahoo has no price for map to None, even when that is all of
+    them: transport errors and error responses other than 404 raise.
+    """
+    prices: Dict[str, Optional[float]] = {ticker: None for ticker in tickers}
+    for start in range(0, len(tickers), SPARK_BATCH_SIZE):
+        chunk = tickers[start : start + SPARK_BATCH_SIZE]
+        response = http_get(
+            SPARK_URL,
+            params={"symbols": ",".join(chunk), "range": "5d", "interval": "1d"},
+        )
+        if _no_data(response):
+            continue
+        response.raise_for_status()
+        for item in (response.json().get("spark") or {}).get("result") or []:
+            ticker = item.get("symbol")
+            if ticker not in prices:
+                continue
+            for result in item.get("response") or []:
+                prices[ticker] = _price(result.get("meta") or {}, _closes(result))
+    return prices
+
+
+def fetch_asset_info(ticker: str) -> Optional[Dict]:
+    """Name, currency, asset type and price, or None for an unknown symbol."""
+    result = fetch_chart(ticker)
+    if result is None:
+        return None
+    meta = result.get("meta") or {}
+    raw_type = (meta.get("instrumentType") or "EQUITY").upper()
+    return {
+        "name": meta.get("longName") or meta.get("shortName") or ticker,
+        "currency": meta.get("currency") or "USD",
+        "type": ASSET_TYPES.get(raw_type, "stock"),
+        "price": _price(meta, _closes(result)) or 0.0,
+    }
@@ -0,0 +1,102 @@
+"""Yahoo Finance provider.
+
+Quotes, asset info and search go to Yahoo's JSON endpoints over plain HTTP
+(see app/services/providers/yahoo_quotes.py); yfinance, and the pandas stack
+behind it, is only loaded for history and dividend downloads.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional
+
+from app.services.http_client import http_get
+from app.services.providers import yahoo_quotes
+from app.services.providers.base import DividendRows, HistoryRows, MarketDataProvider
+
+# yfinance drags in pandas, numpy and curl_cffi (~233 MB installed, ~0.5-0.75 s
+# to import warm, more on a cold page cache). Importing it at module scope put
+# all of that on the application's boot path, which matters because the API
+# scales to zero on Azure Container Apps and every cold start pays for it.
+# It is loaded on first use instead, so only requests that actually reach
+# history or dividends pay the cost.
+_yf_module = None
+
+SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+
+
+def load_yfinance():
+    """Return the yfinance module, importing it on first use."""
+    global _yf_module
+    if _yf_module is None:
+        import yfinance
+
+        _yf_module = yfinance
+    return _yf_module
+
+
+def history_rows(series) -> HistoryRows:
+    """Convert a date-indexed pandas Series to (datetime, float) rows.
+
+    Column-wise: the index and values are converted in one call each rather
+    than row by row, which matters for multi-decade daily histories (see
+    benchmarks/history_conversion.py). Missing values are dropped.
+    """
+    series = series.dropna()
+    return list(
+        zip(series.index.to_pydatetime().tolist(), series.to_numpy(float).tolist())
+    )
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def get_quote(self, ticker: str) -> Optional[float]:
+        return yahoo_quotes.fetch_quote(ticker)
+
+    def get_quotes(self, tickers: List[str]) -> Dict[str, Optional[float]]:
+        return yahoo_quotes.fetch_quotes(tickers)
+
+    def get_history(
+        self, ticker: str, period: str, start: Optional[date] = None
+    ) -> HistoryRows:
+        asset = load_yfinance().Ticker(ticker)
+        if start is not None:
+            hist = asset.history(start=start)
+        else:
+            hist = asset.history(period=period)
+        if hist.empty:
+            return []
+        return history_rows(hist["Close"])
+
+    def get_dividends(self, ticker: str) -> DividendRows:
+        dividends = load_yfinance().Ticker(ticker).dividends
+        if dividends.empty:
+            return []
+        return [
+            (timestamp.date(), amount) for timestamp, amount in history_rows(dividends)
+        ]
+
+    def search(self, query: str, limit: int) -> tuple[List[Dict], bool]:
+        # Pooled connection with timeouts and retries on 429/5xx. The browser
+        # User-Agent Yahoo expects is set on the shared session.
+        response = http_get(
+            SEARCH_URL, params={"q": query, "quotesCount": limit, "newsCount": 0}
+        )
+        response.raise_for_status()
+
+        quotes = response.json().get("quotes", [])
+        results = []
+        for quote in quotes:
+            # Keep only real assets (actions, cryptos, etfs)
+            if "symbol" in quote and "shortname" in quote:
+                results.append(
+                    {
+                        "ticker": quote["symbol"],
+                        "name": quote["shortname"],
+                        "type": quote.get("quoteType", "UNKNOWN"),
+                        "exchange": quote.get("exchange", "UNKNOWN"),
+                    }
+                )
+        return results, len(quotes) >= limit
+
+    def get_asset_info(self, ticker: str) -> Optional[Dict]:
+        return yahoo_quotes.fetch_asset_info(ticker)
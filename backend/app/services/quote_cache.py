@@ -0,0 +1,185 @@
+"""In-process cache for latest asset prices.
+
+Most users hold the same handful of popular tickers, so without a cache every
+portfolio summary re-fetched the same quotes from Yahoo. Entries are kept in a
+bounded LRU map and served in three states:
+
+- fresh: younger than the TTL for the asset type, served as is;
+- stale: past the TTL but within the stale window, served immediately while
+  a background refresh fetches a new value (stale-while-revalidate);
+- miss: unknown or too old, the caller fetches it inline.
+
+The cache is per process. Replicas each hold their own copy, which is fine for
+quotes: the worst case is one extra upstream call per replica and TTL.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    return int(raw) if raw else default
+
+
+QUOTE_CACHE_MAX_SIZE = _env_int("QUOTE_CACHE_MAX_SIZE", 2048)
+QUOTE_CACHE_TTL_SECONDS = _env_int("QUOTE_CACHE_TTL_SECONDS", 60)
+# How long past its TTL an entry may still be served while it is refreshed.
+QUOTE_CACHE_STALE_SECONDS = _env_int("QUOTE_CACHE_STALE_SECONDS", 900)
+
+# Per asset-type TTLs (seconds). Crypto trades around the clock and moves
+# fastest. Each one can be overridden with QUOTE_CACHE_TTL_<TYPE>_SECONDS,
+# e.g. QUOTE_CACHE_TTL_CRYPTO_SECONDS=15.
+QUOTE_CACHE_TTLS = {
+    asset_type: _env_int(f"QUOTE_CACHE_TTL_{asset_type.upper()}_SECONDS", ttl)
+    for asset_type, ttl in {
+        "crypto": 30,
+        "stock": QUOTE_CACHE_TTL_SECONDS,
+        "etf": QUOTE_CACHE_TTL_SECONDS,
+        "index": QUOTE_CACHE_TTL_SECONDS,
+        "forex": QUOTE_CACHE_TTL_SECONDS,
+        "commodity": QUOTE_CACHE_TTL_SECONDS,
+    }.items()
+}
+
+
+class _Entry:
+    __slots__ = ("price", "asset_type", "fetched_at")
+
+    def __init__(self, price: float, asset_type: Optional[str], fetched_at: float):
+        self.price = price
+        self.asset_type = asset_type
+        self.fetched_at = fetched_at
+
+
+class QuoteCache:
+    """Bounded LRU cache of latest prices with stale-while-revalidate."""
+
+    def __init__(
+        self,
+        max_size: int = QUOTE_CACHE_MAX_SIZE,
+        ttls: Optional[Dict[str, int]] = None,
+        default_ttl: int = QUOTE_CACHE_TTL_SECONDS,
+        stale_seconds: int = QUOTE_CACHE_STALE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttls = dict(QUOTE_CACHE_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "evictions": 0,
+            "refreshes": 0,
+        }
+
+    def ttl_for(self, asset_type: Optional[str]) -> int:
+        if asset_type is None:
+            return self.default_ttl
+        return self.ttls.get(str(asset_type).lower(), self.default_ttl)
+
+    def get(self, ticker: str) -> tuple[Optional[float], str]:
+        """Return `(price, state)`, state being FRESH, STALE or MISS."""
+        price, state, _age = self.lookup(ticker)
+        return price, state
+
+    def lookup(self, ticker: str) -> tuple[Optional[float], str, Optional[float]]:
+        """Like `get`, with the age in seconds of the price (None on a miss)."""
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None, MISS, None
+
+            age = self._clock() - entry.fetched_at
+            ttl = self.ttl_for(entry.asset_type)
+            if age > ttl + self.stale_seconds:
+                del self._entries[ticker]
+                self._counters["misses"] += 1
+                return None, MISS, None
+
+            self._entries.move_to_end(ticker)
+            if age > ttl:
+                self._counters["stale"] += 1
+                return entry.price, STALE, age
+            self._counters["hits"] += 1
+            return entry.price, FRESH, age
+
+    def set(self, ticker: str, price: float, asset_type: Optional[str] = None) -> None:
+        with self._lock:
+            previous = self._entries.pop(ticker, None)
+            if asset_type is None and previous is not None:
+                asset_type = previous.asset_type
+            self._entries[ticker] = _Entry(price, asset_type, self._clock())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def refresh_in_background(
+        self,
+        tickers: Iterable[str],
+        fetch: Callable[[list[str]], Dict[str, Optional[float]]],
+    ) -> Optional[Future]:
+        """Refetch `tickers` off the caller's thread and store the results.
+
+        Tickers already being refreshed are skipped, so a burst of requests
+        hitting the same stale entry triggers a single upstream call. Returns
+        the scheduled future, or None when there was nothing to refresh.
+        """
+        with self._lock:
+            pending = [t for t in dict.fromkeys(tickers) if t not in self._refreshing]
+            if not pending:
+                return None
+            self._refreshing.update(pending)
+            self._counters["refreshes"] += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="quote-refresh"
+                )
+            executor = self._executor
+
+        def _run() -> None:
+            try:
+                for ticker, price in fetch(pending).items():
+                    if price is not None:
+                        self.set(ticker, price)
+            except Exception:
+                logger.exception("Background quote refresh failed for %s", pending)
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(pending)
+
+        return executor.submit(_run)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+quote_cache = QuoteCache()
@@ -0,0 +1,110 @@
+"""In-process cache for asset search results, with prefix reuse.
+
+The frontend searches as the user types, so "app", "appl" and "apple" arrive
+within a second of each other. Results are cached per normalized query in a
+bounded LRU map. A longer query can also be answered from a cached shorter
+one by filtering its results, provided that cached result set was complete:
+if Yahoo returned fewer matches than we asked for, every match of the longer
+query is already among them.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Dict, List, Optional
+
+SEARCH_CACHE_MAX_SIZE = int(os.getenv("SEARCH_CACHE_MAX_SIZE") or 1024)
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS") or 3600)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key for a search query."""
+    return " ".join(query.lower().split())
+
+
+def _matches(result: Dict, query: str) -> bool:
+    return (
+        query in str(result.get("ticker", "")).lower()
+        or query in str(result.get("name", "")).lower()
+    )
+
+
+class _Entry:
+    __slots__ = ("results", "truncated", "stored_at")
+
+    def __init__(self, results: List[Dict], truncated: bool, stored_at: float):
+        self.results = results
+        self.truncated = truncated
+        self.stored_at = stored_at
+
+
+class SearchCache:
+    """Bounded TTL cache of search results keyed on the normalized query."""
+
+    def __init__(
+        self,
+        max_size: int = SEARCH_CACHE_MAX_SIZE,
+        ttl: int = SEARCH_CACHE_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "prefix_hits": 0, "misses": 0}
+
+    def _live_entry(self, key: str, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if now - entry.stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, query: str) -> Optional[List[Dict]]:
+        """Return cached results for `query`, or None on a miss."""
+        key = normalize_query(query)
+        now = self._clock()
+        with self._lock:
+            entry = self._live_entry(key, now)
+            if entry is not None:
+                self._counters["hits"] += 1
+                return list(entry.results)
+
+            # Longest complete prefix first: it has the fewest results to scan.
+            for length in range(len(key) - 1, 0, -1):
+                entry = self._live_entry(key[:length], now)
+                if entry is not None and not entry.truncated:
+                    self._counters["prefix_hits"] += 1
+                    return [r for r in entry.results if _matches(r, key)]
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, query: str, results: List[Dict], truncated: bool) -> None:
+        """Store `results`; `truncated` marks a result set cut at the limit."""
+        key = normalize_query(query)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = _Entry(list(results), truncated, self._clock())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+search_cache = SearchCache()
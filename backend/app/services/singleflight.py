@@ -0,0 +1,120 @@
+"""Request coalescing ("singleflight") for upstream market-data calls.
+
+When many requests ask for the same ticker at the same moment -- typically
+every dashboard opening at market open -- only the first caller for a given
+`(operation, ticker)` key reaches Yahoo. Callers arriving while that fetch is
+in flight wait for it and receive the same result (or the same exception).
+Nothing is kept once the call completes; caching is the quote cache's job.
+"""
+
+import threading
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers of the same key."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"issued": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Run `fn` for `key`, or wait for the call already running for it."""
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+                self._counters["issued"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if not is_leader:
+            return call.wait()
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+        finally:
+            self._finish([key])
+            call.done.set()
+        return call.wait()
+
+    def do_many(
+        self,
+        operation: str,
+        items: Iterable[str],
+        fn: Callable[[list[str]], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Batch variant of `do`, keyed by `(operation, item)`.
+
+        Items already being fetched by another caller are awaited; the rest
+        are passed to a single `fn(items)` call that must return a dict keyed
+        by item. Items missing from that dict resolve to None.
+        """
+        led: Dict[str, _Call] = {}
+        followed: Dict[str, _Call] = {}
+        with self._lock:
+            for item in dict.fromkeys(items):
+                call = self._calls.get((operation, item))
+                if call is not None:
+                    followed[item] = call
+                else:
+                    led[item] = self._calls[(operation, item)] = _Call()
+            self._counters["coalesced"] += len(followed)
+            if led:
+                self._counters["issued"] += 1
+
+        if led:
+            try:
+                results = fn(list(led))
+                for item, call in led.items():
+                    call.result = results.get(item)
+            except BaseException as e:
+                for call in led.values():
+                    call.error = e
+            finally:
+                self._finish([(operation, item) for item in led])
+                for call in led.values():
+                    call.done.set()
+
+        return {item: call.wait() for item, call in {**led, **followed}.items()}
+
+    def _finish(self, keys: list[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                self._calls.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
+
+    def reset(self) -> None:
+        """Reset the counters. In-flight calls are left alone."""
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+# Shared by MarketDataService and MarketSyncService.
+market_data_flight = SingleFlight()
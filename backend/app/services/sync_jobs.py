@@ -0,0 +1,257 @@
+"""Market-data sync jobs, queued in PostgreSQL.
+
+Admin syncs over the whole asset table take minutes, so the sync endpoints
+only enqueue a job: one `sync_job` row plus one `sync_job_item` row per
+ticker. Workers (`python -m app.worker`, any number of them, on any host)
+claim items with `FOR UPDATE SKIP LOCKED`, so concurrent workers split a large
+sync between them without taking the same ticker twice. Failed items are
+retried with exponential backoff up to `SYNC_ITEM_MAX_ATTEMPTS`; an item whose
+worker died mid-run is reclaimed once its lease expires. Progress is read
+back from the item rows by `GET /assets/sync-jobs/{id}`.
+"""
+
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Asset, SyncJob, SyncJobItem
+from app.services.market_sync import MarketSyncService
+
+logger = logging.getLogger(__name__)
+
+# Attempts per ticker before it is reported as failed.
+SYNC_ITEM_MAX_ATTEMPTS = int(os.getenv("SYNC_ITEM_MAX_ATTEMPTS") or 3)
+# Delay before the first retry of a failed ticker; doubled on each retry.
+SYNC_ITEM_RETRY_SECONDS = int(os.getenv("SYNC_ITEM_RETRY_SECONDS") or 30)
+# An item claimed longer ago than this is assumed lost with its worker.
+SYNC_ITEM_LEASE_SECONDS = int(os.getenv("SYNC_ITEM_LEASE_SECONDS") or 900)
+
+HISTORY = "history"
+DIVIDENDS = "dividends"
+KINDS = (HISTORY, DIVIDENDS)
+
+# Job statuses. A finished job is succeeded, failed (every item failed) or
+# partial (some did).
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+PARTIAL = "partial"
+
+# Item statuses; FAILED is also the status of a job whose items all failed.
+PENDING = "pending"
+FAILED = "failed"
+
+
+def enqueue_sync_job(db: Session, kind: str, params: Optional[Dict] = None) -> SyncJob:
+    """Queue a sync of every tracked asset and return the job."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown sync job kind: {kind!r}")
+
+    tickers = [str(ticker) for (ticker,) in db.query(Asset.ticker).all()]
+    job = SyncJob(kind=kind, params=params or {}, status=QUEUED)
+    if not tickers:
+        job.status = SUCCEEDED
+        job.finished_at = datetime.now(timezone.utc)
+    db.add(job)
+    db.flush()
+    if tickers:
+        db.execute(
+            insert(SyncJobItem), [{"job_id": job.id, "ticker": t} for t in tickers]
+        )
+    db.commit()
+    return job
+
+
+def get_sync_job_status(db: Session, job_id: UUID) -> Optional[Dict]:
+    """Progress of a job, aggregated from its items; None if unknown."""
+    job = db.query(SyncJob).filter(SyncJob.id == job_id).first()
+    if job is None:
+        return None
+
+    counts: Dict[str, int] = defaultdict(int)
+    inserted = 0
+    for status, count, rows in (
+        db.query(SyncJobItem.status, func.count(), func.sum(SyncJobItem.inserted))
+        .filter(SyncJobItem.job_id == job_id)
+        .group_by(SyncJobItem.status)
+        .all()
+    ):
+        counts[status] = count
+        inserted += rows or 0
+    failures = dict(
+        db.query(SyncJobItem.ticker, SyncJobItem.error)
+        .filter(SyncJobItem.job_id == job_id, SyncJobItem.status == FAILED)
+        .all()
+    )
+
+    elapsed = None
+    if job.started_at is not None:
+        end = job.finished_at or datetime.now(timezone.utc)
+        elapsed = round((end - job.started_at).total_seconds(), 3)
+
+    return {
+        "id": str(job.id),
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "elapsed_seconds": elapsed,
+        "tickers_total": sum(counts.values()),
+        "tickers_done": counts[SUCCEEDED] + counts[FAILED],
+        "tickers_pending": counts[PENDING] + counts[RUNNING],
+        "inserted": inserted,
+        "failures": failures,
+    }
+
+
+def claim_items(db: Session, limit: int, now: Optional[datetime] = None) -> List:
+    """Claim up to `limit` due items for this worker, and commit the claim.
+
+    Rows locked by another worker's claim are skipped rather than waited on.
+    """
+    now = now or datetime.now(timezone.utc)
+    lease_expired = now - timedelta(seconds=SYNC_ITEM_LEASE_SECONDS)
+    stmt = (
+        select(SyncJobItem)
+        .where(
+            or_(
+                and_(
+                    SyncJobItem.status == PENDING,
+                    SyncJobItem.next_attempt_at <= now,
+                ),
+                and_(
+                    SyncJobItem.status == RUNNING,
+                    SyncJobItem.claimed_at < lease_expired,
+                ),
+            )
+        )
+        .order_by(SyncJobItem.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    items = list(db.execute(stmt).scalars())
+    if not items:
+        db.rollback()
+        return []
+
+    for item in items:
+        item.status = RUNNING
+        item.claimed_at = now
+        item.attempts += 1
+    db.execute(
+        update(SyncJob)
+        .where(SyncJob.id.in_({item.job_id for item in items}))
+        .where(SyncJob.status == QUEUED)
+        .values(status=RUNNING, started_at=now)
+    )
+    db.commit()
+    return items
+
+
+def apply_result(item, result: Dict, now: Optional[datetime] = None) -> None:
+    """Record the outcome of one item, scheduling a retry when it failed."""
+    now = now or datetime.now(timezone.utc)
+    item.inserted = (item.inserted or 0) + result.get("inserted", 0)
+    if result.get("status") != FAILED:
+        item.status = SUCCEEDED
+        item.error = None
+        item.finished_at = now
+    elif item.attempts < SYNC_ITEM_MAX_ATTEMPTS:
+        item.status = PENDING
+        item.error = result.get("error")
+        item.next_attempt_at = now + timedelta(
+            seconds=SYNC_ITEM_RETRY_SECONDS * 2 ** (item.attempts - 1)
+        )
+    else:
+        item.status = FAILED
+        item.error = result.get("error")
+        item.finished_at = now
+
+
+def _sync(db: Session, job: SyncJob, tickers: List[str]) -> Dict[str, Dict]:
+    results: Dict[str, Dict] = {}
+
+    def record(ticker: str, result: Dict) -> None:
+        results[ticker] = result
+
+    params = job.params or {}
+    if job.kind == HISTORY:
+        MarketSyncService.sync_price_histories_report(
+            db,
+            tickers,
+            period=params.get("period", "1mo"),
+            full=params.get("full", False),
+            concurrency=params.get("concurrency", 1),
+            on_progress=record,
+        )
+    else:
+        MarketSyncService.sync_dividends_for_tickers(db, tickers, on_progress=record)
+    return results
+
+
+def process_items(db: Session, items: Iterable) -> None:
+    """Run the syncs for claimed items, then record outcomes and finish jobs."""
+    by_job: Dict[UUID, List] = defaultdict(list)
+    for item in items:
+        by_job[item.job_id].append(item)
+
+    for job_id, job_items in by_job.items():
+        job = db.query(SyncJob).filter(SyncJob.id == job_id).first()
+        tickers = [item.ticker for item in job_items]
+        try:
+            results = _sync(db, job, tickers)
+        except Exception as e:
+            logger.exception("Sync job %s failed for %s", job_id, tickers)
+            results = {t: {"status": FAILED, "error": str(e)} for t in tickers}
+
+        for item in job_items:
+            apply_result(
+                item,
+                results.get(
+                    item.ticker, {"status": FAILED, "error": "No result from sync"}
+                ),
+            )
+        db.commit()
+        finish_job(db, job_id)
+
+
+def job_outcome(counts: Dict[str, int]) -> Optional[str]:
+    """Final status of a job from its item counts by status; None while open."""
+    if counts.get(PENDING) or counts.get(RUNNING):
+        return None
+    if not counts.get(FAILED):
+        return SUCCEEDED
+    return PARTIAL if counts.get(SUCCEEDED) else FAILED
+
+
+def finish_job(db: Session, job_id: UUID) -> Optional[str]:
+    """Close a job once none of its items is left to run.
+
+    Its status is derived from the item outcomes (see `job_outcome`). Items
+    that are done never change again, so the counts cannot go stale before
+    the update; a job already closed by another worker is left alone.
+    Returns the status set, or None.
+    """
+    counts = dict(
+        db.query(SyncJobItem.status, func.count())
+        .filter(SyncJobItem.job_id == job_id)
+        .group_by(SyncJobItem.status)
+        .all()
+    )
+    status = job_outcome(counts)
+    if status is None:
+        db.rollback()
+        return None
+    closed = db.execute(
+        update(SyncJob)
+        .where(SyncJob.id == job_id, SyncJob.status.in_((QUEUED, RUNNING)))
+        .values(status=status, finished_at=func.now())
+    ).rowcount
+    db.commit()
+    return status if closed else None
@@ -0,0 +1,83 @@
+"""Sync job worker: drains the `sync_job_item` queue.
+
+    python -m app.worker
+
+Run as many as needed, on any host with database access: items are claimed
+with `FOR UPDATE SKIP LOCKED`, so workers never process the same ticker at
+once. Stops after the current batch on SIGTERM or SIGINT. See
+app/services/sync_jobs.py for the queue itself.
+
+Every `PRICE_HISTORY_MAINTENANCE_SECONDS` a worker also maintains the yearly
+partitions of `price_history` (app/partitions.py), which deploys otherwise
+only do once each.
+"""
+
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+from app.core.database import get_session_factory
+from app.migrate import maintain_partitions
+from app.services.sync_jobs import claim_items, process_items
+
+logger = logging.getLogger(__name__)
+
+# Items claimed per round; they are synced together, as one batch.
+SYNC_WORKER_BATCH = int(os.getenv("SYNC_WORKER_BATCH") or 10)
+# Seconds to sleep when the queue is empty.
+SYNC_WORKER_POLL_SECONDS = float(os.getenv("SYNC_WORKER_POLL_SECONDS") or 5)
+# Seconds between two runs of the price_history partition maintenance.
+PRICE_HISTORY_MAINTENANCE_SECONDS = float(
+    os.getenv("PRICE_HISTORY_MAINTENANCE_SECONDS") or 3600
+)
+
+
+def run_once(batch: int = SYNC_WORKER_BATCH) -> int:
+    """Claim and process one batch of items; returns how many were claimed."""
+    db = get_session_factory()()
+    try:
+        items = claim_items(db, batch)
+        if items:
+            process_items(db, items)
+        return len(items)
+    finally:
+        db.close()
+
+
+def run(stop: threading.Event) -> None:
+    logger.info("Sync worker started.")
+    next_maintenance = 0.0
+    while not stop.is_set():
+        if time.monotonic() >= next_maintenance:
+            next_maintenance = time.monotonic() + PRICE_HISTORY_MAINTENANCE_SECONDS
+            try:
+                maintain_partitions()
+            except Exception:
+                logger.exception("price_history partition maintenance failed.")
+        try:
+            claimed = run_once()
+        except Exception:
+            logger.exception("Sync worker round failed.")
+            claimed = 0
+        if not claimed:
+            stop.wait(SYNC_WORKER_POLL_SECONDS)
+    logger.info("Sync worker stopped.")
+
+
+def main() -> int:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(levelname)-5.5s [%(name)s] %(message)s",
+    )
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    run(stop)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Benchmark: writing max-period history backfills, INSERT batches vs. COPY.
+
+Writes the same synthetic daily histories through
+`MarketSyncService._insert_price_rows` twice: once with the COPY path turned
+off (multi-row INSERT ... ON CONFLICT DO NOTHING, `PRICE_HISTORY_INSERT_BATCH`
+bars per statement), once with every history going through COPY. Each
+ticker is written in its own savepoint and committed every
+`SYNC_COMMIT_TICKERS` tickers, as `sync_history_for_tickers` does. Reports
+the wall time of the writes, then of writing every history again with every
+bar already stored (a re-sync), and the peak Python memory one history write
+allocates on top of the history itself (traced separately, as tracing slows
+the writes down).
+
+Needs a migrated database at DATABASE_URL. The benchmark assets
+(`BENCH00001`, ...) and their bars are deleted at the end.
+
+    python -m benchmarks.history_bulk_load [--tickers 200] [--years 30]
+
+Defaults (2.19M bars), PostgreSQL 18.6 with partitioned price_history,
+1 vCPU, shared_buffers=512MB:
+
+    path     write    bars/s  re-sync  peak memory per ticker
+    insert  221.4 s    9,892  186.3 s  2,527 KiB
+    copy     50.2 s   43,649   23.1 s     42 KiB
+
+COPY writes a full-universe backfill in under a quarter of the time, and a
+re-sync in an eighth. Generating the CSV as COPY reads it keeps the memory
+of a write flat, where INSERT builds a statement per 1000 bars.
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from sqlalchemy import text
+
+from app.core.database import get_session_factory
+from app.services import market_sync
+from app.services.market_sync import SYNC_COMMIT_TICKERS, MarketSyncService
+
+PREFIX = "BENCH"
+
+
+def ticker(k: int) -> str:
+    return f"{PREFIX}{k:05d}"
+
+
+def synthetic_rows(days: int, seed: int) -> list:
+    start = datetime(1996, 1, 1, tzinfo=timezone.utc)
+    price = 100.0 + seed
+    rows = []
+    for day in range(days):
+        price += ((day * 7919 + seed) % 200 - 100) / 1000
+        rows.append((start + timedelta(days=day), round(price, 6)))
+    return rows
+
+
+def setup(db, tickers: int) -> None:
+    db.execute(
+        text("INSERT INTO currency (code) VALUES ('USD') ON CONFLICT DO NOTHING")
+    )
+    db.execute(
+        text(
+            "INSERT INTO asset (ticker, asset_type, name, current_price, "
+            "currency_code) "
+            "SELECT :prefix || lpad(k::text, 5, '0'), 'STOCK', 'Benchmark', 1, 'USD' "
+            "FROM generate_series(1, :tickers) AS k"
+        ),
+        {"prefix": PREFIX, "tickers": tickers},
+    )
+    db.commit()
+
+
+def clear(db) -> None:
+    # Cascades to the benchmark bars.
+    db.execute(text("DELETE FROM asset WHERE ticker LIKE :p"), {"p": f"{PREFIX}%"})
+    db.commit()
+
+
+def write_all(db, tickers: int, days: int) -> tuple[float, int]:
+    """Write every history; returns (seconds, rows inserted)."""
+    inserted = 0
+    started = time.perf_counter()
+    for k in range(1, tickers + 1):
+        # Built per ticker, as each fetch returns it.
+        rows = synthetic_rows(days, k)
+        with db.begin_nested():
+            inserted += MarketSyncService._insert_price_rows(db, ticker(k), rows)
+        del rows
+        if k % SYNC_COMMIT_TICKERS == 0:
+            db.commit()
+    db.commit()
+    return time.perf_counter() - started, inserted
+
+
+def write_memory(db, days: int) -> int:
+    """Peak Python memory (bytes) one history write adds to the history."""
+    rows = synthetic_rows(days, 1)
+    tracemalloc.start()
+    try:
+        with db.begin_nested():
+            MarketSyncService._insert_price_rows(db, ticker(1), rows)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    db.commit()
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--years", type=int, default=30)
+    args = parser.parse_args()
+
+    days = args.years * 365
+    print(f"{args.tickers * days:,} bars ({args.tickers} tickers x {days} days)")
+
+    db = get_session_factory()()
+    try:
+        clear(db)
+        for label, threshold in (("insert", 2**62), ("copy", 1)):
+            setup(db, args.tickers)
+            with mock.patch.object(
+                market_sync, "PRICE_HISTORY_COPY_THRESHOLD", threshold
+            ):
+                elapsed, inserted = write_all(db, args.tickers, days)
+                resync, _ = write_all(db, args.tickers, days)
+                peak = write_memory(db, days)
+            print(
+                f"{label:>6}: {elapsed:6.1f} s ({inserted / elapsed:,.0f} bars/s), "
+                f"re-sync {resync:6.1f} s, peak memory per ticker "
+                f"{peak / 2**10:,.0f} KiB"
+            )
+            clear(db)
+    finally:
+        clear(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
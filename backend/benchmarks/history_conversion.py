@@ -0,0 +1,72 @@
+"""Benchmark: converting a yfinance history frame into price_history rows.
+
+Compares the former row-wise path (`iterrows()` plus one `PriceHistory` ORM
+object per bar) with the column-wise conversion used by the yfinance provider
+and the row dicts passed to the bulk INSERT. Runs offline on a synthetic
+20-year daily history; no database or network needed.
+
+    python -m benchmarks.history_conversion [--years 20] [--repeat 5]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.models import PriceHistory
+from app.services.providers.yfinance_provider import history_rows
+
+
+def synthetic_history(years: int) -> pd.DataFrame:
+    index = pd.date_range(
+        end="2026-01-01", periods=years * 365, freq="D", tz="America/New_York"
+    )
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+    return pd.DataFrame({"Close": closes, "Volume": 1_000}, index=index)
+
+
+def row_wise(hist: pd.DataFrame) -> list:
+    return [
+        PriceHistory(
+            asset_ticker="BENCH",
+            price=float(row["Close"]),
+            timestamp=date.to_pydatetime(),
+        )
+        for date, row in hist.iterrows()
+    ]
+
+
+def column_wise(hist: pd.DataFrame) -> list:
+    return [
+        {"asset_ticker": "BENCH", "price": close, "timestamp": timestamp}
+        for timestamp, close in history_rows(hist["Close"])
+    ]
+
+
+def best_of(fn, hist: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(hist)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    hist = synthetic_history(args.years)
+    rows = len(hist)
+    print(f"{rows} daily bars, best of {args.repeat}")
+    for label, fn in (("row-wise", row_wise), ("column-wise", column_wise)):
+        elapsed = best_of(fn, hist, args.repeat)
+        print(f"{label:>12}: {elapsed * 1000:8.1f} ms  {rows / elapsed:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark: encoding a price history response, rows vs. columnar.
+
+Compares the default response (one `{timestamp, price}` object per bar,
+validated by `PriceHistoryListResponse` and serialized by FastAPI) with the
+columnar and delta encodings of `GET /assets/{ticker}/history`. Reports the
+serialization time and the payload size, raw and gzipped. Runs offline on a
+synthetic 20-year daily history; no database or network needed.
+
+    python -m benchmarks.history_encoding [--years 20] [--repeat 5]
+"""
+
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.asset import PriceHistoryListResponse
+from app.services.price_history import encode_columnar
+
+
+def synthetic_points(years: int) -> list:
+    start = datetime(2006, 1, 1, tzinfo=timezone.utc)
+    price = Decimal("100")
+    points = []
+    for day in range(years * 365):
+        price += Decimal((day * 7919) % 200 - 100) / 1000
+        points.append((start + timedelta(days=day), price.quantize(Decimal("1e-10"))))
+    return points
+
+
+def rows(points: list) -> bytes:
+    history = [{"timestamp": ts, "price": price} for ts, price in points]
+    model = PriceHistoryListResponse(ticker="BENCH", count=len(points), history=history)
+    return json.dumps(jsonable_encoder(model)).encode()
+
+
+def columnar(points: list) -> bytes:
+    body = encode_columnar("BENCH", points)
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def delta(points: list) -> bytes:
+    body = encode_columnar("BENCH", points, delta=True)
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def best_of(fn, points: list, repeat: int) -> tuple[float, bytes]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = fn(points)
+        timings.append(time.perf_counter() - started)
+    return min(timings), payload
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    points = synthetic_points(args.years)
+    print(f"{len(points)} daily bars, best of {args.repeat}")
+    for label, fn in (("rows", rows), ("columnar", columnar), ("delta", delta)):
+        elapsed, payload = best_of(fn, points, args.repeat)
+        print(
+            f"{label:>9}: {elapsed * 1000:8.1f} ms  {len(payload) / 1024:8.1f} KiB"
+            f"  {len(gzip.compress(payload)) / 1024:8.1f} KiB gzipped"
+        )
+
+
+if __name__ == "__main__":
+    main()
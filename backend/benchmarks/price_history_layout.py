@@ -0,0 +1,186 @@
+"""Benchmark: price_history storage layouts on a synthetic multi-million-row table.
+
+Builds the same synthetic history into three tables of a scratch schema and
+compares their on-disk size and the speed of the queries the app runs:
+
+- `surrogate`: the former layout. UUIDv7 `id` primary key, a unique
+  constraint on (asset_ticker, timestamp) and one index on each column.
+- `composite`: the current layout. (asset_ticker, timestamp) primary key
+  only, table clustered on it.
+- `composite_brin`: `composite` plus a BRIN index on `timestamp`, for
+  queries over a time range of every ticker.
+
+Queries: one ticker over one year (the chart read), the latest bar of a
+batch of tickers (the sync watermarks), and a count over one month of all
+tickers (cross-ticker time range). Needs a migrated database at DATABASE_URL
+(for its `uuidv7()` function); the scratch schema is dropped at the end
+unless --keep.
+
+    python -m benchmarks.price_history_layout [--tickers 500] [--years 20]
+
+Defaults (3.65M rows), PostgreSQL 18.6, 1 vCPU, shared_buffers=512MB; median
+of 50 runs (5 for the month count):
+
+    layout           build   table    indexes  ticker/year  latest/50  month
+    surrogate        71.5 s  267 MiB  278 MiB  4.07 ms      147.4 ms   1.89 ms
+    composite        29.8 s  210 MiB  110 MiB  1.40 ms       59.8 ms  10.71 ms
+    composite_brin   29.1 s  210 MiB  110 MiB  1.68 ms       66.8 ms   9.96 ms
+
+The composite key halves the on-disk size and is faster for both queries
+the app runs. Only the cross-ticker month, which no app query issues, gets
+slower without the timestamp index, and BRIN does not win it back: rows
+clustered by ticker leave timestamps uncorrelated with the physical order.
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+
+from app.core.database import get_engine
+
+SCHEMA = "bench_price_history"
+
+LAYOUTS = {
+    "surrogate": [
+        "CREATE TABLE {t} ("
+        "id uuid PRIMARY KEY DEFAULT uuidv7(), "
+        "asset_ticker varchar NOT NULL, "
+        "price numeric(24, 10) NOT NULL, "
+        "timestamp timestamptz NOT NULL, "
+        "UNIQUE (asset_ticker, timestamp))",
+        "CREATE INDEX ON {t} (asset_ticker)",
+        "CREATE INDEX ON {t} (timestamp)",
+    ],
+    "composite": [
+        "CREATE TABLE {t} ("
+        "asset_ticker varchar NOT NULL, "
+        "timestamp timestamptz NOT NULL, "
+        "price numeric(24, 10) NOT NULL, "
+        "PRIMARY KEY (asset_ticker, timestamp))",
+    ],
+    "composite_brin": [
+        "CREATE TABLE {t} ("
+        "asset_ticker varchar NOT NULL, "
+        "timestamp timestamptz NOT NULL, "
+        "price numeric(24, 10) NOT NULL, "
+        "PRIMARY KEY (asset_ticker, timestamp))",
+        "CREATE INDEX ON {t} USING brin (timestamp)",
+    ],
+}
+
+# Rows arrive one ticker at a time, as full-history backfills insert them.
+FILL = (
+    "INSERT INTO {t} (asset_ticker, timestamp, price) "
+    "SELECT 'T' || lpad(k::text, 5, '0'), "
+    "timestamp '2006-01-01' + make_interval(days => d), "
+    "round((100 + 10 * sin(d / 50.0 + k))::numeric, 10) "
+    "FROM generate_series(1, :tickers) AS k, "
+    "generate_series(0, :days - 1) AS d "
+    "ORDER BY k, d"
+)
+
+QUERIES = {
+    "one ticker, one year": (
+        "SELECT timestamp, price FROM {t} WHERE asset_ticker = :ticker "
+        "AND timestamp >= timestamp '2020-01-01' "
+        "AND timestamp < timestamp '2021-01-01' ORDER BY timestamp"
+    ),
+    "latest bar, 50 tickers": (
+        "SELECT asset_ticker, max(timestamp) FROM {t} "
+        "WHERE asset_ticker = ANY(:batch) GROUP BY asset_ticker"
+    ),
+    "all tickers, one month": (
+        "SELECT count(*) FROM {t} WHERE timestamp >= timestamp '2020-06-01' "
+        "AND timestamp < timestamp '2020-07-01'"
+    ),
+}
+
+
+def ticker(k: int) -> str:
+    return f"T{k:05d}"
+
+
+def build(connection, name: str, statements: list, tickers: int, days: int) -> float:
+    table = f"{SCHEMA}.{name}"
+    started = time.perf_counter()
+    for statement in statements:
+        connection.execute(text(statement.format(t=table)))
+    connection.execute(text(FILL.format(t=table)), {"tickers": tickers, "days": days})
+    if name != "surrogate":
+        connection.execute(text(f"CLUSTER {table} USING {name}_pkey"))
+    connection.execute(text(f"VACUUM ANALYZE {table}"))
+    return time.perf_counter() - started
+
+
+def sizes(connection, name: str) -> tuple[int, int]:
+    return connection.execute(
+        text(
+            "SELECT pg_table_size(CAST(:t AS regclass)), "
+            "pg_indexes_size(CAST(:t AS regclass))"
+        ),
+        {"t": f"{SCHEMA}.{name}"},
+    ).one()
+
+
+def time_query(connection, sql: str, params_list: list) -> float:
+    """Median run time (ms) of `sql` over `params_list`."""
+    timings = []
+    for params in params_list:
+        started = time.perf_counter()
+        connection.execute(text(sql), params).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    days = args.years * 365
+    rng = random.Random(0)
+    params = {
+        "one ticker, one year": [
+            {"ticker": ticker(rng.randint(1, args.tickers))} for _ in range(args.runs)
+        ],
+        "latest bar, 50 tickers": [
+            {"batch": [ticker(rng.randint(1, args.tickers)) for _ in range(50)]}
+            for _ in range(args.runs)
+        ],
+        "all tickers, one month": [{} for _ in range(max(1, args.runs // 10))],
+    }
+
+    engine = get_engine().execution_options(isolation_level="AUTOCOMMIT")
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        try:
+            print(
+                f"{args.tickers * days:,} rows ({args.tickers} tickers x {days} days)"
+            )
+            for name, statements in LAYOUTS.items():
+                elapsed = build(connection, name, statements, args.tickers, days)
+                table_size, index_size = sizes(connection, name)
+                print(
+                    f"\n{name}: built in {elapsed:.1f} s, "
+                    f"table {table_size / 2**20:,.0f} MiB, "
+                    f"indexes {index_size / 2**20:,.0f} MiB"
+                )
+                for label, sql in QUERIES.items():
+                    median = time_query(
+                        connection, sql.format(t=f"{SCHEMA}.{name}"), params[label]
+                    )
+                    print(f"  {label:>24}: {median:8.2f} ms (median)")
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,12 @@ if [ "${1:-}" = "migrate" ]; then
   exec python -m app.migrate
 fi
 
+# `entrypoint.sh worker` drains the sync job queue instead of serving the API.
+# See app/worker.py.
+if [ "${1:-}" = "worker" ]; then
+  exec python -m app.worker
+fi
+
 # Migrations are a deploy-time concern, not a boot-time one.
 #
 # They used to run on every container start, which put two extra interpreter
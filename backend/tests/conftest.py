@@ -6,6 +6,11 @@ import pytest
 from fastapi.testclient import TestClient
 
 from app import app
+from app.services.asset_index import asset_index
+from app.services.circuit_breaker import reset_breakers
+from app.services.providers import set_provider
+from app.services.quote_cache import quote_cache
+from app.services.search_cache import search_cache
 
 
 @pytest.fixture
@@ -18,3 +23,16 @@ def db_mock():
 def client():
     """FastAPI test client."""
     return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_market_data_caches():
+    """Quotes, searches, indexed assets and providers must not leak between tests."""
+    for cache in (quote_cache, search_cache, asset_index):
+        cache.clear()
+    reset_breakers()
+    yield
+    for cache in (quote_cache, search_cache, asset_index):
+        cache.clear()
+    reset_breakers()
+    set_provider(None)
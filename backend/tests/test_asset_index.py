@@ -0,0 +1,75 @@
+from app.models import AssetType
+from app.services.asset_index import AssetSearchIndex, is_strong_match
+
+ROWS = [
+    ("AAPL", "Apple Inc.", AssetType.STOCK),
+    ("APP", "AppLovin Corporation", "stock"),
+    ("BTC-USD", "Bitcoin USD", AssetType.CRYPTO),
+    ("ACA.PA", "Credit Agricole S.A.", AssetType.STOCK),
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_index():
+    index = AssetSearchIndex(ttl=60, clock=FakeClock())
+    index.load(ROWS)
+    return index
+
+
+def tickers(results):
+    return [r["ticker"] for r in results]
+
+
+def test_results_are_shaped_like_yahoo_search():
+    index = make_index()
+
+    assert index.search("btc") == [
+        {
+            "ticker": "BTC-USD",
+            "name": "Bitcoin USD",
+            "type": "CRYPTOCURRENCY",
+            "exchange": "UNKNOWN",
+        }
+    ]
+
+
+def test_ranking_prefers_exact_ticker_then_whole_words():
+    index = make_index()
+
+    assert tickers(index.search("app")) == ["APP", "AAPL"]
+    assert tickers(index.search("apple")) == ["AAPL"]
+    assert tickers(index.search("AAP")) == ["AAPL"]
+
+
+def test_multi_word_queries_match_every_word():
+    index = make_index()
+
+    assert tickers(index.search("credit agri")) == ["ACA.PA"]
+    assert tickers(index.search("bitcoin usd")) == ["BTC-USD"]
+    assert index.search("credit bitcoin") == []
+
+
+def test_add_and_reload():
+    index = make_index()
+    index.add("MC.PA", "LVMH", AssetType.STOCK)
+
+    assert tickers(index.search("lvmh")) == ["MC.PA"]
+    assert not index.is_stale()
+
+    index._clock.now += 61
+    assert index.is_stale()
+
+
+def test_is_strong_match():
+    apple = {"ticker": "AAPL", "name": "Apple Inc."}
+
+    assert is_strong_match("aapl", apple)
+    assert is_strong_match("Apple", apple)
+    assert not is_strong_match("app", apple)
@@ -46,3 +46,40 @@ def test_get_or_create_asset_creates_when_missing(monkeypatch):
     db.commit.assert_called()
     db.refresh.assert_called()
     assert new.ticker == "NEW" or hasattr(new, "ticker")
+
+
+def _search_db(local_rows, db_rows=()):
+    db = MagicMock()
+    db.query.return_value.all.return_value = local_rows
+    chain = db.query.return_value.filter.return_value.order_by.return_value
+    chain.limit.return_value.all.return_value = list(db_rows)
+    return db
+
+
+def test_search_assets_answers_known_assets_locally(monkeypatch):
+    upstream = MagicMock()
+    monkeypatch.setattr(
+        "app.services.asset_service.MarketDataService.search_assets", upstream
+    )
+    db = _search_db([("AAPL", "Apple Inc.", "stock")])
+
+    results = AssetService.search_assets(db, "aapl")
+
+    assert [r["ticker"] for r in results] == ["AAPL"]
+    upstream.assert_not_called()
+
+
+def test_search_assets_merges_upstream_when_local_is_insufficient(monkeypatch):
+    monkeypatch.setattr(
+        "app.services.asset_service.MarketDataService.search_assets",
+        lambda q: [
+            {"ticker": "AAPL", "name": "Apple Inc."},
+            {"ticker": "APP", "name": "AppLovin Corporation"},
+        ],
+    )
+    db = _search_db([("AAPL", "Apple Inc.", "stock")])
+
+    results = AssetService.search_assets(db, "app")
+
+    # Local match first, upstream duplicates dropped.
+    assert [r["ticker"] for r in results] == ["AAPL", "APP"]
@@ -198,7 +198,9 @@ class TestLogin:
         with patch("app.routers.auth.crud_user.get_user_by_email") as mock_get:
             with patch("app.core.security.verify_password") as mock_verify:
                 with patch("app.core.security.create_access_token") as mock_token:
-                    with patch("app.routers.auth.run_user_market_sync") as mock_sync:
+                    with patch(
+                        "app.routers.auth.schedule_user_market_sync"
+                    ) as mock_sync:
                         mock_user = MagicMock()
                         mock_user.id = "00000000-0000-0000-0000-000000000001"
                         mock_user.email = "user@example.com"
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from app.services.background import (
+    DELAY,
+    DELAYED,
+    DROPPED,
+    DUPLICATE,
+    QUEUED,
+    BoundedExecutor,
+)
+
+
+def blocking_executor(**kwargs):
+    """One-worker executor whose first job blocks until `release` is set."""
+    release = threading.Event()
+    started = threading.Event()
+    executor = BoundedExecutor("test", max_workers=1, **kwargs)
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    assert executor.submit("blocker", block) == QUEUED
+    assert started.wait(5)
+    return executor, release
+
+
+def test_jobs_are_deduplicated_per_key_and_dropped_when_full():
+    executor, release = blocking_executor(max_queue=2)
+    ran = []
+
+    assert executor.submit("alice", ran.append, "alice") == QUEUED
+    assert executor.submit("alice", ran.append, "alice-again") == DUPLICATE
+    assert executor.submit("bob", ran.append, "bob") == QUEUED
+    assert executor.submit("carol", ran.append, "carol") == DROPPED
+
+    stats = executor.stats()
+    assert (stats["queued"], stats["running"]) == (2, 1)
+    assert (stats["deduplicated"], stats["dropped"]) == (1, 1)
+
+    release.set()
+    executor._executor.shutdown(wait=True)
+    assert ran == ["alice", "bob"]
+    stats = executor.stats()
+    assert (stats["queued"], stats["running"], stats["completed"]) == (0, 0, 3)
+
+
+def test_delay_policy_resubmits_once_the_queue_has_room():
+    executor, release = blocking_executor(
+        max_queue=2, policy=DELAY, retry_delay=0.3, max_delayed=2
+    )
+    ran = []
+
+    assert executor.submit("alice", ran.append, "alice") == QUEUED
+    assert executor.submit("bob", ran.append, "bob") == QUEUED
+    assert executor.submit("carol", ran.append, "carol") == DELAYED
+    # Still waiting for its retry, so a second login is a duplicate.
+    assert executor.submit("carol", ran.append, "carol") == DUPLICATE
+    assert executor.submit("dave", ran.append, "dave") == DELAYED
+    # Past `max_delayed`, jobs are dropped rather than delayed.
+    assert executor.submit("eve", ran.append, "eve") == DROPPED
+    # All delays share one scheduler thread.
+    names = [thread.name for thread in threading.enumerate()]
+    assert names.count("test-delays") == 1
+    assert executor.stats()["delayed_pending"] == 2
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(ran) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert ran == ["alice", "bob", "carol", "dave"]
+    stats = executor.stats()
+    assert (stats["delayed"], stats["dropped"], stats["delayed_pending"]) == (2, 1, 0)
+
+
+def test_failures_are_counted_and_unknown_policy_rejected():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+
+    def boom():
+        raise RuntimeError("boom")
+
+    executor.submit("k", boom)
+    executor._executor.shutdown(wait=True)
+    assert executor.stats()["failed"] == 1
+
+    with pytest.raises(ValueError):
+        BoundedExecutor("test", max_workers=1, max_queue=1, policy="wait")
@@ -0,0 +1,97 @@
+import pytest
+
+from app.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    breaker_stats,
+    get_breaker,
+)
+from app.services.deadline import Deadline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail():
+    raise TimeoutError("upstream timed out")
+
+
+def make_breaker():
+    clock = FakeClock()
+    return CircuitBreaker("quote", failure_threshold=2, reset_seconds=30, clock=clock)
+
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = make_breaker()
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            breaker.call(_fail)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "never called")
+    assert breaker.stats() == {
+        "state": OPEN,
+        "consecutive_failures": 2,
+        "trips": 1,
+        "rejected": 1,
+    }
+
+
+def test_success_resets_the_failure_count():
+    breaker = make_breaker()
+
+    with pytest.raises(TimeoutError):
+        breaker.call(_fail)
+    assert breaker.call(lambda: 1) == 1
+    with pytest.raises(TimeoutError):
+        breaker.call(_fail)
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = make_breaker()
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            breaker.call(_fail)
+
+    breaker._clock.now += 30
+    assert breaker.state == HALF_OPEN
+
+    # A failed probe reopens the breaker straight away.
+    with pytest.raises(TimeoutError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+    assert breaker.stats()["trips"] == 2
+
+    breaker._clock.now += 30
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_registry_returns_one_breaker_per_operation():
+    assert get_breaker("history") is get_breaker("history")
+    assert get_breaker("history") is not get_breaker("quote")
+    assert set(breaker_stats()) == {"history", "quote"}
+
+
+def test_deadline_remaining_never_negative():
+    clock = FakeClock()
+    deadline = Deadline(2, clock=clock)
+
+    assert deadline.remaining() == 2
+    assert not deadline.expired
+
+    clock.now += 5
+    assert deadline.remaining() == 0
+    assert deadline.expired
@@ -52,3 +52,12 @@ def test_ready_failure(client):
         assert response.json()["detail"] == "Service not ready"
     finally:
         app.dependency_overrides.pop(get_db, None)
+
+
+def test_metrics_exposes_market_data_counters(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["quote_cache"]) >= {"hits", "misses", "stale", "size"}
+    assert set(data["singleflight"]) >= {"issued", "coalesced"}
+    assert set(data["login_sync"]) >= {"queued", "running", "dropped"}
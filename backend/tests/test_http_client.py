@@ -0,0 +1,34 @@
+from unittest.mock import MagicMock
+
+from app.services import http_client
+
+
+def test_session_is_pooled_with_retries(monkeypatch):
+    monkeypatch.setattr(http_client, "_session", None)
+
+    session = http_client.get_http_session()
+
+    assert http_client.get_http_session() is session
+    adapter = session.get_adapter("https://query2.finance.yahoo.com")
+    assert adapter._pool_maxsize == http_client.HTTP_POOL_MAXSIZE
+    retry = adapter.max_retries
+    assert retry.total == http_client.HTTP_MAX_RETRIES
+    assert set(retry.status_forcelist) == {429, 500, 502, 503, 504}
+    assert retry.backoff_jitter == http_client.HTTP_BACKOFF_JITTER
+    assert "Mozilla" in session.headers["User-Agent"]
+
+
+def test_http_get_applies_default_timeouts(monkeypatch):
+    session = MagicMock()
+    monkeypatch.setattr(http_client, "_session", session)
+
+    http_client.http_get("https://example.test", params={"q": "a"})
+    http_client.http_get("https://example.test", timeout=1)
+
+    first, second = session.get.call_args_list
+    assert first.kwargs["timeout"] == (
+        http_client.HTTP_CONNECT_TIMEOUT_SECONDS,
+        http_client.HTTP_READ_TIMEOUT_SECONDS,
+    )
+    assert first.kwargs["params"] == {"q": "a"}
+    assert second.kwargs["timeout"] == 1
@@ -0,0 +1,125 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import login_sync
+from app.services.login_sync import run_user_market_sync
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeLockConnection:
+    """Connection whose try-locks fail for the tickers in `held`."""
+
+    def __init__(self, held=()):
+        self.held = set(held)
+        self.statements = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt, params=None):
+        self.statements.append(str(stmt))
+        result = MagicMock()
+        result.scalar.return_value = (params or {}).get("ticker") not in self.held
+        return result
+
+    def commit(self):
+        pass
+
+
+def patch_sync(monkeypatch, db, connection, fresh=(), failing=()):
+    calls = {}
+    marked = []
+
+    def fake_stale(db, tickers, now=None):
+        return [t for t in tickers if t not in fresh]
+
+    def fake_prices(db, tickers, period, on_progress):
+        calls["prices"] = list(tickers)
+        for ticker in tickers:
+            status = "failed" if ticker in failing else "ok"
+            on_progress(ticker, {"status": status, "inserted": 1})
+        return {"inserted": len(tickers)}
+
+    def fake_dividends(db, tickers, on_progress):
+        calls["dividends"] = list(tickers)
+        return 0
+
+    monkeypatch.setattr(login_sync, "get_session_factory", lambda: lambda: db)
+    monkeypatch.setattr(
+        login_sync,
+        "get_engine",
+        lambda: MagicMock(**{"connect.return_value": connection}),
+    )
+    monkeypatch.setattr(login_sync, "stale_sync_tickers", fake_stale)
+    monkeypatch.setattr(
+        login_sync, "mark_synced", lambda db, tickers: marked.extend(tickers)
+    )
+    monkeypatch.setattr(
+        login_sync.MarketSyncService, "sync_price_histories_report", fake_prices
+    )
+    monkeypatch.setattr(
+        login_sync.MarketSyncService, "sync_dividends_for_tickers", fake_dividends
+    )
+    return calls, marked
+
+
+def user_db(*tickers):
+    db = MagicMock()
+    query = db.query.return_value.join.return_value.filter.return_value
+    query.distinct.return_value.all.return_value = [(t,) for t in tickers]
+    return db
+
+
+def test_login_sync_skips_fresh_and_locked_tickers(monkeypatch):
+    db = user_db("aaa", "BBB", "CCC", "DDD")
+    connection = FakeLockConnection(held={"CCC"})
+    calls, marked = patch_sync(
+        monkeypatch, db, connection, fresh={"BBB"}, failing={"DDD"}
+    )
+
+    result = run_user_market_sync(uuid4())
+
+    assert calls == {"prices": ["AAA", "DDD"], "dividends": ["AAA", "DDD"]}
+    # DDD failed, so it stays stale for the next login.
+    assert marked == ["AAA"]
+    assert result == {"tickers": 4, "skipped": 2, "prices": 2, "dividends": 0}
+    assert connection.statements[-1] == "SELECT pg_advisory_unlock_all()"
+    assert db.close.called
+
+
+def test_login_sync_does_nothing_when_every_ticker_is_fresh(monkeypatch):
+    db = user_db("AAA")
+    calls, marked = patch_sync(monkeypatch, db, FakeLockConnection(), fresh={"AAA"})
+
+    result = run_user_market_sync(uuid4())
+
+    assert calls == {}
+    assert marked == []
+    assert result["skipped"] == 1
+
+
+def test_stale_sync_tickers_keeps_order_and_drops_fresh(monkeypatch):
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [("BBB",)]
+
+    assert login_sync.stale_sync_tickers(db, ["CCC", "BBB", "AAA"], now=NOW) == [
+        "CCC",
+        "AAA",
+    ]
+
+
+def test_mark_synced_upserts_last_synced_at():
+    db = MagicMock()
+
+    login_sync.mark_synced(db, ["AAA", "BBB"], now=NOW)
+
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (ticker) DO UPDATE" in sql
+    assert db.commit.called
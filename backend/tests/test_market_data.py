@@ -1,4 +1,17 @@
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+import requests
+
+from app.services import market_data
+from app.services.circuit_breaker import get_breaker
+from app.services.deadline import Deadline
 from app.services.market_data import MarketDataService
+from app.services.providers import yahoo_quotes, yfinance_provider
+from app.services.quote_cache import quote_cache
 
 
 class DummyTicker:
@@ -12,56 +25,280 @@ class DummyTicker:
 
 
 class DummyResponse:
-    def __init__(self, data):
+    def __init__(self, data, status_code=200):
         self._data = data
+        self.status_code = status_code
 
     def raise_for_status(self):
-        return None
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
 
     def json(self):
         return self._data
 
 
+def spark_response(prices):
+    """Spark payload with one result per (ticker, price); None has no close."""
+    return DummyResponse(
+        {
+            "spark": {
+                "result": [
+                    {
+                        "symbol": ticker,
+                        "response": [
+                            {"meta": {}, "indicators": {"quote": [{"close": [price]}]}}
+                        ],
+                    }
+                    for ticker, price in prices.items()
+                ]
+            }
+        }
+    )
+
+
 def test_get_asset_info_success(monkeypatch):
-    info = {
+    meta = {
         "longName": "Test Corp",
         "currency": "EUR",
-        "quoteType": "EQUITY",
-        "currentPrice": 12.34,
+        "instrumentType": "EQUITY",
+        "regularMarketPrice": 12.34,
     }
+    urls = []
 
-    monkeypatch.setattr(
-        "app.services.market_data.yf.Ticker", lambda ticker: DummyTicker(info=info)
-    )
+    def fake_get(url, params=None):
+        urls.append(url)
+        return DummyResponse({"chart": {"result": [{"meta": meta}]}})
+
+    monkeypatch.setattr(yahoo_quotes, "http_get", fake_get)
 
     res = MarketDataService.get_asset_info("TEST")
+    assert urls == [yahoo_quotes.CHART_URL.format(ticker="TEST")]
     assert res["name"] == "Test Corp"
     assert res["currency"] == "EUR"
     assert res["type"] == "stock"
     assert res["price"] == 12.34
 
 
+def test_get_asset_info_unknown_ticker(monkeypatch):
+    monkeypatch.setattr(
+        yahoo_quotes,
+        "http_get",
+        lambda url, params=None: DummyResponse({"chart": {"result": None}}, 404),
+    )
+
+    assert MarketDataService.get_asset_info("NOPE") is None
+    assert get_breaker("asset_info").stats()["consecutive_failures"] == 0
+
+
+def test_get_current_price_falls_back_to_last_close(monkeypatch):
+    chart = {
+        "meta": {},
+        "indicators": {"quote": [{"close": [10.0, 11.0, None]}]},
+    }
+    monkeypatch.setattr(
+        yahoo_quotes,
+        "http_get",
+        lambda url, params=None: DummyResponse({"chart": {"result": [chart]}}),
+    )
+
+    assert MarketDataService.get_current_price("AAA") == 11.0
+
+
 def test_search_assets_success(monkeypatch):
     data = {
         "quotes": [{"symbol": "ABC", "shortname": "ABC Corp", "quoteType": "EQUITY"}]
     }
 
-    def fake_get(url, headers=None):
+    calls = []
+
+    def fake_get(url, params=None):
+        calls.append((url, params))
         return DummyResponse(data)
 
-    monkeypatch.setattr("app.services.market_data.requests.get", fake_get)
+    monkeypatch.setattr(yfinance_provider, "http_get", fake_get)
 
     results = MarketDataService.search_assets("ABC")
     assert isinstance(results, list)
     assert results and results[0]["ticker"] == "ABC"
+    # The query is passed as a parameter so requests URL-encodes it.
+    assert calls[0][0] == yfinance_provider.SEARCH_URL
+    assert calls[0][1]["q"] == "ABC"
+
+
+def test_search_assets_reuses_complete_prefix_results(monkeypatch):
+    data = {
+        "quotes": [
+            {"symbol": "AAPL", "shortname": "Apple Inc."},
+            {"symbol": "APP", "shortname": "AppLovin Corporation"},
+        ]
+    }
+    calls = []
+
+    def fake_get(url, params=None):
+        calls.append(params["q"])
+        return DummyResponse(data)
+
+    monkeypatch.setattr(yfinance_provider, "http_get", fake_get)
+
+    MarketDataService.search_assets("app")
+    again = MarketDataService.search_assets(" APP ")
+    longer = MarketDataService.search_assets("apple")
+
+    assert [r["ticker"] for r in again] == ["AAPL", "APP"]
+    assert [r["ticker"] for r in longer] == ["AAPL"]
+    assert calls == ["app"]
+
+
+def test_search_assets_does_not_filter_truncated_results(monkeypatch):
+    monkeypatch.setattr(market_data, "SEARCH_RESULT_LIMIT", 1)
+    calls = []
+
+    def fake_get(url, params=None):
+        calls.append(params["q"])
+        return DummyResponse(
+            {"quotes": [{"symbol": "AAPL", "shortname": "Apple Inc."}]}
+        )
+
+    monkeypatch.setattr(yfinance_provider, "http_get", fake_get)
+
+    MarketDataService.search_assets("app")
+    MarketDataService.search_assets("apple")
+
+    assert calls == ["app", "apple"]
 
 
 def test_get_dividends_history(monkeypatch):
-    # Simulate dividends attribute (could be any object, service just returns it)
-    div = {"2020-01-01": 0.5}
+    div = pd.Series([0.5], index=pd.DatetimeIndex(["2020-01-01"]))
     monkeypatch.setattr(
         "app.services.market_data.yf.Ticker", lambda t: DummyTicker(dividends=div)
     )
 
     out = MarketDataService.get_dividends_history("TST")
-    assert out == div
+    assert out == [(date(2020, 1, 1), 0.5)]
+
+
+def test_get_current_prices_batches_tickers(monkeypatch):
+    calls = []
+
+    def fake_get(url, params=None):
+        tickers = params["symbols"].split(",")
+        calls.append(tickers)
+        # The last ticker of each batch has no quote.
+        prices = {t: float(i + 1) for i, t in enumerate(tickers)}
+        prices[tickers[-1]] = None
+        return spark_response(prices)
+
+    def no_yfinance():
+        raise AssertionError("quotes must not load yfinance")
+
+    monkeypatch.setattr(yahoo_quotes, "http_get", fake_get)
+    monkeypatch.setattr(yfinance_provider, "load_yfinance", no_yfinance)
+    monkeypatch.setattr(market_data, "QUOTE_BATCH_SIZE", 3)
+    monkeypatch.setattr(yahoo_quotes, "SPARK_BATCH_SIZE", 2)
+
+    prices = MarketDataService.get_current_prices(["AAA", "BBB", "CCC", "DDD", "AAA"])
+
+    # Service batches of 3, each split into spark requests of at most 2.
+    assert calls == [["AAA", "BBB"], ["CCC"], ["DDD"]]
+    assert prices == {"AAA": 1.0, "BBB": None, "CCC": None, "DDD": None}
+
+
+def test_get_current_prices_serves_cached_quotes(monkeypatch):
+    calls = []
+
+    def fake_fetch(tickers):
+        calls.append(list(tickers))
+        return {ticker: 10.0 for ticker in tickers}
+
+    monkeypatch.setattr(MarketDataService, "_fetch_current_prices", fake_fetch)
+
+    first = MarketDataService.get_current_prices(["AAA", "BBB"])
+    second = MarketDataService.get_current_prices(["AAA", "BBB", "CCC"])
+
+    assert first == {"AAA": 10.0, "BBB": 10.0}
+    assert second == {"AAA": 10.0, "BBB": 10.0, "CCC": 10.0}
+    # Only the ticker missing from the cache reached upstream the second time.
+    assert calls == [["AAA", "BBB"], ["CCC"]]
+
+    third = MarketDataService.get_current_prices(["AAA", "CCC"], use_cache=False)
+
+    assert third == {"AAA": 10.0, "CCC": 10.0}
+    assert calls[-1] == ["AAA", "CCC"]
+
+
+def test_get_current_prices_stops_waiting_at_the_deadline(monkeypatch):
+    release = threading.Event()
+
+    def slow_fetch(tickers):
+        release.wait(timeout=5)
+        return {ticker: 10.0 for ticker in tickers}
+
+    monkeypatch.setattr(MarketDataService, "_fetch_current_prices", slow_fetch)
+
+    prices = MarketDataService.get_current_prices(["AAA"], deadline=Deadline(0.05))
+    assert prices == {"AAA": None}
+
+    # The fetch outlives the request and still fills the cache.
+    release.set()
+    for _ in range(100):
+        if quote_cache.get("AAA")[0] == 10.0:
+            break
+        time.sleep(0.01)
+    assert MarketDataService.get_current_prices(["AAA"]) == {"AAA": 10.0}
+
+
+@pytest.mark.parametrize("status_code", [503, 429, 403, 401])
+def test_open_quote_breaker_skips_upstream(monkeypatch, status_code):
+    downloads = []
+
+    def failing_get(url, params=None):
+        downloads.append(params["symbols"])
+        return DummyResponse({}, status_code)
+
+    monkeypatch.setattr(yahoo_quotes, "http_get", failing_get)
+    breaker = get_breaker("quote")
+
+    for _ in range(breaker.failure_threshold + 2):
+        assert MarketDataService.get_current_prices(["AAA"]) == {"AAA": None}
+
+    assert len(downloads) == breaker.failure_threshold
+    assert breaker.stats()["trips"] == 1
+
+
+def test_unknown_tickers_do_not_trip_the_quote_breaker(monkeypatch):
+    downloads = []
+
+    def unknown_get(url, params=None):
+        downloads.append(params["symbols"])
+        # A delisted ticker: a 404, or a result without any price.
+        if len(downloads) % 2:
+            return DummyResponse({"spark": {"result": None}}, 404)
+        return spark_response({"GONE": None})
+
+    monkeypatch.setattr(yahoo_quotes, "http_get", unknown_get)
+    breaker = get_breaker("quote")
+
+    for _ in range(breaker.failure_threshold + 2):
+        assert MarketDataService.get_current_prices(["GONE"]) == {"GONE": None}
+
+    assert len(downloads) == breaker.failure_threshold + 2
+    assert breaker.stats()["consecutive_failures"] == 0
+    assert breaker.stats()["trips"] == 0
+
+
+def test_get_current_prices_reports_when_prices_were_fetched(monkeypatch):
+    monkeypatch.setattr(
+        MarketDataService, "_fetch_current_prices", lambda t: {"NEW": 2.0}
+    )
+    quote_cache.set("OLD", 1.0)
+    clock = quote_cache._clock
+    monkeypatch.setattr(quote_cache, "_clock", lambda: clock() + 120)
+    fetched_at = {}
+
+    before = datetime.now(timezone.utc)
+    prices = MarketDataService.get_current_prices(["OLD", "NEW"], fetched_at=fetched_at)
+
+    assert prices == {"OLD": 1.0, "NEW": 2.0}
+    # The cached price is as old as its cache entry, not the request.
+    assert before - fetched_at["OLD"] >= timedelta(seconds=119)
+    assert fetched_at["NEW"] >= before
@@ -1,43 +1,29 @@
-from datetime import datetime
+from datetime import date, datetime, timezone
 from unittest.mock import MagicMock
 
-from app.services.market_sync import MarketSyncService
-
-
-class DummySeries(dict):
-    @property
-    def empty(self):
-        return not bool(self)
-
-    def items(self):
-        return super().items()
+import pandas as pd
+from sqlalchemy.dialects import postgresql
 
-
-class DummyHist:
-    def __init__(self, rows):
-        self._rows = rows
-        self.empty = not bool(rows)
-
-    def iterrows(self):
-        for k, v in self._rows.items():
-            yield k, v
+from app.services import market_sync
+from app.services.market_sync import MarketSyncService
+from app.services.providers import set_provider
 
 
 class DummyTicker:
     def __init__(self, history=None, dividends=None):
-        self._history = history or DummyHist({})
-        self.dividends = dividends or DummySeries()
+        self._history = history if history is not None else pd.DataFrame()
+        self.dividends = dividends if dividends is not None else pd.Series()
 
     def history(self, period="1mo"):
         return self._history
 
 
-class SimpleDate:
-    def __init__(self, year, month, day):
-        self._dt = datetime(year, month, day)
-
-    def to_pydatetime(self):
-        return self._dt
+def daily(values, column=None):
+    """Date-indexed Series (or one-column frame) starting 2020-01-01."""
+    series = pd.Series(
+        values, index=pd.date_range("2020-01-01", periods=len(values), tz="UTC")
+    )
+    return series.to_frame(column) if column else series
 
 
 def test_sync_all_price_histories_inserts_and_commits(monkeypatch):
@@ -47,18 +33,16 @@ def test_sync_all_price_histories_inserts_and_commits(monkeypatch):
     fake_asset = MagicMock()
     fake_asset.ticker = "TST"
     db.query.return_value.all.return_value = [fake_asset]
+    db.execute.return_value.rowcount = 1
 
     # Monkeypatch yf.Ticker to return history with a proper date object
     monkeypatch.setattr(
         "app.services.market_sync.yf.Ticker",
-        lambda t: DummyTicker(
-            history=DummyHist({SimpleDate(2020, 1, 1): {"Close": 10.0}})
-        ),
+        lambda t: DummyTicker(history=daily([10.0], "Close")),
     )
 
     added = MarketSyncService.sync_all_price_histories(db, period="1mo")
-    # db.add should be called at least once and commit executed
-    assert added >= 0
+    assert added == 1
     assert db.commit.called
 
 
@@ -68,45 +52,225 @@ def test_sync_dividends_inserts_and_commits(monkeypatch):
     fake_asset.ticker = "TST"
     fake_asset.currency_code = "USD"
     db.query.return_value.all.return_value = [fake_asset]
+    # Known assets, then stored (ticker, ex-date) pairs.
+    db.query.return_value.filter.return_value.all.side_effect = [[("TST", "USD")], []]
+    db.execute.return_value.rowcount = 1
 
-    # dividends series with one entry where key has to_pydatetime()
-    dividends = DummySeries({SimpleDate(2020, 1, 1): 0.5})
+    dividends = daily([0.5])
     monkeypatch.setattr(
         "app.services.market_sync.yf.Ticker", lambda t: DummyTicker(dividends=dividends)
     )
 
     added = MarketSyncService.sync_dividends(db)
-    assert added >= 0
+    assert added == 1
     assert db.commit.called
 
 
 def test_sync_price_histories_for_tickers(monkeypatch):
     db = MagicMock()
+    db.execute.return_value.rowcount = 1
     monkeypatch.setattr(
         "app.services.market_sync.yf.Ticker",
-        lambda t: DummyTicker(
-            history=DummyHist({SimpleDate(2020, 1, 1): {"Close": 10.0}})
-        ),
+        lambda t: DummyTicker(history=daily([10.0], "Close")),
     )
 
     added = MarketSyncService.sync_price_histories_for_tickers(
         db, tickers=["TST", "TST"], period="1mo"
     )
-    assert added >= 0
+    assert added == 1
     assert db.commit.called
 
 
-def test_sync_dividends_for_tickers(monkeypatch):
+def test_sync_price_histories_fetches_from_watermarks():
+    today = datetime.now(timezone.utc)
     db = MagicMock()
-    fake_asset = MagicMock()
-    fake_asset.currency_code = "USD"
-    db.query.return_value.filter.return_value.first.return_value = fake_asset
+    db.query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+        ("CUR", today),
+        ("OLD", datetime(2020, 1, 6, tzinfo=timezone.utc)),
+    ]
+    db.execute.return_value.rowcount = 1
+    fetched = []
 
-    dividends = DummySeries({SimpleDate(2020, 1, 1): 0.5})
-    monkeypatch.setattr(
-        "app.services.market_sync.yf.Ticker", lambda t: DummyTicker(dividends=dividends)
+    class Provider:
+        def get_history(self, ticker, period, start=None):
+            fetched.append((ticker, period, start))
+            return [(today, 10.0)]
+
+    set_provider(Provider())
+
+    added = MarketSyncService.sync_price_histories_for_tickers(
+        db, tickers=["CUR", "OLD", "NEW"], period="1mo"
+    )
+
+    # CUR already has today's bar; NEW has no history and gets the full period.
+    assert fetched == [("OLD", "1mo", date(2020, 1, 6)), ("NEW", "1mo", None)]
+    assert added == 2
+
+    fetched.clear()
+    MarketSyncService.sync_price_histories_for_tickers(
+        db, tickers=["CUR"], period="max", full=True
+    )
+    assert fetched == [("CUR", "max", None)]
+
+
+def test_insert_price_rows_batches_on_conflict_do_nothing(monkeypatch):
+    monkeypatch.setattr(market_sync, "PRICE_HISTORY_INSERT_BATCH", 2)
+    db = MagicMock()
+    # The second batch hits one bar already stored.
+    db.execute.side_effect = [MagicMock(rowcount=2), MagicMock(rowcount=0)]
+    rows = [(datetime(2020, 1, day), 10.0 + day) for day in (1, 2, 3)]
+
+    added = MarketSyncService._insert_price_rows(db, "TST", rows)
+
+    assert added == 2
+    assert db.execute.call_count == 2
+    sql = str(
+        db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect())
+    )
+    assert "ON CONFLICT (asset_ticker, timestamp) DO NOTHING" in sql
+
+
+def test_sync_dividends_for_tickers_inserts_only_new_events(monkeypatch):
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.side_effect = [
+        [("TST", "USD")],
+        [("TST", date(2020, 1, 1))],
+    ]
+    db.execute.return_value.rowcount = 1
+    fetched = []
+
+    def fake_ticker(ticker):
+        fetched.append(ticker)
+        return DummyTicker(dividends=daily([0.5, 0.7]))
+
+    monkeypatch.setattr("app.services.market_sync.yf.Ticker", fake_ticker)
+
+    added = MarketSyncService.sync_dividends_for_tickers(
+        db, tickers=["TST", "TST", "UNKNOWN"]
     )
 
-    added = MarketSyncService.sync_dividends_for_tickers(db, tickers=["TST", "TST"])
-    assert added >= 0
+    assert added == 1
+    # Unknown assets are not fetched, duplicates only once.
+    assert fetched == ["TST"]
+    # Two lookups in all, whatever the number of tickers and dividends.
+    assert db.query.call_count == 2
+    stmt = db.execute.call_args.args[0]
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert params["ex_date_m0"] == date(2020, 1, 2)
+    assert "ex_date_m1" not in params
     assert db.commit.called
+
+
+def test_failed_dividend_write_reports_tickers_failed(monkeypatch):
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.side_effect = [
+        [("AAA", "USD"), ("BBB", "USD")],
+        [],
+    ]
+    db.execute.side_effect = RuntimeError("connection lost")
+    monkeypatch.setattr(
+        "app.services.market_sync.yf.Ticker",
+        lambda t: DummyTicker(dividends=daily([0.5])),
+    )
+    progress = []
+
+    added = MarketSyncService.sync_dividends_for_tickers(
+        db, ["AAA", "BBB"], on_progress=lambda t, r: progress.append((t, r))
+    )
+
+    assert added == 0
+    assert db.rollback.called
+    # Nothing was reported "ok" ahead of the failed write.
+    assert [(t, r["status"], r["inserted"]) for t, r in progress] == [
+        ("AAA", "failed", 0),
+        ("BBB", "failed", 0),
+    ]
+    assert progress[0][1]["error"] == "connection lost"
+
+
+def test_parallel_sync_reports_each_ticker(monkeypatch):
+    monkeypatch.setattr(market_sync, "SYNC_COMMIT_TICKERS", 2)
+    db = MagicMock()
+    db.query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+        ("CUR", datetime.now(timezone.utc))
+    ]
+    db.execute.return_value.rowcount = 3
+
+    class Provider:
+        def get_history(self, ticker, period, start=None):
+            if ticker == "BAD":
+                raise LookupError("no such ticker")
+            if ticker == "EMPTY":
+                return []
+            return [(datetime(2020, 1, 1, tzinfo=timezone.utc), 10.0)]
+
+    set_provider(Provider())
+
+    report = MarketSyncService.sync_price_histories_report(
+        db, ["AAA", "BAD", "CUR", "EMPTY", "BBB", "CCC"], concurrency=4
+    )
+
+    assert report["inserted"] == 9
+    assert report["failed"] == 1
+    assert {t: r["status"] for t, r in report["tickers"].items()} == {
+        "AAA": "ok",
+        "BAD": "failed",
+        "CUR": "up_to_date",
+        "EMPTY": "no_data",
+        "BBB": "ok",
+        "CCC": "ok",
+    }
+    assert report["tickers"]["BAD"]["error"] == "no such ticker"
+    # Three written tickers, two per commit.
+    assert db.commit.call_count == 2
+
+
+def test_failed_commit_marks_its_tickers_failed():
+    db = MagicMock()
+    db.execute.return_value.rowcount = 1
+    db.commit.side_effect = RuntimeError("connection lost")
+
+    class Provider:
+        def get_history(self, ticker, period, start=None):
+            return [(datetime(2020, 1, 1, tzinfo=timezone.utc), 10.0)]
+
+    set_provider(Provider())
+
+    report = MarketSyncService.sync_price_histories_report(db, ["AAA"])
+
+    assert report["inserted"] == 0
+    assert report["tickers"]["AAA"]["status"] == "failed"
+    assert db.rollback.called
+
+
+def read_chunks(stream, size=7):
+    """Read `stream` to the end in small chunks, as psycopg2's COPY does."""
+    chunks = []
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            return "".join(chunks)
+        assert len(chunk) <= size
+        chunks.append(chunk)
+
+
+def test_large_histories_are_copied_through_staging(monkeypatch):
+    monkeypatch.setattr(market_sync, "PRICE_HISTORY_COPY_THRESHOLD", 3)
+    monkeypatch.setattr(market_sync, "PRICE_HISTORY_COPY_BATCH", 2)
+    db = MagicMock()
+    cursor = db.connection.return_value.connection.cursor.return_value.__enter__()
+    cursor.rowcount = 2
+    copied = []
+    cursor.copy_expert.side_effect = lambda sql, f: copied.append(read_chunks(f))
+    rows = [(datetime(2020, 1, day, tzinfo=timezone.utc), 10.5) for day in (1, 2, 3)]
+
+    added = MarketSyncService._insert_price_rows(db, "TST", rows)
+
+    assert added == 4
+    assert not db.execute.called
+    assert copied == [
+        '"TST",10.5,2020-01-01T00:00:00+00:00\n"TST",10.5,2020-01-02T00:00:00+00:00\n',
+        '"TST",10.5,2020-01-03T00:00:00+00:00\n',
+    ]
+    statements = [c.args[0] for c in cursor.execute.call_args_list]
+    assert sum("ON CONFLICT" in sql for sql in statements) == 2
@@ -35,6 +35,7 @@ def patched(monkeypatch):
     seed = MagicMock()
     monkeypatch.setattr(migrate.command, "upgrade", upgrade)
     monkeypatch.setattr(migrate, "seed_currencies", seed)
+    monkeypatch.setattr(migrate, "maintain_price_history_partitions", MagicMock())
     monkeypatch.setenv("DATABASE_URL", "postgresql://u:p@localhost/db")
     return upgrade, seed
 
@@ -112,6 +113,11 @@ def test_lock_is_acquired_before_upgrade_and_released_after_seed(monkeypatch, pa
     connection.execute.side_effect = lambda stmt, *a, **kw: order.append(str(stmt))
     upgrade.side_effect = lambda *a, **kw: order.append("upgrade")
     seed.side_effect = lambda *a, **kw: order.append("seed")
+    monkeypatch.setattr(
+        migrate,
+        "maintain_price_history_partitions",
+        lambda conn: order.append("partitions"),
+    )
 
     migrate.run_migrations()
 
@@ -119,6 +125,7 @@ def test_lock_is_acquired_before_upgrade_and_released_after_seed(monkeypatch, pa
         "SELECT pg_advisory_lock(:lock_id)",
         "upgrade",
         "seed",
+        "partitions",
         "SELECT pg_advisory_unlock(:lock_id)",
     ]
 
@@ -165,3 +172,33 @@ def test_main_returns_one_on_failure(monkeypatch):
 
     # Non-zero exit is what fails the deploy step in CI.
     assert migrate.main() == 1
+
+
+def test_partition_maintenance_runs_under_the_migration_lock(monkeypatch):
+    engine, connection = _engine_mock("postgresql")
+    connection.execute.return_value.scalar.return_value = True
+    maintain = MagicMock()
+    monkeypatch.setattr(migrate, "get_engine", lambda: engine)
+    monkeypatch.setattr(migrate, "maintain_price_history_partitions", maintain)
+
+    assert migrate.maintain_partitions() is True
+
+    maintain.assert_called_once_with(connection)
+    assert _executed_sql(connection) == [
+        "SELECT pg_try_advisory_lock(:lock_id)",
+        "SELECT pg_advisory_unlock(:lock_id)",
+    ]
+
+
+def test_partition_maintenance_skipped_while_the_lock_is_held(monkeypatch):
+    engine, connection = _engine_mock("postgresql")
+    connection.execute.return_value.scalar.return_value = False
+    maintain = MagicMock()
+    monkeypatch.setattr(migrate, "get_engine", lambda: engine)
+    monkeypatch.setattr(migrate, "maintain_price_history_partitions", maintain)
+
+    # A deploy is migrating: the worker must not wait for it, nor unlock.
+    assert migrate.maintain_partitions() is False
+
+    maintain.assert_not_called()
+    assert _executed_sql(connection) == ["SELECT pg_try_advisory_lock(:lock_id)"]
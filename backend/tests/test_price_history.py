@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
+from app.models import PriceHistory
+from app.services.price_history import (
+    PriceHistoryService,
+    encode_columnar,
+    lttb,
+    negotiate_encoding,
+)
+
+T0 = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def series(prices):
+    return [(T0 + timedelta(days=i), Decimal(str(p))) for i, p in enumerate(prices)]
+
+
+def rows(ticker, prices):
+    return [(ticker, timestamp, price) for timestamp, price in series(prices)]
+
+
+class RecordingQuery(Query):
+    def all(self):
+        self.session.statements.append(self)
+        return self.session.rows
+
+    def one(self):
+        self.session.statements.append(self)
+        return self.session.bounds
+
+
+class FakeSession:
+    """Builds real queries, records them and returns canned rows."""
+
+    def __init__(self, rows=(), bounds=(None, None)):
+        self.rows = list(rows)
+        self.bounds = bounds
+        self.statements = []
+
+    def query(self, *entities):
+        return RecordingQuery(entities, session=self)
+
+    def sql(self, index=-1):
+        statement = self.statements[index].statement
+        return str(
+            statement.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    prices = [10] * 100
+    prices[37] = 50
+    prices[71] = 1
+    points = series(prices)
+
+    sampled = lttb(points, 10)
+
+    assert len(sampled) == 10
+    assert sampled[0] == points[0] and sampled[-1] == points[-1]
+    assert points[37] in sampled and points[71] in sampled
+    assert sampled == sorted(sampled)
+
+
+def test_lttb_returns_small_inputs_unchanged():
+    points = series([1, 2, 3])
+    assert lttb(points, 10) == points
+    assert lttb(points, 2) == [points[0], points[-1]]
+
+
+def test_raw_history_is_range_bounded_and_ordered():
+    db = FakeSession(rows=rows("TST", [1, 2]))
+
+    points = PriceHistoryService.get_history(
+        db, "TST", start=datetime(2020, 1, 1), end=datetime(2020, 2, 1)
+    )
+
+    assert points == series([1, 2])
+    sql = db.sql()
+    assert "price_history.timestamp >= '2020-01-01 00:00:00+00:00'" in sql
+    assert "price_history.timestamp <= '2020-02-01 00:00:00+00:00'" in sql
+    assert "ORDER BY price_history.asset_ticker, price_history.timestamp ASC" in sql
+
+
+def test_resolution_keeps_last_bar_of_each_bucket_in_sql():
+    db = FakeSession()
+
+    PriceHistoryService.get_history(db, "TST", resolution="week")
+
+    sql = db.sql()
+    # Truncated in UTC, not the session time zone.
+    assert (
+        "row_number() OVER (PARTITION BY price_history.asset_ticker, "
+        "date_trunc('week', price_history.timestamp, 'UTC') "
+        "ORDER BY price_history.timestamp DESC)"
+    ) in sql
+    assert "WHERE anon_1.rank = 1" in sql
+
+
+def test_bucket_downsample_uses_equal_width_buckets_over_the_stored_range():
+    db = FakeSession(bounds=(T0, T0 + timedelta(days=999)))
+
+    PriceHistoryService.get_history(db, "TST", max_points=100, downsample="bucket")
+
+    assert "min(price_history.timestamp)" in db.sql(0)
+    assert "PARTITION BY price_history.asset_ticker, floor(" in db.sql(1)
+
+
+def test_lttb_downsample_caps_points():
+    db = FakeSession(rows=rows("TST", range(1000)))
+
+    points = PriceHistoryService.get_history(db, "TST", max_points=50)
+
+    assert len(points) == 50
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"start": T0, "end": T0 - timedelta(days=1)},
+        {"resolution": "day", "max_points": 10, "downsample": "bucket"},
+        {"resolution": "minute"},
+    ],
+)
+def test_invalid_parameters_are_rejected(kwargs):
+    with pytest.raises(ValueError):
+        PriceHistoryService.get_history(FakeSession(), "TST", **kwargs)
+
+
+def test_histories_of_several_tickers_come_from_one_query():
+    db = FakeSession(rows=rows("AAA", [1, 2]) + rows("BBB", [3]))
+
+    histories = PriceHistoryService.get_histories(
+        db, ["AAA", "BBB", "CCC"], resolution="day"
+    )
+
+    assert histories == {
+        "AAA": series([1, 2]),
+        "BBB": series([3]),
+        "CCC": [],
+    }
+    assert len(db.statements) == 1
+    assert "price_history.asset_ticker IN ('AAA', 'BBB', 'CCC')" in db.sql()
+
+
+def test_columnar_encoding_with_delta_timestamps():
+    points = series([1.5, 2.25, 3])
+
+    assert encode_columnar("TST", points) == {
+        "ticker": "TST",
+        "count": 3,
+        "encoding": "columnar",
+        "timestamps": [1577836800, 1577923200, 1578009600],
+        "prices": [1.5, 2.25, 3.0],
+    }
+    delta = encode_columnar("TST", points, delta=True)
+    assert delta["encoding"] == "delta"
+    assert delta["timestamps"] == [1577836800, 86400, 86400]
+    assert encode_columnar("TST", [], delta=True)["timestamps"] == []
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        (None, "rows"),
+        ("application/json", "rows"),
+        ("application/vnd.stakr.history.columnar+json", "columnar"),
+        ("text/html, application/vnd.stakr.history.delta+json;q=0.9", "delta"),
+    ],
+)
+def test_negotiate_encoding(accept, expected):
+    assert negotiate_encoding(accept) == expected
+
+
+def test_bars_are_keyed_by_ticker_and_timestamp():
+    table = PriceHistory.__table__
+
+    assert [c.name for c in table.primary_key.columns] == ["asset_ticker", "timestamp"]
+    # The key is the only index: no surrogate id, no single-column indexes.
+    assert "id" not in table.c
+    assert not table.indexes
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from app.services import price_refresh
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def test_is_price_fresh():
+    assert price_refresh.is_price_fresh(NOW - timedelta(seconds=30), 60, NOW)
+    assert not price_refresh.is_price_fresh(NOW - timedelta(seconds=90), 60, NOW)
+    assert not price_refresh.is_price_fresh(None, 60, NOW)
+    # Naive timestamps are read as UTC.
+    naive = (NOW - timedelta(seconds=30)).replace(tzinfo=None)
+    assert price_refresh.is_price_fresh(naive, 60, NOW)
+
+
+def test_stale_tickers_skips_fresh_and_duplicate_assets():
+    assets = [
+        SimpleNamespace(ticker="AAA", last_updated_at=NOW),
+        SimpleNamespace(ticker="BBB", last_updated_at=NOW - timedelta(hours=1)),
+        SimpleNamespace(ticker="BBB", last_updated_at=NOW - timedelta(hours=1)),
+        SimpleNamespace(ticker="CCC"),
+    ]
+
+    assert price_refresh.stale_tickers(assets, 300, NOW) == ["BBB", "CCC"]
+
+
+def test_persist_asset_prices_writes_in_one_statement(monkeypatch):
+    db = MagicMock()
+    monkeypatch.setattr(price_refresh, "get_session_factory", lambda: lambda: db)
+
+    fetched_at = {"AAA": NOW, "BBB": NOW}
+
+    written = price_refresh.persist_asset_prices(
+        {"AAA": 12.5, "BBB": None, "CCC": 3.0}, fetched_at
+    )
+
+    assert written == 1
+    db.execute.assert_called_once()
+    rows = db.execute.call_args.args[1]
+    # Stamped with the fetch time; prices without one are skipped.
+    assert [(row["ticker"], row["last_updated_at"]) for row in rows] == [("AAA", NOW)]
+    db.commit.assert_called_once_with()
+    db.close.assert_called_once_with()
+
+
+def test_persist_asset_prices_is_best_effort(monkeypatch):
+    db = MagicMock()
+    db.execute.side_effect = RuntimeError("db down")
+    monkeypatch.setattr(price_refresh, "get_session_factory", lambda: lambda: db)
+
+    assert price_refresh.persist_asset_prices({"AAA": 12.5}, {"AAA": NOW}) == 0
+    db.close.assert_called_once_with()
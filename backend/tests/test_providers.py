@@ -0,0 +1,116 @@
+from datetime import date, datetime, timezone
+
+import pandas as pd
+import pytest
+
+from app.services import providers
+from app.services.market_data import MarketDataService
+from app.services.market_sync import MarketSyncService
+from app.services.providers import RecordingProvider, ReplayProvider, set_provider
+from app.services.providers.base import MarketDataProvider
+from app.services.providers.yfinance_provider import history_rows
+
+BAR = datetime(2026, 3, 2, tzinfo=timezone.utc)
+
+
+class FakeProvider(MarketDataProvider):
+    name = "fake"
+
+    def __init__(self):
+        self.calls = []
+
+    def get_quote(self, ticker):
+        self.calls.append(("quote", ticker))
+        return 10.0
+
+    def get_quotes(self, tickers):
+        self.calls.append(("quotes", list(tickers)))
+        return {ticker: (None if ticker == "NONE" else 11.0) for ticker in tickers}
+
+    def get_history(self, ticker, period, start=None):
+        self.calls.append(("history", ticker))
+        return [(BAR, 12.5)]
+
+    def get_dividends(self, ticker):
+        self.calls.append(("dividends", ticker))
+        return [(date(2026, 1, 15), 0.25)]
+
+    def search(self, query, limit):
+        self.calls.append(("search", query))
+        return [{"ticker": "MC.PA", "name": "LVMH", "type": "EQUITY"}], False
+
+    def get_asset_info(self, ticker):
+        self.calls.append(("info", ticker))
+        return {"name": "LVMH", "currency": "EUR", "type": "stock", "price": 600.0}
+
+
+def test_build_provider_selects_by_name(tmp_path):
+    assert providers.build_provider("yfinance").name == "yfinance"
+    assert providers.build_provider("replay", str(tmp_path)).name == "replay"
+    recording = providers.build_provider("record", str(tmp_path))
+    assert recording.name == "record" and recording.inner.name == "yfinance"
+    with pytest.raises(ValueError):
+        providers.build_provider("bloomberg")
+
+
+def test_recorded_responses_replay_offline(tmp_path):
+    inner = FakeProvider()
+    recorder = RecordingProvider(inner, tmp_path)
+    recorder.get_quotes(["MC.PA", "NONE"])
+    recorder.get_quote("^FCHI")
+    recorder.get_history("MC.PA", "1y")
+    recorder.get_dividends("MC.PA")
+    recorder.search("  LVMH ", 10)
+    recorder.get_asset_info("MC.PA")
+
+    replay = ReplayProvider(tmp_path)
+    assert replay.get_quotes(["MC.PA", "NONE", "^FCHI"]) == {
+        "MC.PA": 11.0,
+        "NONE": None,
+        "^FCHI": 10.0,
+    }
+    assert replay.get_history("MC.PA", "1y") == [(BAR, 12.5)]
+    assert replay.get_dividends("MC.PA") == [(date(2026, 1, 15), 0.25)]
+    assert replay.search("lvmh", 10) == (
+        [{"ticker": "MC.PA", "name": "LVMH", "type": "EQUITY"}],
+        False,
+    )
+    assert replay.get_asset_info("MC.PA")["currency"] == "EUR"
+
+
+def test_replay_without_recording_returns_no_data(tmp_path):
+    replay = ReplayProvider(tmp_path)
+
+    assert replay.get_quote("AAA") is None
+    assert replay.get_history("AAA", "1mo") == []
+    assert replay.get_dividends("AAA") == []
+    assert replay.search("aaa", 10) == ([], False)
+    assert replay.get_asset_info("AAA") is None
+
+
+def test_services_use_the_configured_provider(db_mock):
+    fake = FakeProvider()
+    set_provider(fake)
+    db_mock.execute.return_value.rowcount = 1
+
+    assert MarketDataService.get_current_prices(["AAA", "NONE"]) == {
+        "AAA": 11.0,
+        "NONE": None,
+    }
+    assert MarketDataService.get_asset_info("MC.PA")["name"] == "LVMH"
+    added = MarketSyncService.sync_price_histories_for_tickers(db_mock, ["mc.pa"])
+
+    assert added == 1
+    assert ("history", "MC.PA") in fake.calls
+
+
+def test_history_rows_converts_column_wise_and_drops_gaps():
+    series = pd.Series(
+        [10.0, float("nan"), 12.0],
+        index=pd.date_range("2026-03-02", periods=3, tz="UTC"),
+    )
+
+    assert history_rows(series) == [
+        (BAR, 10.0),
+        (datetime(2026, 3, 4, tzinfo=timezone.utc), 12.0),
+    ]
@@ -0,0 +1,96 @@
+from app.services.quote_cache import FRESH, MISS, STALE, QuoteCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(**kwargs):
+    clock = FakeClock()
+    options = {
+        "max_size": 10,
+        "ttls": {"crypto": 10},
+        "default_ttl": 60,
+        "stale_seconds": 100,
+        "clock": clock,
+    }
+    options.update(kwargs)
+    return QuoteCache(**options), clock
+
+
+def test_fresh_stale_and_expired_states():
+    cache, clock = make_cache()
+    cache.set("AAPL", 150.0, "stock")
+
+    assert cache.get("AAPL") == (150.0, FRESH)
+
+    clock.now += 61
+    assert cache.get("AAPL") == (150.0, STALE)
+
+    clock.now += 100
+    assert cache.get("AAPL") == (None, MISS)
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "stale": 1,
+        "evictions": 0,
+        "refreshes": 0,
+        "size": 0,
+    }
+
+
+def test_ttl_depends_on_asset_type():
+    cache, clock = make_cache()
+    cache.set("BTC-USD", 30000.0, "crypto")
+    cache.set("AAPL", 150.0, "stock")
+
+    clock.now += 11
+
+    assert cache.get("BTC-USD")[1] == STALE
+    assert cache.get("AAPL")[1] == FRESH
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache, _clock = make_cache(max_size=2)
+    cache.set("A", 1.0)
+    cache.set("B", 2.0)
+    cache.get("A")  # A becomes most recently used
+    cache.set("C", 3.0)
+
+    assert cache.get("B") == (None, MISS)
+    assert cache.get("A")[0] == 1.0
+    assert cache.get("C")[0] == 3.0
+    assert cache.stats()["evictions"] == 1
+
+
+def test_refresh_in_background_updates_entry_once():
+    cache, clock = make_cache()
+    cache.set("AAPL", 150.0, "stock")
+    clock.now += 61
+
+    calls = []
+
+    def fetch(tickers):
+        calls.append(tickers)
+        return {ticker: 155.0 for ticker in tickers}
+
+    future = cache.refresh_in_background(["AAPL", "AAPL"], fetch)
+    future.result(timeout=5)
+
+    assert calls == [["AAPL"]]
+    assert cache.get("AAPL") == (155.0, FRESH)
+
+
+def test_clear_resets_entries_and_counters():
+    cache, _clock = make_cache()
+    cache.set("A", 1.0)
+    cache.get("A")
+
+    cache.clear()
+
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["hits"] == 0
@@ -1,6 +1,8 @@
 from datetime import datetime
 from decimal import Decimal
+from types import SimpleNamespace
 from unittest.mock import MagicMock
+from uuid import uuid4
 
 from fastapi.testclient import TestClient
 
@@ -38,15 +40,65 @@ def test_search_assets_endpoint(monkeypatch):
         "app.services.market_data.MarketDataService.search_assets",
         lambda q: [{"ticker": "ABC", "shortname": "ABC Corp"}],
     )
+    # A bare mock session reads as an empty asset table, so the search falls
+    # through to the mocked upstream.
+    db = MagicMock()
+    app.dependency_overrides[get_db] = override_get_db_factory(db)
 
     resp = client.get("/assets/search", params={"asset": "ABC"})
     assert resp.status_code == 200
-    assert "results" in resp.json()
+    assert resp.json()["results"] == [{"ticker": "ABC", "shortname": "ABC Corp"}]
+
+    app.dependency_overrides.clear()
+
+
+def test_get_asset_history_forwards_range_and_downsampling(monkeypatch):
+    calls = []
+
+    def fake_get_history(db, ticker, **kwargs):
+        calls.append((ticker, kwargs))
+        return [(datetime(2020, 1, 1), Decimal("10.5"))]
+
+    monkeypatch.setattr(
+        "app.routers.asset.PriceHistoryService.get_history", fake_get_history
+    )
+    app.dependency_overrides[get_db] = override_get_db_factory(MagicMock())
+    app.dependency_overrides[deps.get_current_user] = lambda: fake_user_normal()
+
+    resp = client.get(
+        "/assets/TST/history",
+        params={"start": "2020-01-01", "max_points": 300, "downsample": "bucket"},
+    )
+    assert resp.status_code == 200
+    assert resp.json()["count"] == 1
+    # Rows or columns depending on Accept: caches must key on it.
+    assert "Accept" in resp.headers["vary"].split(", ")
+    assert calls[0][1]["start"] == datetime(2020, 1, 1)
+    assert calls[0][1]["max_points"] == 300
+    assert calls[0][1]["downsample"] == "bucket"
+
+    assert client.get("/assets/TST/history?resolution=minute").status_code == 422
+
+    resp = client.get("/assets/TST/history?format=delta")
+    assert resp.headers["content-type"] == "application/vnd.stakr.history.delta+json"
+    assert resp.json()["prices"] == [10.5]
+    resp = client.get(
+        "/assets/TST/history",
+        headers={"Accept": "application/vnd.stakr.history.columnar+json"},
+    )
+    assert resp.json()["encoding"] == "columnar"
+    assert "Accept" in resp.headers["vary"].split(", ")
+    monkeypatch.undo()
+    resp = client.get("/assets/TST/history?start=2021-01-01&end=2020-01-01")
+    assert resp.status_code == 400
+    assert "Accept" in resp.headers["vary"].split(", ")
+
+    app.dependency_overrides.clear()
 
 
 def test_get_asset_history_and_sync_endpoints(monkeypatch):
     # Mock DB history query with dicts matching the schema
-    fake_history = [{"timestamp": datetime(2020, 1, 1), "price": Decimal("10.5")}]
+    fake_history = [("TST", datetime(2020, 1, 1), Decimal("10.5"))]
     db = MagicMock()
     db.query.return_value.filter.return_value.order_by.return_value.all.return_value = (
         fake_history
@@ -65,20 +117,33 @@ def test_get_asset_history_and_sync_endpoints(monkeypatch):
     # Now test sync endpoints which require superuser
     app.dependency_overrides[deps.get_current_user] = lambda: fake_user_super()
 
+    submitted = []
+    job_id = uuid4()
+
+    def fake_enqueue(db, kind, params=None):
+        submitted.append((kind, params))
+        return SimpleNamespace(id=job_id)
+
+    monkeypatch.setattr("app.routers.asset.enqueue_sync_job", fake_enqueue)
     monkeypatch.setattr(
-        "app.services.market_sync.MarketSyncService.sync_all_price_histories",
-        lambda db, period="1mo": 5,
-    )
-    monkeypatch.setattr(
-        "app.services.market_sync.MarketSyncService.sync_dividends", lambda db: 3
+        "app.routers.asset.get_sync_job_status",
+        lambda db, requested: (
+            {"id": str(requested), "status": "running"} if requested == job_id else None
+        ),
     )
 
-    resp2 = client.post("/assets/sync-history")
-    assert resp2.status_code == 200
-    assert resp2.json()["new_records_inserted"] == 5
+    resp2 = client.post("/assets/sync-history?period=max&concurrency=4")
+    assert resp2.status_code == 202
+    assert resp2.json()["job_id"] == str(job_id)
 
     resp3 = client.post("/assets/sync-dividends")
-    assert resp3.status_code == 200
-    assert resp3.json()["new_dividends_inserted"] == 3
+    assert resp3.status_code == 202
+    assert submitted == [
+        ("history", {"period": "max", "full": False, "concurrency": 4}),
+        ("dividends", None),
+    ]
+
+    assert client.get(f"/assets/sync-jobs/{job_id}").json()["status"] == "running"
+    assert client.get(f"/assets/sync-jobs/{uuid4()}").status_code == 404
 
     app.dependency_overrides.clear()
@@ -1,3 +1,5 @@
+import logging
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from types import SimpleNamespace
 from unittest.mock import MagicMock
@@ -101,9 +103,17 @@ def test_get_portfolio_summary(monkeypatch):
     )
     asset2 = SimpleNamespace(ticker="BBB", current_price=Decimal("11"))
 
+    requested = []
+
+    def fake_get_current_prices(
+        tickers, asset_types=None, deadline=None, fetched_at=None, use_cache=True
+    ):
+        requested.append(list(tickers))
+        return {ticker: None for ticker in tickers}
+
     monkeypatch.setattr(
-        "app.routers.portfolio.MarketDataService.get_current_price",
-        lambda _ticker: None,
+        "app.routers.portfolio.MarketDataService.get_current_prices",
+        fake_get_current_prices,
     )
 
     q_positions.join.return_value.filter.return_value.all.return_value = [
@@ -120,5 +130,184 @@ def test_get_portfolio_summary(monkeypatch):
     data = resp.json()
     # total_value = 1*10 + 2*11 = 32
     assert float(data["total_value"]) == 32.0
+    # All positions are priced in a single batched call.
+    assert requested == [["AAA", "BBB"]]
+
+    app.dependency_overrides.clear()
+
+
+def test_get_portfolio_summary_refreshes_only_stale_prices(monkeypatch):
+    db = MagicMock()
+    q_portfolio = MagicMock()
+    q_positions = MagicMock()
+    q_dividends = MagicMock()
+    db.query.side_effect = [q_portfolio, q_positions, q_dividends]
+
+    portfolio_id = uuid4()
+    q_portfolio.filter.return_value.first.return_value = SimpleNamespace(
+        id=str(portfolio_id), user_id=str(uuid4()), name="P"
+    )
+
+    now = datetime.now(timezone.utc)
+    fresh_pos = SimpleNamespace(
+        quantity=Decimal("1"), average_buy_price=Decimal("5"), asset_ticker="AAA"
+    )
+    fresh_asset = SimpleNamespace(
+        ticker="AAA", current_price=Decimal("10"), last_updated_at=now
+    )
+    stale_pos = SimpleNamespace(
+        quantity=Decimal("2"), average_buy_price=Decimal("7"), asset_ticker="BBB"
+    )
+    stale_asset = SimpleNamespace(
+        ticker="BBB",
+        current_price=Decimal("11"),
+        last_updated_at=now - timedelta(hours=1),
+    )
+    cached_pos = SimpleNamespace(
+        quantity=Decimal("1"), average_buy_price=Decimal("1"), asset_ticker="CCC"
+    )
+    cached_asset = SimpleNamespace(
+        ticker="CCC",
+        current_price=Decimal("3"),
+        last_updated_at=now - timedelta(minutes=5),
+    )
+    q_positions.join.return_value.filter.return_value.all.return_value = [
+        (fresh_pos, fresh_asset),
+        (stale_pos, stale_asset),
+        (cached_pos, cached_asset),
+    ]
+    q_dividends.filter.return_value.group_by.return_value.all.return_value = []
+
+    requested = []
+    persisted = []
+
+    def fake_get_current_prices(
+        tickers, asset_types=None, deadline=None, fetched_at=None, use_cache=True
+    ):
+        requested.append(list(tickers))
+        # BBB fetched upstream now; CCC served from a cache entry older than
+        # the stored price.
+        fetched_at["BBB"] = now
+        fetched_at["CCC"] = now - timedelta(minutes=10)
+        return {ticker: 12.0 for ticker in tickers}
+
+    monkeypatch.setattr(
+        "app.routers.portfolio.MarketDataService.get_current_prices",
+        fake_get_current_prices,
+    )
+    monkeypatch.setattr(
+        "app.routers.portfolio.persist_asset_prices",
+        lambda prices, fetched_at: persisted.append(
+            {ticker: (price, fetched_at[ticker]) for ticker, price in prices.items()}
+        ),
+    )
+
+    app.dependency_overrides[get_db] = override_get_db_factory(db)
+    app.dependency_overrides[deps.get_current_user] = lambda: fake_user()
+
+    resp = client.get(f"/portfolios/{portfolio_id}/summary", params={"max_age": 60})
+    assert resp.status_code == 200
+    # total_value = 1*10 + 1*3 (stored) + 2*12 (refreshed) = 37: CCC's cached
+    # quote is older than its stored price, which is kept.
+    assert float(resp.json()["total_value"]) == 37.0
+    assert requested == [["BBB", "CCC"]]
+    # The refreshed price is written after the response, not by the GET
+    # itself, stamped with its fetch time; the older cached one is not.
+    assert persisted == [{"BBB": (12.0, now)}]
+    db.commit.assert_not_called()
+
+    app.dependency_overrides.clear()
+
+
+def test_get_portfolio_summary_max_age_zero_skips_the_quote_cache(monkeypatch, caplog):
+    db = MagicMock()
+    q_portfolio = MagicMock()
+    q_positions = MagicMock()
+    q_dividends = MagicMock()
+    db.query.side_effect = [q_portfolio, q_positions, q_dividends]
+
+    portfolio_id = uuid4()
+    q_portfolio.filter.return_value.first.return_value = SimpleNamespace(
+        id=str(portfolio_id), user_id=str(uuid4()), name="P"
+    )
+    pos = SimpleNamespace(
+        quantity=Decimal("1"), average_buy_price=Decimal("5"), asset_ticker="AAA"
+    )
+    asset = SimpleNamespace(
+        ticker="AAA",
+        current_price=Decimal("10"),
+        last_updated_at=datetime.now(timezone.utc),
+    )
+    q_positions.join.return_value.filter.return_value.all.return_value = [(pos, asset)]
+    q_dividends.filter.return_value.group_by.return_value.all.return_value = []
+
+    calls = []
+
+    def fake_get_current_prices(
+        tickers, asset_types=None, deadline=None, fetched_at=None, use_cache=True
+    ):
+        calls.append(use_cache)
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(
+        "app.routers.portfolio.MarketDataService.get_current_prices",
+        fake_get_current_prices,
+    )
+
+    app.dependency_overrides[get_db] = override_get_db_factory(db)
+    app.dependency_overrides[deps.get_current_user] = lambda: fake_user()
+
+    with caplog.at_level(logging.WARNING, logger="app.routers.portfolio"):
+        resp = client.get(f"/portfolios/{portfolio_id}/summary", params={"max_age": 0})
+
+    assert resp.status_code == 200
+    assert calls == [False]
+    # A failed refresh falls back to the stored price.
+    assert float(resp.json()["total_value"]) == 10.0
+    assert "Price refresh failed" in caplog.text
+
+    app.dependency_overrides.clear()
+
+
+def test_get_portfolio_histories_reads_all_positions_at_once(monkeypatch):
+    db = MagicMock()
+    q_portfolio = MagicMock()
+    q_positions = MagicMock()
+    db.query.side_effect = [q_portfolio, q_positions]
+    q_portfolio.filter.return_value.first.return_value = SimpleNamespace(id=uuid4())
+    q_positions.filter.return_value.all.return_value = [("AAA",), ("BBB",)]
+
+    calls = []
+
+    def fake_get_histories(db, tickers, **options):
+        calls.append((tickers, options))
+        point = (datetime(2020, 1, 1, tzinfo=timezone.utc), Decimal("10"))
+        return {"AAA": [point], "BBB": []}
+
+    monkeypatch.setattr(
+        "app.routers.portfolio.PriceHistoryService.get_histories", fake_get_histories
+    )
+    app.dependency_overrides[get_db] = override_get_db_factory(db)
+    app.dependency_overrides[deps.get_current_user] = lambda: fake_user()
+
+    resp = client.get(f"/portfolios/{uuid4()}/histories?resolution=week")
+
+    app.dependency_overrides.clear()
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [h["ticker"] for h in data["histories"]] == ["AAA", "BBB"]
+    assert [h["count"] for h in data["histories"]] == [1, 0]
+    assert calls[0][0] == ["AAA", "BBB"]
+    assert calls[0][1]["resolution"] == "week"
+
+
+def test_get_portfolio_histories_unknown_portfolio():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = None
+    app.dependency_overrides[get_db] = override_get_db_factory(db)
+    app.dependency_overrides[deps.get_current_user] = lambda: fake_user()
+
+    resp = client.get(f"/portfolios/{uuid4()}/histories")
 
     app.dependency_overrides.clear()
+    assert resp.status_code == 404
@@ -0,0 +1,48 @@
+from app.services.search_cache import SearchCache, normalize_query
+
+APPLE = {"ticker": "AAPL", "name": "Apple Inc."}
+APPLOVIN = {"ticker": "APP", "name": "AppLovin Corporation"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query():
+    assert normalize_query("  Credit   AGRICOLE ") == "credit agricole"
+
+
+def test_exact_hit_and_expiry():
+    clock = FakeClock()
+    cache = SearchCache(max_size=10, ttl=60, clock=clock)
+    cache.set("app", [APPLE], truncated=True)
+
+    assert cache.get("APP") == [APPLE]
+
+    clock.now += 61
+    assert cache.get("app") is None
+    assert cache.stats() == {"hits": 1, "prefix_hits": 0, "misses": 1, "size": 0}
+
+
+def test_prefix_reuse_only_from_complete_result_sets():
+    cache = SearchCache(max_size=10, ttl=60)
+    cache.set("app", [APPLE, APPLOVIN], truncated=False)
+    cache.set("bit", [{"ticker": "BTC-USD", "name": "Bitcoin USD"}], truncated=True)
+
+    assert cache.get("apple") == [APPLE]
+    assert cache.get("applovin") == [APPLOVIN]
+    assert cache.get("bitcoin") is None
+    assert cache.stats()["prefix_hits"] == 2
+
+
+def test_least_recently_used_query_is_evicted():
+    cache = SearchCache(max_size=1, ttl=60)
+    cache.set("app", [APPLE], truncated=True)
+    cache.set("btc", [], truncated=True)
+
+    assert cache.get("app") is None
+    assert cache.stats()["size"] == 1
@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(timeout=5)
+        return 42
+
+    def call():
+        return flight.do(("quote", "AAPL"), fetch)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(call) for _ in range(4)]
+        # Let every caller join the in-flight call before it completes.
+        while flight.stats()["coalesced"] < 3:
+            pass
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == [42, 42, 42, 42]
+    assert calls == [1]
+    assert flight.stats() == {"issued": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_sequential_calls_are_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    for _ in range(2):
+        flight.do("key", lambda: calls.append(1))
+
+    assert len(calls) == 2
+    assert flight.stats()["issued"] == 2
+
+
+def test_errors_propagate_and_release_the_key():
+    flight = SingleFlight()
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError, match="upstream down"):
+        flight.do("key", boom)
+
+    assert flight.do("key", lambda: "ok") == "ok"
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_do_many_waits_on_items_already_in_flight():
+    flight = SingleFlight()
+    release = threading.Event()
+    batches = []
+
+    def fetch(items):
+        batches.append(sorted(items))
+        release.wait(timeout=5)
+        return {item: item.lower() for item in items}
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(flight.do_many, "quote", ["AAA", "BBB"], fetch)
+        while flight.stats()["in_flight"] < 2:
+            pass
+        second = pool.submit(flight.do_many, "quote", ["BBB", "CCC"], fetch)
+        while flight.stats()["coalesced"] < 1:
+            pass
+        release.set()
+
+        assert first.result(timeout=5) == {"AAA": "aaa", "BBB": "bbb"}
+        assert second.result(timeout=5) == {"CCC": "ccc", "BBB": "bbb"}
+
+    # BBB was fetched once, by the first batch.
+    assert batches == [["AAA", "BBB"], ["CCC"]]
+    assert flight.stats()["issued"] == 2
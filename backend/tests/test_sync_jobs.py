@@ -0,0 +1,214 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from app import worker
+from app.services import sync_jobs
+from app.services.sync_jobs import apply_result, claim_items, process_items
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def make_item(ticker, attempts=1, job_id=None):
+    return SimpleNamespace(
+        job_id=job_id or uuid4(),
+        ticker=ticker,
+        status="running",
+        attempts=attempts,
+        inserted=0,
+        error=None,
+        next_attempt_at=None,
+        finished_at=None,
+    )
+
+
+def test_enqueue_creates_one_item_per_asset():
+    db = MagicMock()
+    db.query.return_value.all.return_value = [("AAA",), ("BBB",)]
+
+    job = sync_jobs.enqueue_sync_job(db, "history", {"period": "max"})
+
+    assert job.status == "queued"
+    rows = db.execute.call_args.args[1]
+    assert [row["ticker"] for row in rows] == ["AAA", "BBB"]
+    assert db.commit.called
+
+
+def test_claim_skips_locked_items_and_marks_them_running():
+    db = MagicMock()
+    items = [make_item("AAA", attempts=0)]
+    db.execute.return_value.scalars.return_value = items
+
+    claimed = claim_items(db, 5, now=NOW)
+
+    assert claimed == items
+    assert items[0].status == "running"
+    assert items[0].attempts == 1
+    assert items[0].claimed_at == NOW
+    sql = str(
+        db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect())
+    )
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert db.commit.called
+
+
+def test_failed_items_are_retried_with_backoff(monkeypatch):
+    monkeypatch.setattr(sync_jobs, "SYNC_ITEM_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(sync_jobs, "SYNC_ITEM_RETRY_SECONDS", 10)
+    failure = {"status": "failed", "inserted": 0, "error": "boom"}
+
+    first, second, last = (make_item("AAA", attempts=n) for n in (1, 2, 3))
+    for item in (first, second, last):
+        apply_result(item, failure, now=NOW)
+
+    assert first.status == second.status == "pending"
+    assert first.next_attempt_at == NOW + timedelta(seconds=10)
+    assert second.next_attempt_at == NOW + timedelta(seconds=20)
+    assert last.status == "failed" and last.error == "boom"
+
+    done = make_item("BBB")
+    apply_result(done, {"status": "up_to_date", "inserted": 0}, now=NOW)
+    assert done.status == "succeeded" and done.finished_at == NOW
+
+
+def test_process_items_syncs_per_job_and_records_outcomes(monkeypatch):
+    job_id = uuid4()
+    job = SimpleNamespace(id=job_id, kind="history", params={"period": "max"})
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = job
+    db.query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+        ("succeeded", 1),
+        ("pending", 1),
+    ]
+    calls = []
+
+    def fake_report(db, tickers, period, full, concurrency, on_progress):
+        calls.append((tickers, period))
+        on_progress("AAA", {"status": "ok", "inserted": 4})
+        on_progress("BBB", {"status": "failed", "inserted": 0, "error": "boom"})
+        return {}
+
+    monkeypatch.setattr(
+        sync_jobs.MarketSyncService, "sync_price_histories_report", fake_report
+    )
+    aaa, bbb = make_item("AAA", job_id=job_id), make_item("BBB", job_id=job_id)
+
+    process_items(db, [aaa, bbb])
+
+    assert calls == [(["AAA", "BBB"], "max")]
+    assert (aaa.status, aaa.inserted) == ("succeeded", 4)
+    assert (bbb.status, bbb.error) == ("pending", "boom")
+    # BBB is retried later, so the job stays open.
+    assert not any(
+        "UPDATE sync_job" in str(c.args[0]) for c in db.execute.call_args_list
+    )
+
+
+def test_job_outcome_reflects_item_outcomes():
+    assert sync_jobs.job_outcome({"succeeded": 2, "pending": 1}) is None
+    assert sync_jobs.job_outcome({"failed": 1, "running": 1}) is None
+    assert sync_jobs.job_outcome({"succeeded": 3}) == "succeeded"
+    assert sync_jobs.job_outcome({"succeeded": 2, "failed": 1}) == "partial"
+    assert sync_jobs.job_outcome({"failed": 3}) == "failed"
+
+
+def test_finish_job_marks_a_job_whose_items_all_failed_failed():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+        ("failed", 3)
+    ]
+    db.execute.return_value.rowcount = 1
+
+    assert sync_jobs.finish_job(db, uuid4()) == "failed"
+    stmt = db.execute.call_args.args[0].compile(dialect=postgresql.dialect())
+    assert str(stmt).startswith("UPDATE sync_job SET status")
+    assert stmt.params["status"] == "failed"
+    assert db.commit.called
+
+
+def test_get_sync_job_status_aggregates_items():
+    job = SimpleNamespace(
+        id=uuid4(),
+        kind="dividends",
+        params={},
+        status="running",
+        created_at=NOW,
+        started_at=NOW - timedelta(seconds=30),
+        finished_at=NOW,
+    )
+    db = MagicMock()
+    db.query.return_value.filter.return_value.first.return_value = job
+    db.query.return_value.filter.return_value.group_by.return_value.all.return_value = [
+        ("succeeded", 3, 12),
+        ("failed", 1, None),
+        ("pending", 2, None),
+    ]
+    db.query.return_value.filter.return_value.all.return_value = [("BAD", "boom")]
+
+    status = sync_jobs.get_sync_job_status(db, job.id)
+
+    assert status["tickers_total"] == 6
+    assert status["tickers_done"] == 4
+    assert status["tickers_pending"] == 2
+    assert status["inserted"] == 12
+    assert status["failures"] == {"BAD": "boom"}
+    assert status["elapsed_seconds"] == 30
+
+
+def test_worker_round_claims_then_processes(monkeypatch):
+    db = MagicMock()
+    processed = []
+    monkeypatch.setattr(worker, "get_session_factory", lambda: lambda: db)
+    monkeypatch.setattr(worker, "claim_items", lambda db, batch: ["item"] * batch)
+    monkeypatch.setattr(
+        worker, "process_items", lambda db, items: processed.extend(items)
+    )
+
+    assert worker.run_once(batch=2) == 2
+    assert processed == ["item", "item"]
+    assert db.close.called
+
+
+def test_worker_maintains_partitions_between_rounds(monkeypatch):
+    stop = threading.Event()
+    maintained = []
+    rounds = []
+
+    def run_once():
+        rounds.append(1)
+        if len(rounds) == 3:
+            stop.set()
+        return 1
+
+    monkeypatch.setattr(worker, "run_once", run_once)
+    monkeypatch.setattr(
+        worker, "maintain_partitions", lambda: maintained.append(len(rounds))
+    )
+    monkeypatch.setattr(worker, "PRICE_HISTORY_MAINTENANCE_SECONDS", 3600)
+
+    worker.run(stop)
+    # Once on start, then not again before the interval.
+    assert maintained == [0]
+
+    stop.clear()
+    rounds.clear()
+    maintained.clear()
+    monkeypatch.setattr(worker, "PRICE_HISTORY_MAINTENANCE_SECONDS", 0)
+    worker.run(stop)
+    assert maintained == [0, 1, 2]
+
+
+def test_worker_survives_a_failed_partition_maintenance(monkeypatch):
+    stop = threading.Event()
+    monkeypatch.setattr(worker, "run_once", lambda: stop.set() or 1)
+    monkeypatch.setattr(
+        worker, "maintain_partitions", MagicMock(side_effect=RuntimeError("boom"))
+    )
+
+    worker.run(stop)
+
+    assert stop.is_set()
@@ -60,6 +60,20 @@ export async function getAssetHistory(ticker: string): Promise<PriceHistoryListR
   return response.data;
 }
 
+export interface PortfolioHistoriesResponse {
+  portfolio_id: string;
+  histories: PriceHistoryListResponse[];
+}
+
+export async function getPortfolioHistories(
+  portfolioId: string,
+): Promise<PortfolioHistoriesResponse> {
+  const response = await api.get<PortfolioHistoriesResponse>(
+    `/portfolios/${portfolioId}/histories`,
+  );
+  return response.data;
+}
+
 export async function createPortfolio(name: string): Promise<PortfolioResponse> {
   const response = await api.post<PortfolioResponse>('/portfolios/', {
     name,
@@ -2,7 +2,7 @@ import { useCallback, useEffect, useMemo, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { api } from '../api/client';
 import {
-  getAssetHistory,
+  getPortfolioHistories,
   getPortfolioPositions,
   getPortfolioSummary,
   listPortfolios,
@@ -299,15 +299,15 @@ export default function Dashboard({ onSessionInvalid }: DashboardProps) {
     const loadHistories = async () => {
       setHistoriesLoading(true);
       try {
-        const entries = await Promise.all(
-          activePositions.map(async (position) => {
-            const response = await getAssetHistory(position.asset_ticker);
-            return [position.asset_ticker, response.history] as const;
-          }),
-        );
+        // One request for every open position, instead of one per ticker.
+        const response = await getPortfolioHistories(portfolioId);
 
         if (!cancelled) {
-          setHistoriesByTicker(Object.fromEntries(entries));
+          setHistoriesByTicker(
+            Object.fromEntries(
+              response.histories.map((entry) => [entry.ticker, entry.history] as const),
+            ),
+          );
         }
       } catch (error: unknown) {
         const status = (error as { response?: { status?: number } })?.response?.status;